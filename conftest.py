@@ -1,49 +1,380 @@
+import os
+import json
+import time
 import pytest
 import logging
-import docker
-from src.docker_manager import DockerManager
+from src.backends import ContainerBackend, DockerBackend, FakeBackend
+from src.benchmark import BenchmarkRunner, baseline_path, load_baseline
+from src.docker_manager import DockerManager, DEFAULT_IMAGE
+from src.fake_node import FakeMesh, FakeWakuNode
+from src.images import DEFAULT_IMAGE_CACHE, ImageCache, check_rows, prepare_images
+from src.node_pool import NodePool
+from src.startup_profile import DEFAULT_HISTORY
 from src.waku_client import WakuClient
+from src.allocator import WorkerNamespace
+from src.metrics import REQUEST_METRICS
 from utils.helpers import setup_logging
+from utils.structured_log import new_run_id
+from utils.report import (
+    add_report_section, export_report_sections, import_report_sections, render_report_sections,
+    report_path as build_report_path
+)
 
-# Setup logging
-setup_logging()
+backend_key = pytest.StashKey[ContainerBackend]()
+logging_key = pytest.StashKey[object]()
+images_key = pytest.StashKey[list]()
+worker_reports_key = pytest.StashKey[list]()
+
+TEST_TOPIC = "/my-app/2/chatroom-1/proto"
+# Allocator slots of the standalone fake nodes, clear of every suite's nodes
+FAKE_NODE_FIRST_INDEX = 90
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--fake-nodes",
+        action="store_true",
+        default=os.environ.get("WAKU_FAKE_NODES") == "1",
+        help="Run against in-process fake Waku nodes instead of Docker containers"
+    )
+    parser.addoption(
+        "--stop-grace",
+        type=float,
+        default=2.0,
+        help="Seconds a node gets to stop on teardown before it is killed"
+    )
+    parser.addoption(
+        "--stream-logs",
+        action="store_true",
+        default=os.environ.get("WAKU_STREAM_LOGS") == "1",
+        help="Follow every node's logs from its start; otherwise only once a test waits on log events"
+    )
+    parser.addoption(
+        "--reuse-nodes",
+        action="store_true",
+        default=os.environ.get("WAKU_REUSE_NODES") == "1",
+        help="Adopt matching running nodes and leave them running after the session"
+    )
+    parser.addoption(
+        "--nwaku-image",
+        default=os.environ.get("WAKU_IMAGE", DEFAULT_IMAGE),
+        help="nwaku image to run the nodes from"
+    )
+    parser.addoption(
+        "--skip-image-prep",
+        action="store_true",
+        default=os.environ.get("WAKU_SKIP_IMAGE_PREP") == "1",
+        help="Do not pull and check the node image before the session"
+    )
+    parser.addoption(
+        "--image-digest",
+        default=os.environ.get("WAKU_IMAGE_DIGEST"),
+        metavar="SHA256",
+        help="Fail the session unless the node image has this digest (sha256:...)"
+    )
+    parser.addoption(
+        "--image-cache",
+        default=DEFAULT_IMAGE_CACHE,
+        help="File recording image checks, so later sessions skip the registry"
+    )
+    parser.addoption(
+        "--image-cache-ttl",
+        type=float,
+        default=24.0,
+        help="Hours an image check stays valid"
+    )
+    parser.addoption(
+        "--profile-startup",
+        action="store_true",
+        default=False,
+        help="Also time discv5 bootstrap (first peer connected) of every node start"
+    )
+    parser.addoption(
+        "--startup-history",
+        default=DEFAULT_HISTORY,
+        help="JSONL file the per-phase startup profile of each run is appended to"
+    )
+    parser.addoption(
+        "--perf",
+        action="store_true",
+        default=False,
+        help="Run the perf benchmark tier (skipped otherwise)"
+    )
+    parser.addoption("--perf-warmup", type=int, default=1,
+                     help="Discarded warmup runs per benchmark")
+    parser.addoption("--perf-repeat", type=int, default=5,
+                     help="Measured runs per benchmark")
+    parser.addoption("--perf-tolerance", type=float, default=0.2,
+                     help="Allowed regression against the baseline, as a fraction")
+    parser.addoption("--perf-baseline-dir", default="baselines",
+                     help="Directory of the per-image baseline JSON files")
+    parser.addoption("--perf-save", action="store_true", default=False,
+                     help="Save the results as the baseline of --nwaku-image")
+    parser.addoption("--perf-compare", default=None, metavar="IMAGE_OR_PATH",
+                     help="Fail benchmarks that regress against this image's baseline "
+                          "(or baseline file)")
+    parser.addoption("--soak-duration", type=float, default=None,
+                     help="Run the slow soak test for this many seconds (skipped otherwise)")
+    parser.addoption("--soak-rate", type=float, default=10.0,
+                     help="Publish rate of the soak test, in messages per second")
+    parser.addoption("--soak-interval", type=float, default=30.0,
+                     help="Seconds between soak samples")
+    parser.addoption(
+        "--structured-logs",
+        action="store_true",
+        default=os.environ.get("WAKU_STRUCTURED_LOGS") == "1",
+        help="Log through a background writer, adding JSONL records to logs/"
+    )
+    parser.addoption(
+        "--log-sample",
+        action="append",
+        default=[],
+        metavar="EVENT=N",
+        help="With --structured-logs, keep one in N records of EVENT (e.g. publish=100)"
+    )
+    parser.addoption(
+        "--log-max-rate",
+        type=float,
+        default=None,
+        help="With --structured-logs, at most this many records per event per second"
+    )
+    parser.addoption(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="Number of pre-started idle nodes in the node_pool fixture"
+    )
+
+def pytest_configure(config):
+    # xdist workers inherit the controller's run ID
+    os.environ.setdefault("WAKU_RUN_ID", new_run_id())
+    # Setup logging
+    if not config.getoption("--structured-logs"):
+        setup_logging()
+        return
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    sample_every = {}
+    for spec in config.getoption("--log-sample"):
+        event, _, every = spec.partition("=")
+        sample_every[event] = int(every)
+    config.stash[logging_key] = setup_logging(
+        structured=True,
+        jsonl_path=f"logs/run-{worker}.jsonl",
+        sample_every=sample_every,
+        max_events_per_second=config.getoption("--log-max-rate")
+    )
+
+def pytest_unconfigure(config):
+    queue_logging = config.stash.get(logging_key, None)
+    if queue_logging is not None:
+        queue_logging.stop()
 
 def pytest_sessionstart(session):
     """Called after the Session object has been created"""
-    # Clean up any existing resources before starting tests
-    print("\n=== Cleaning up existing Docker resources ===")
-    client = docker.from_env()
+    # One backend (and so one Docker API connection) serves the whole session
+    if session.config.getoption("--fake-nodes"):
+        backend = FakeBackend()
+    else:
+        backend = DockerBackend()
+    session.config.stash[backend_key] = backend
+    
+    # Pull the node image once, before any test runs, so it never counts
+    # against a test's timeout; xdist workers find it already present
+    if not hasattr(session.config, "workerinput") and \
+            not session.config.getoption("--skip-image-prep"):
+        image = session.config.getoption("--nwaku-image")
+        digest = session.config.getoption("--image-digest")
+        print(f"\n=== Preparing image {image} ===")
+        # Fake images have nothing worth remembering between sessions
+        cache = None if isinstance(backend, FakeBackend) else \
+            ImageCache(session.config.getoption("--image-cache"),
+                       ttl=session.config.getoption("--image-cache-ttl") * 3600)
+        checks = prepare_images(backend, [image], cache=cache,
+                                expected={image: digest} if digest else None)
+        session.config.stash[images_key] = checks
+        for check in checks:
+            state = "pulled" if check.pulled else "cached" if check.cached else "present"
+            print(f"{check.image}: {state} in {check.seconds:.2f}s ({check.digest or check.id})")
+    
+    # Only this worker's resources are touched, so parallel workers under
+    # pytest-xdist never remove each other's containers
+    namespace = WorkerNamespace.from_env()
     
-    # Remove existing containers
-    for container in client.containers.list(all=True):
-        if container.name.startswith('waku_node'):
-            try:
-                container.stop()
-                container.remove()
-                print(f"Cleaned up existing container: {container.name}")
-            except:
-                pass
+    # Reused nodes are adopted by start_waku_node, not removed up front
+    if session.config.getoption("--reuse-nodes"):
+        print(f"\n=== Reusing running Waku nodes ({namespace.worker_id}) ===")
+        return
     
-    # Remove existing networks
-    for network in client.networks.list():
-        if network.name == 'waku':
-            try:
-                network.remove()
-                print(f"Cleaned up existing network: {network.name}")
-            except:
-                pass
+    # Clean up any existing resources before starting tests
+    print(f"\n=== Cleaning up existing Docker resources ({namespace.worker_id}) ===")
+    
+    # Remove existing containers and networks, found by label on the server
+    grace = session.config.getoption("--stop-grace")
+    for name in backend.remove_labelled(namespace.labels, timeout=grace):
+        print(f"Cleaned up existing resource: {name}")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf"):
+        return
+    skip_perf = pytest.mark.skip(reason="perf benchmarks need --perf")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip_perf)
+
+def pytest_sessionfinish(session, exitstatus):
+    backend = session.config.stash.get(backend_key, None)
+    # Report tables live in each process; an xdist worker hands its own to
+    # the controller, which renders the HTML report
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["waku_report"] = json.dumps({
+            "sections": export_report_sections(),
+            "requests": REQUEST_METRICS.rows(),
+            "backend_ops": {op: [backend.op_counts[op], backend.op_seconds[op]]
+                            for op in backend.op_counts} if backend is not None else {},
+        }, default=str)
+    if backend is not None:
+        backend.close()
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collect the report tables of a finished xdist worker"""
+    data = getattr(node, "workeroutput", {}).get("waku_report")
+    if data:
+        node.config.stash.setdefault(worker_reports_key, []).append(
+            (node.gateway.id, json.loads(data)))
+
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    """Add harness measurement tables to the HTML report summary"""
+    backend = session.config.stash.get(backend_key, None)
+    worker_reports = session.config.stash.get(worker_reports_key, [])
+    op_counts, op_seconds = {}, {}
+    if backend is not None:
+        op_counts.update(backend.op_counts)
+        op_seconds.update(backend.op_seconds)
+    for _, report in worker_reports:
+        for op, (count, seconds) in report["backend_ops"].items():
+            op_counts[op] = op_counts.get(op, 0) + count
+            op_seconds[op] = op_seconds.get(op, 0.0) + seconds
+    if op_counts:
+        add_report_section("Container backend operations", [
+            {"operation": op, "calls": op_counts[op], "total_s": op_seconds[op],
+             "mean_ms": op_seconds[op] / op_counts[op] * 1000}
+            for op in sorted(op_counts)
+        ])
+    checks = session.config.stash.get(images_key, None)
+    if checks:
+        add_report_section("Image preparation", check_rows(checks))
+    # Node names are namespaced per worker, so worker rows never overlap
+    request_rows = REQUEST_METRICS.rows()
+    for _, report in worker_reports:
+        request_rows.extend(report["requests"])
+    if request_rows:
+        add_report_section("REST requests by node and endpoint", request_rows)
+    for worker, report in sorted(worker_reports, key=lambda item: item[0]):
+        import_report_sections(report["sections"], source=worker)
+    prefix.extend(render_report_sections())
 
 @pytest.fixture(scope="session")
-def docker_manager():
+def worker_namespace():
+    """Names, ports, subnet and labels reserved for this xdist worker"""
+    return WorkerNamespace.from_env()
+
+@pytest.fixture(scope="session")
+def report_path(worker_namespace):
+    """Builds this worker's path of a report file, so parallel workers never overwrite each other"""
+    def _report_path(name: str) -> str:
+        return build_report_path(name, worker_namespace.worker_id)
+    return _report_path
+
+@pytest.fixture(scope="session")
+def docker_manager(pytestconfig, worker_namespace):
     """Docker manager fixture"""
-    manager = DockerManager()
+    manager = DockerManager(
+        stream_logs=pytestconfig.getoption("--stream-logs"),
+        backend=pytestconfig.stash[backend_key],
+        namespace=worker_namespace,
+        stop_grace=pytestconfig.getoption("--stop-grace"),
+        reuse=pytestconfig.getoption("--reuse-nodes"),
+        reset_topics=[TEST_TOPIC],
+        image=pytestconfig.getoption("--nwaku-image"),
+        profile_bootstrap=pytestconfig.getoption("--profile-startup")
+    )
+    for check in pytestconfig.stash.get(images_key, []):
+        manager.prepared_images[check.image] = check
     yield manager
     manager.cleanup()
+    if manager.startup_profile.samples:
+        manager.startup_profile.append_history(pytestconfig.getoption("--startup-history"),
+                                               os.environ["WAKU_RUN_ID"])
+        add_report_section("Node startup phases", manager.startup_profile.rows())
+
+@pytest.fixture(scope="session")
+def node_pool(pytestconfig, docker_manager):
+    """Pre-started idle nodes; borrow one with ``node_pool.node()``"""
+    pool = NodePool(docker_manager, size=pytestconfig.getoption("--pool-size"),
+                    reset_topics=[TEST_TOPIC]).start()
+    yield pool
+    # Reused pool nodes stay running along with everything else
+    if not docker_manager.reuse:
+        pool.close()
+
+@pytest.fixture(scope="session")
+def benchmark(pytestconfig, report_path):
+    """Benchmark runner of the perf tier; results are written at session end"""
+    image = pytestconfig.getoption("--nwaku-image")
+    directory = pytestconfig.getoption("--perf-baseline-dir")
+    baseline = None
+    compare_to = pytestconfig.getoption("--perf-compare")
+    if compare_to:
+        path = compare_to if compare_to.endswith(".json") else baseline_path(directory, compare_to)
+        baseline = load_baseline(path)
+    runner = BenchmarkRunner(
+        image,
+        warmup=pytestconfig.getoption("--perf-warmup"),
+        repeat=pytestconfig.getoption("--perf-repeat"),
+        tolerance=pytestconfig.getoption("--perf-tolerance"),
+        baseline=baseline
+    )
+    yield runner
+    if runner.results:
+        runner.write(report_path("perf.json"))
+        add_report_section(f"Benchmarks ({image})", runner.rows())
+        if pytestconfig.getoption("--perf-save"):
+            print(f"\nSaved perf baseline: {runner.write(baseline_path(directory, image))}")
+
+@pytest.fixture
+def settle(pytestconfig):
+    """Sleep to let relay state propagate; a no-op on fake nodes, which relay synchronously"""
+    def _settle(seconds: float) -> None:
+        if not pytestconfig.getoption("--fake-nodes"):
+            time.sleep(seconds)
+    return _settle
+
+@pytest.fixture
+def fake_node_factory(worker_namespace):
+    """Starts standalone fake nodes, each on its own mesh, without a container backend"""
+    allocator = worker_namespace.allocator()
+    nodes = []
+    def _start(**kwargs) -> FakeWakuNode:
+        config = allocator.node_config(FAKE_NODE_FIRST_INDEX + len(nodes))
+        node = FakeWakuNode(config["name"], FakeMesh(), rest_port=int(config["ports"]["rest"]),
+                            **kwargs)
+        node.start()
+        nodes.append(node)
+        return node
+    yield _start
+    for node in nodes:
+        node.stop()
+
+@pytest.fixture
+def fake_node(fake_node_factory):
+    """One standalone fake node; runs with or without --fake-nodes"""
+    return fake_node_factory()
 
 @pytest.fixture
 def test_topic():
     """Test topic for messaging"""
-    return "/my-app/2/chatroom-1/proto"
+    return TEST_TOPIC
 
 @pytest.fixture
 def test_message():
@@ -52,29 +383,9 @@ def test_message():
 
 # Node configurations
 @pytest.fixture
-def node1_config():
-    return {
-        "name": "waku_node1",
-        "ports": {
-            "rest": "21161",
-            "tcp": "21162", 
-            "websocket": "21163",
-            "discv5": "21164",
-            "rpc": "21165"
-        },
-        "extip": "172.18.111.226"
-    }
+def node1_config(worker_namespace):
+    return worker_namespace.allocator().node_config(0)
 
 @pytest.fixture  
-def node2_config():
-    return {
-        "name": "waku_node2",
-        "ports": {
-            "rest": "21171",
-            "tcp": "21172",
-            "websocket": "21173", 
-            "discv5": "21174",
-            "rpc": "21175"
-        },
-        "extip": "172.18.111.227"
-    }
\ No newline at end of file
+def node2_config(worker_namespace):
+    return worker_namespace.allocator().node_config(1)
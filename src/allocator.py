@@ -0,0 +1,181 @@
+import os
+import ipaddress
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+PORT_NAMES = ("rest", "tcp", "websocket", "discv5", "rpc", "metrics")
+
+
+class PortAllocator:
+    """Hands out non-overlapping REST/TCP/websocket/discv5/RPC/metrics port blocks"""
+
+    def __init__(self, base_port: int = 21161, stride: int = 10,
+                 max_nodes: Optional[int] = None):
+        if stride < len(PORT_NAMES):
+            raise ValueError(f"stride must be at least {len(PORT_NAMES)}")
+        self.base_port = base_port
+        self.stride = stride
+        self.max_nodes = max_nodes
+
+    def ports_for(self, index: int) -> Dict[str, str]:
+        """Port block of the node at ``index``"""
+        if self.max_nodes is not None and index >= self.max_nodes:
+            raise ValueError(f"Port range starting at {self.base_port} holds "
+                             f"only {self.max_nodes} nodes")
+        first = self.base_port + index * self.stride
+        if first + len(PORT_NAMES) - 1 > 65535:
+            raise ValueError(f"No ports left for node index {index}")
+        return {name: str(first + offset) for offset, name in enumerate(PORT_NAMES)}
+
+
+class IPAllocator:
+    """Hands out static addresses inside a network subnet"""
+
+    def __init__(self, subnet: str = "172.18.0.0/16",
+                 first_ip: str = "172.18.111.226",
+                 gateway: Optional[str] = None):
+        self.subnet = ipaddress.ip_network(subnet)
+        self.first_ip = ipaddress.ip_address(first_ip)
+        if self.first_ip not in self.subnet:
+            raise ValueError(f"{first_ip} is not in {subnet}")
+        self.gateway = ipaddress.ip_address(gateway) if gateway else next(self.subnet.hosts())
+
+    def ip_for(self, index: int) -> str:
+        """Address of the node at ``index``"""
+        ip = self.first_ip + index
+        if ip not in self.subnet or ip == self.subnet.broadcast_address:
+            raise ValueError(f"Subnet {self.subnet} exhausted at node index {index}")
+        if ip == self.gateway:
+            raise ValueError(f"Node index {index} collides with gateway {self.gateway}")
+        return str(ip)
+
+
+class NodeAllocator:
+    """Allocates names, ports and network IPs for Waku nodes.
+
+    Allocation is index based and deterministic, so ``node_config(0)`` is
+    always the same node. ``allocate`` is thread safe and skips any name
+    passed in ``taken``.
+    """
+
+    def __init__(self, name_prefix: str = "waku_node",
+                 ports: Optional[PortAllocator] = None,
+                 ips: Optional[IPAllocator] = None):
+        self.name_prefix = name_prefix
+        self.ports = ports or PortAllocator()
+        self.ips = ips or IPAllocator()
+        self._in_use = set()
+        self._lock = threading.Lock()
+
+    def node_config(self, index: int) -> Dict[str, Any]:
+        """Configuration of the node at ``index``"""
+        return {
+            "name": f"{self.name_prefix}{index + 1}",
+            "ports": self.ports.ports_for(index),
+            "extip": self.ips.ip_for(index)
+        }
+
+    def allocate(self, count: int = 1, taken: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Reserve ``count`` node configurations not yet handed out"""
+        taken = set(taken)
+        configs = []
+        with self._lock:
+            index = 0
+            while len(configs) < count:
+                config = self.node_config(index)
+                if index not in self._in_use and config["name"] not in taken:
+                    self._in_use.add(index)
+                    configs.append(config)
+                index += 1
+        return configs
+
+    def release(self, name: str) -> None:
+        """Return a node's resources to the pool"""
+        with self._lock:
+            for index in list(self._in_use):
+                if f"{self.name_prefix}{index + 1}" == name:
+                    self._in_use.discard(index)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._in_use.clear()
+
+
+class WorkerNamespace:
+    """Per pytest-xdist worker resource namespace.
+
+    Each worker gets its own container name prefix, network name, subnet,
+    port range and label, so suites can run with ``-n`` without colliding
+    or cleaning up each other's containers. Without xdist (worker
+    ``master``) the original names, ports and subnet are used; worker
+    ``gwN`` gets slot ``N + 1``.
+    """
+
+    PORTS_PER_WORKER = 1000
+    PORT_STRIDE = 10
+    # Extra /24 bridges per worker for multi-network topologies
+    TOPOLOGY_NETWORKS = 16
+    # Main subnets in 10/8 stay below 10.192.0.0, where the topology
+    # bridges start, so the two ranges never overlap
+    TOPOLOGY_OCTET = 192
+
+    def __init__(self, worker_id: str = "master"):
+        self.worker_id = worker_id
+        self.index = int(worker_id[2:]) + 1 if worker_id.startswith("gw") else 0
+        if worker_id == "master":
+            self.name_prefix = "waku_node"
+            self.network = "waku"
+        else:
+            self.name_prefix = f"waku_{worker_id}_node"
+            self.network = f"waku_{worker_id}"
+        # 172.18.0.0/16 .. 172.31.0.0/16 first, then 10.14.0.0/16 .. 10.191.0.0/16
+        if self.index < 14:
+            prefix = f"172.{18 + self.index}"
+        elif self.index < self.TOPOLOGY_OCTET:
+            prefix = f"10.{self.index}"
+        else:
+            raise ValueError(f"Too many workers for distinct subnets: {worker_id}")
+        self.subnet = f"{prefix}.0.0/16"
+        self.gateway = f"{prefix}.0.1"
+        self.first_ip = f"{prefix}.111.226"
+        self.base_port = 21161 + self.index * self.PORTS_PER_WORKER
+        if self.base_port + self.PORTS_PER_WORKER > 65535:
+            raise ValueError(f"Too many workers for distinct port ranges: {worker_id}")
+        # Every container and network of this worker carries these labels
+        self.labels = {"waku.managed": "true", "waku.worker": worker_id}
+
+    @classmethod
+    def from_env(cls) -> "WorkerNamespace":
+        """Namespace of the current process, from ``PYTEST_XDIST_WORKER``"""
+        return cls(os.environ.get("PYTEST_XDIST_WORKER", "master"))
+
+    def allocator(self) -> NodeAllocator:
+        return NodeAllocator(
+            name_prefix=self.name_prefix,
+            ports=PortAllocator(base_port=self.base_port, stride=self.PORT_STRIDE,
+                                max_nodes=self.max_nodes),
+            ips=IPAllocator(self.subnet, self.first_ip, self.gateway)
+        )
+
+    def topology_network(self, number: int) -> Dict[str, str]:
+        """Name, subnet, gateway and first node IP of extra bridge ``number``.
+
+        These /24s come from 10.192.0.0/10, clear of every worker's main
+        subnet, so they can coexist with the main network.
+        """
+        if not 0 <= number < self.TOPOLOGY_NETWORKS:
+            raise ValueError(f"Only {self.TOPOLOGY_NETWORKS} topology networks per worker")
+        slot = self.index * self.TOPOLOGY_NETWORKS + number
+        if self.TOPOLOGY_OCTET + slot // 256 > 255:
+            raise ValueError(f"Too many workers for distinct topology networks: {self.worker_id}")
+        prefix = f"10.{self.TOPOLOGY_OCTET + slot // 256}.{slot % 256}"
+        return {
+            "name": f"{self.network}_net{number}",
+            "subnet": f"{prefix}.0/24",
+            "gateway": f"{prefix}.1",
+            "first_ip": f"{prefix}.10",
+        }
+
+    @property
+    def max_nodes(self) -> int:
+        return self.PORTS_PER_WORKER // self.PORT_STRIDE
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional, List
+from urllib.parse import quote, urlsplit
+
+import aiohttp
+
+from src.metrics import REQUEST_METRICS, RequestMetrics, endpoint_of
+from src.waku_client import Payload, WakuClient
+
+
+class NodeSlots:
+    """In-flight request caps: one semaphore per node URL per event loop.
+
+    Clients sharing a ``NodeSlots`` share each node's cap, however many of
+    them point at it. Semaphores are made for the running loop, so the same
+    clients can be used again under a later ``asyncio.run``.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        # loop -> {base_url: semaphore}; entries go with their loop
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def semaphore(self, base_url: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            per_loop = self._semaphores.setdefault(loop, {})
+            if base_url not in per_loop:
+                per_loop[base_url] = asyncio.Semaphore(self.max_in_flight)
+            return per_loop[base_url]
+
+
+class AsyncClientPool:
+    """Shared, bounded HTTP connection pool for many ``AsyncWakuClient``s.
+
+    ``limit`` caps open connections across the whole cluster and
+    ``limit_per_node`` caps them per node REST endpoint. Clients made by
+    ``client()`` also share a semaphore of ``max_in_flight_per_node`` per
+    node, so queued requests wait for a slot instead of piling up in the
+    connector. Requests are recorded into ``metrics`` like ``WakuClient``'s.
+    """
+
+    def __init__(self, limit: int = 1000, limit_per_node: int = 100,
+                 max_in_flight_per_node: Optional[int] = None,
+                 timeout: float = 30, metrics: Optional[RequestMetrics] = None):
+        self.limit = limit
+        self.limit_per_node = limit_per_node
+        self.max_in_flight_per_node = max_in_flight_per_node or limit_per_node
+        self.timeout = timeout
+        self.metrics = metrics
+        self.slots = NodeSlots(self.max_in_flight_per_node)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_node
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._session_loop = loop
+        return self._session
+
+    def client(self, base_url: str, timeout: Optional[float] = None,
+               metrics: Optional[RequestMetrics] = None,
+               node: Optional[str] = None) -> "AsyncWakuClient":
+        return AsyncWakuClient(
+            base_url,
+            timeout=timeout or self.timeout,
+            session=self.session,
+            slots=self.slots,
+            metrics=metrics if metrics is not None else self.metrics,
+            node=node
+        )
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self) -> "AsyncClientPool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+class AsyncWakuClient:
+    """asyncio counterpart of ``WakuClient`` with the same method surface.
+
+    Without ``slots`` the client caps its own requests at ``max_in_flight``;
+    clients from one ``AsyncClientPool`` share the cap of each node.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 max_in_flight: int = 100, slots: Optional[NodeSlots] = None,
+                 metrics: Optional[RequestMetrics] = None, node: Optional[str] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        # Recorded like ``InstrumentedSession``: the shared registry by
+        # default, labelled host:port unless ``node`` is given
+        self.metrics = metrics if metrics is not None else REQUEST_METRICS
+        self.node = node
+        self._session = session
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._owns_session = session is None
+        self.slots = slots or NodeSlots(max_in_flight)
+
+    @property
+    def max_in_flight(self) -> int:
+        return self.slots.max_in_flight
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # An owned session is remade for each loop, like the semaphores
+        loop = asyncio.get_running_loop()
+        if (self._session is None or self._session.closed
+                or (self._owns_session and self._session_loop is not loop)):
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+            self._session_loop = loop
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self) -> "AsyncWakuClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        # The semaphore and response are both released by their context
+        # managers, so a cancelled task never leaks a slot or a connection.
+        url = f"{self.base_url}{path}"
+        parts = urlsplit(url)
+        node = self.node or parts.netloc
+        endpoint = endpoint_of(parts.path)
+        body = kwargs.get("data")
+        if "json" in kwargs:
+            body = json.dumps(kwargs["json"]).encode()
+        sent = len(body) if body else 0
+        async with self.slots.semaphore(self.base_url):
+            # Timed from the send, not from the wait for a slot
+            started = time.perf_counter()
+            try:
+                async with self.session.request(
+                    method, url, timeout=self.timeout, **kwargs
+                ) as response:
+                    received = len(await response.read())
+            except Exception:
+                self.metrics.record(node, method, endpoint, time.perf_counter() - started,
+                                    sent, error=True)
+                raise
+            self.metrics.record(node, method, endpoint, time.perf_counter() - started,
+                                sent, received, response.status,
+                                error=response.status >= 400)
+        # The body was read above; these parse it without touching the connection
+        response.raise_for_status()
+        if response.content_type == "application/json":
+            return await response.json()
+        return await response.text()
+
+    async def get_debug_info(self) -> Dict[str, Any]:
+        """Get node debug information"""
+        try:
+            return await self._request("GET", "/debug/v1/info")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Failed to get debug info: {e!r}")
+            raise
+
+    async def get_enr_uri(self) -> str:
+        """Extract ENR URI from debug info"""
+        debug_info = await self.get_debug_info()
+        return debug_info.get('enrUri', '')
+
+    async def subscribe_to_topic(self, topics: List[str]) -> bool:
+        """Subscribe to relay topics"""
+        try:
+            await self._request(
+                "POST", "/relay/v1/auto/subscriptions",
+                headers={
+                    "accept": "text/plain",
+                    "content-type": "application/json"
+                },
+                json=topics
+            )
+            logging.info(f"Subscribed to topics: {topics}")
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Failed to subscribe to topics: {e!r}")
+            return False
+
+    async def publish_message(self, content_topic: str, payload: Payload,
+                              timestamp: Optional[int] = None) -> bool:
+        """Publish a message to a topic; ``payload`` is text or raw bytes"""
+        return await self.publish_encoded(
+            WakuClient.encode_message(content_topic, payload, timestamp))
+
+    async def publish_encoded(self, body: bytes) -> bool:
+        """Publish a pre-encoded message body (see ``WakuClient.encode_message``)"""
+        try:
+            await self._request(
+                "POST", "/relay/v1/auto/messages",
+                headers={"content-type": "application/json"},
+                data=body
+            )
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Failed to publish message: {e!r}")
+            return False
+
+    async def get_messages(self, content_topic: str) -> List[Dict[str, Any]]:
+        """Get messages from a topic"""
+        try:
+            encoded_topic = quote(content_topic, safe='')
+            return await self._request("GET", f"/relay/v1/auto/messages/{encoded_topic}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Failed to get messages: {e!r}")
+            return []
+
+    async def get_peers(self) -> List[Dict[str, Any]]:
+        """Get connected peers"""
+        try:
+            return await self._request("GET", "/admin/v1/peers")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Failed to get peers: {e!r}")
+            return []
+
+    async def wait_for_peer_connection(self, expected_peer_count: int = 1,
+                                       max_wait: int = 60) -> bool:
+        """Wait for peer connections to be established"""
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < max_wait:
+            peers = await self.get_peers()
+            if len(peers) >= expected_peer_count:
+                logging.info(f"Found {len(peers)} peer(s)")
+                return True
+            await asyncio.sleep(2)
+
+        logging.warning("Timeout waiting for peer connections")
+        return False
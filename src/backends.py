@@ -0,0 +1,400 @@
+import math
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Dict, Any, List, Optional, Callable, Sequence
+
+import docker
+
+from src.fake_node import FakeMesh, FakeWakuNode, FakeContainer, FakeNetwork
+
+
+class BackendError(Exception):
+    """A container backend operation failed"""
+
+
+class ContainerNotFound(BackendError):
+    """No container with the requested name exists"""
+
+
+class ContainerBackend(ABC):
+    """Container operations ``DockerManager`` needs, independent of Docker.
+
+    Every public operation is timed into ``op_seconds``/``op_counts`` so the
+    cost of the backend can be told apart from the harness's own overhead.
+    """
+
+    def __init__(self, max_workers: int = 16):
+        self.max_workers = max_workers
+        self.op_seconds: Dict[str, float] = {}
+        self.op_counts: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, op: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._stats_lock:
+                self.op_seconds[op] = self.op_seconds.get(op, 0.0) + elapsed
+                self.op_counts[op] = self.op_counts.get(op, 0) + 1
+
+    def inspect_image(self, image: str) -> Optional[Dict[str, Any]]:
+        """ID and repo digests of a local image, or None if it is not present"""
+        with self.timed("inspect_image"):
+            return self._inspect_image(image)
+
+    def pull_image(self, image: str) -> Dict[str, Any]:
+        """Pull (or refresh) an image from its registry; returns ``inspect_image`` of it"""
+        with self.timed("pull_image"):
+            return self._pull_image(image)
+
+    def create_network(self, name: str, subnet: str, gateway: str,
+                       labels: Optional[Dict[str, str]] = None):
+        """Create a bridge network, or return the existing one of that name"""
+        with self.timed("create_network"):
+            return self._create_network(name, subnet, gateway, labels or {})
+
+    def create_node(self, name: str, image: str, command: List[str],
+                    ports: Dict[str, str], labels: Optional[Dict[str, str]] = None):
+        """Create (but do not start) a node container"""
+        with self.timed("create_node"):
+            return self._create_node(name, image, command, ports, labels or {})
+
+    def start_node(self, container) -> None:
+        with self.timed("start_node"):
+            try:
+                container.start()
+            except docker.errors.APIError as e:
+                raise BackendError(str(e)) from e
+
+    def stop_node(self, container, timeout: float = 10) -> None:
+        """Stop a container, keeping it so it can be started again"""
+        with self.timed("stop_node"):
+            try:
+                container.stop(timeout=int(math.ceil(timeout)))
+            except docker.errors.APIError as e:
+                raise BackendError(str(e)) from e
+
+    def kill_node(self, container, signal: str = "SIGKILL") -> None:
+        with self.timed("kill_node"):
+            try:
+                container.kill(signal=signal)
+            except docker.errors.APIError as e:
+                raise BackendError(str(e)) from e
+
+    def pause_node(self, container) -> None:
+        """Freeze every process of a container"""
+        with self.timed("pause_node"):
+            try:
+                container.pause()
+            except docker.errors.APIError as e:
+                raise BackendError(str(e)) from e
+
+    def unpause_node(self, container) -> None:
+        with self.timed("unpause_node"):
+            try:
+                container.unpause()
+            except docker.errors.APIError as e:
+                raise BackendError(str(e)) from e
+
+    def run_node(self, name: str, image: str, command: List[str],
+                 ports: Dict[str, str], labels: Optional[Dict[str, str]] = None):
+        """Create and start a node container"""
+        container = self.create_node(name, image, command, ports, labels)
+        self.start_node(container)
+        return container
+
+    def get_container(self, name: str):
+        """Look a container up by name; raises ``ContainerNotFound``"""
+        with self.timed("get_container"):
+            return self._get_container(name)
+
+    def connect_to_network(self, network, container, ip_address: str) -> None:
+        with self.timed("connect_to_network"):
+            try:
+                network.connect(container, ipv4_address=ip_address)
+            except docker.errors.APIError as e:
+                raise BackendError(str(e)) from e
+
+    def stop_remove(self, container, timeout: float = 10) -> None:
+        """Stop a container within ``timeout`` seconds, then remove it.
+
+        If the graceful stop fails the container is killed, and removal is
+        forced either way.
+        """
+        with self.timed("stop_remove"):
+            try:
+                container.stop(timeout=int(math.ceil(timeout)))
+            except Exception as e:
+                logging.warning(f"Graceful stop of {container.name} failed, killing: {e}")
+                try:
+                    container.kill()
+                except Exception:
+                    pass
+            container.remove(force=True)
+
+    def remove_network(self, network) -> None:
+        with self.timed("remove_network"):
+            network.remove()
+
+    def list_containers(self, labels: Optional[Dict[str, str]] = None,
+                        name_prefix: str = "") -> List[Any]:
+        """Containers (running or not) carrying all ``labels``.
+
+        Label matching is done by the backend (server side for Docker), so
+        the cost does not grow with unrelated containers on the host.
+        """
+        with self.timed("list_containers"):
+            return [c for c in self._list_containers(labels or {})
+                    if c.name.startswith(name_prefix)]
+
+    def list_networks(self, labels: Optional[Dict[str, str]] = None,
+                      name: Optional[str] = None) -> List[Any]:
+        with self.timed("list_networks"):
+            return [n for n in self._list_networks(labels or {})
+                    if name is None or n.name == name]
+
+    def remove_labelled(self, labels: Dict[str, str], timeout: float = 10,
+                        include_networks: bool = True) -> List[str]:
+        """Concurrently stop and remove every container (and network) with ``labels``.
+
+        Returns the names of what was removed.
+        """
+        containers = self.list_containers(labels)
+        results = self.run_batch([partial(self.stop_remove, c, timeout) for c in containers])
+        removed = []
+        for container, result in zip(containers, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Error removing container {container.name}: {result}")
+            else:
+                removed.append(container.name)
+        if include_networks:
+            for network in self.list_networks(labels):
+                try:
+                    self.remove_network(network)
+                    removed.append(network.name)
+                except Exception as e:
+                    logging.warning(f"Error removing network {network.name}: {e}")
+        return removed
+
+    def run_batch(self, operations: Sequence[Callable[[], Any]],
+                  max_workers: Optional[int] = None) -> List[Any]:
+        """Run independent operations concurrently.
+
+        Returns one entry per operation, in order: its result, or the
+        exception it raised.
+        """
+        if not operations:
+            return []
+
+        def call(operation):
+            try:
+                return operation()
+            except Exception as e:
+                return e
+
+        workers = min(max_workers or self.max_workers, len(operations))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(call, operations))
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def _inspect_image(self, image: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def _pull_image(self, image: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def _create_network(self, name: str, subnet: str, gateway: str,
+                        labels: Dict[str, str]):
+        ...
+
+    @abstractmethod
+    def _create_node(self, name: str, image: str, command: List[str],
+                     ports: Dict[str, str], labels: Dict[str, str]):
+        ...
+
+    @abstractmethod
+    def _get_container(self, name: str):
+        ...
+
+    @abstractmethod
+    def _list_containers(self, labels: Dict[str, str]) -> List[Any]:
+        ...
+
+    @abstractmethod
+    def _list_networks(self, labels: Dict[str, str]) -> List[Any]:
+        ...
+
+
+class DockerBackend(ContainerBackend):
+    """Docker daemon backend sharing a single API client"""
+
+    def __init__(self, client=None, max_workers: int = 16):
+        super().__init__(max_workers)
+        # Pool sized so batched operations do not queue on connections
+        self.client = client or docker.from_env(max_pool_size=max(max_workers * 2, 10))
+
+    @staticmethod
+    def _image_info(image) -> Dict[str, Any]:
+        return {"id": image.id, "digests": list(image.attrs.get("RepoDigests") or [])}
+
+    def _inspect_image(self, image: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._image_info(self.client.images.get(image))
+        except docker.errors.ImageNotFound:
+            return None
+        except docker.errors.APIError as e:
+            raise BackendError(str(e)) from e
+
+    def _pull_image(self, image: str) -> Dict[str, Any]:
+        logging.info(f"Pulling image {image}")
+        try:
+            return self._image_info(self.client.images.pull(image))
+        except docker.errors.APIError as e:
+            raise BackendError(str(e)) from e
+
+    def _create_network(self, name: str, subnet: str, gateway: str,
+                        labels: Dict[str, str]):
+        try:
+            network = self.client.networks.create(
+                name,
+                driver="bridge",
+                labels=labels,
+                ipam=docker.types.IPAMConfig(
+                    pool_configs=[
+                        docker.types.IPAMPool(
+                            subnet=subnet,
+                            gateway=gateway
+                        )
+                    ]
+                )
+            )
+            logging.info(f"Created network: {name}")
+            return network
+        except docker.errors.APIError as e:
+            if "already exists" in str(e):
+                logging.info(f"Using existing network: {name}")
+                return self.client.networks.get(name)
+            raise BackendError(str(e)) from e
+
+    def _create_node(self, name: str, image: str, command: List[str],
+                     ports: Dict[str, str], labels: Dict[str, str]):
+        kwargs = dict(command=command, ports=ports, detach=True, name=name, labels=labels)
+        try:
+            try:
+                return self.client.containers.create(image, **kwargs)
+            except docker.errors.ImageNotFound:
+                logging.info(f"Pulling image {image}")
+                self.client.images.pull(image)
+                return self.client.containers.create(image, **kwargs)
+        except docker.errors.APIError as e:
+            raise BackendError(str(e)) from e
+
+    def _get_container(self, name: str):
+        try:
+            return self.client.containers.get(name)
+        except docker.errors.NotFound as e:
+            raise ContainerNotFound(name) from e
+
+    @staticmethod
+    def _label_filters(labels: Dict[str, str]) -> Dict[str, List[str]]:
+        return {"label": [f"{key}={value}" for key, value in labels.items()]} if labels else {}
+
+    def _list_containers(self, labels: Dict[str, str]) -> List[Any]:
+        return self.client.containers.list(all=True, filters=self._label_filters(labels))
+
+    def _list_networks(self, labels: Dict[str, str]) -> List[Any]:
+        return self.client.networks.list(filters=self._label_filters(labels))
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class FakeBackend(ContainerBackend):
+    """In-memory backend whose containers are in-process ``FakeWakuNode``s"""
+
+    def __init__(self, host: str = "127.0.0.1", mesh: Optional[FakeMesh] = None,
+                 max_workers: int = 16):
+        super().__init__(max_workers)
+        self.host = host
+        self.mesh = mesh or FakeMesh()
+        self.containers: Dict[str, FakeContainer] = {}
+        self.networks: Dict[str, FakeNetwork] = {}
+        # Images "pulled" so far; a digest is derived from the image name
+        self.images: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _inspect_image(self, image: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.images.get(image)
+
+    def _pull_image(self, image: str) -> Dict[str, Any]:
+        name, _, pinned = image.partition("@")
+        if ":" in name.rsplit("/", 1)[-1]:
+            name = name.rsplit(":", 1)[0]
+        digest = pinned or f"sha256:{hashlib.sha256(image.encode()).hexdigest()}"
+        info = {"id": f"sha256:{hashlib.sha256(digest.encode()).hexdigest()}",
+                "digests": [f"{name}@{digest}"]}
+        with self._lock:
+            self.images[image] = info
+        return info
+
+    def _create_network(self, name: str, subnet: str, gateway: str,
+                        labels: Dict[str, str]):
+        with self._lock:
+            return self.networks.setdefault(name, FakeNetwork(name, subnet, gateway, labels))
+
+    def _create_node(self, name: str, image: str, command: List[str],
+                     ports: Dict[str, str], labels: Dict[str, str]):
+        with self._lock:
+            existing = self.containers.get(name)
+            if existing is not None and existing.status != "removed":
+                raise BackendError(f"Conflict: container name {name} is already in use")
+            container = FakeContainer(FakeWakuNode.from_command(name, command, self.mesh,
+                                                                host=self.host),
+                                      labels=labels)
+            self.containers[name] = container
+            return container
+
+    def _get_container(self, name: str):
+        container = self.containers.get(name)
+        if container is None or container.status == "removed":
+            raise ContainerNotFound(name)
+        return container
+
+    @staticmethod
+    def _matches(item, labels: Dict[str, str]) -> bool:
+        return all(item.labels.get(key) == value for key, value in labels.items())
+
+    def _list_containers(self, labels: Dict[str, str]) -> List[Any]:
+        with self._lock:
+            return [c for c in self.containers.values()
+                    if c.status != "removed" and self._matches(c, labels)]
+
+    def _list_networks(self, labels: Dict[str, str]) -> List[Any]:
+        with self._lock:
+            return [n for n in self.networks.values() if self._matches(n, labels)]
+
+    def stop_remove(self, container, timeout: float = 10) -> None:
+        super().stop_remove(container, timeout)
+        with self._lock:
+            if self.containers.get(container.name) is container:
+                del self.containers[container.name]
+
+    def remove_network(self, network) -> None:
+        super().remove_network(network)
+        with self._lock:
+            self.networks.pop(network.name, None)
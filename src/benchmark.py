@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import time
+import logging
+import statistics
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable
+
+from utils.report import write_json_report
+
+# Bumped whenever the baseline file layout changes
+BASELINE_SCHEMA = 1
+
+
+@dataclass
+class Measurement:
+    """Repeated samples of one benchmark metric"""
+    name: str
+    unit: str
+    lower_is_better: bool = True
+    samples: List[float] = field(default_factory=list)
+    warmup: int = 0
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples) if self.samples else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "unit": self.unit,
+            "lower_is_better": self.lower_is_better,
+            "median": self.median,
+            "mean": statistics.fmean(self.samples) if self.samples else 0.0,
+            "min": min(self.samples, default=0.0),
+            "max": max(self.samples, default=0.0),
+            "stdev": self.stdev,
+            "warmup": self.warmup,
+            "samples": list(self.samples),
+        }
+
+
+@dataclass
+class Regression:
+    """A metric that got worse than its baseline by more than the tolerance"""
+    name: str
+    unit: str
+    baseline: float
+    current: float
+    change: float
+
+    def __str__(self) -> str:
+        return (f"{self.name}: {self.current:.3f}{self.unit} vs baseline "
+                f"{self.baseline:.3f}{self.unit} ({self.change:+.1%})")
+
+
+def baseline_path(directory: str, image: str) -> str:
+    """Baseline file of an nwaku image, e.g. ``baselines/wakuorg_nwaku_v0.24.0.json``"""
+    return os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]+", "_", image) + ".json")
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("schema") != BASELINE_SCHEMA:
+        raise ValueError(f"{path} has baseline schema {baseline.get('schema')}, "
+                         f"expected {BASELINE_SCHEMA}")
+    return baseline
+
+
+def compare(name: str, current: Measurement, baseline: Dict[str, Any],
+            tolerance: float) -> Optional[Regression]:
+    """Regression of ``current`` against the baseline entry, if beyond ``tolerance``"""
+    entry = baseline.get("metrics", {}).get(name)
+    if entry is None or not entry.get("median"):
+        return None
+    reference = entry["median"]
+    change = (current.median - reference) / reference
+    worse = change > tolerance if current.lower_is_better else change < -tolerance
+    return Regression(name, current.unit, reference, current.median, change) if worse else None
+
+
+class BenchmarkRunner:
+    """Runs benchmark callables with warmup and repetition.
+
+    ``measure`` calls ``func`` ``warmup`` times, discarding the results,
+    then ``repeat`` times, recording what it returns (or, if it returns
+    None, how long it took). With a ``baseline`` loaded, ``check`` reports
+    metrics that regressed by more than ``tolerance`` (a fraction).
+    """
+
+    def __init__(self, image: str, warmup: int = 1, repeat: int = 5,
+                 tolerance: float = 0.2, baseline: Optional[Dict[str, Any]] = None):
+        self.image = image
+        self.warmup = warmup
+        self.repeat = repeat
+        self.tolerance = tolerance
+        self.baseline = baseline
+        self.results: Dict[str, Measurement] = {}
+
+    def measure(self, name: str, func: Callable[[], Optional[float]], unit: str = "s",
+                lower_is_better: bool = True, warmup: Optional[int] = None,
+                repeat: Optional[int] = None) -> Measurement:
+        warmup = self.warmup if warmup is None else warmup
+        repeat = self.repeat if repeat is None else repeat
+        measurement = Measurement(name, unit, lower_is_better, warmup=warmup)
+        for _ in range(warmup):
+            func()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            value = func()
+            measurement.samples.append(time.perf_counter() - started if value is None
+                                       else float(value))
+        self.results[name] = measurement
+        logging.info(f"Benchmark {name}: median {measurement.median:.4f}{unit} "
+                     f"(stdev {measurement.stdev:.4f}, n={repeat})")
+        return measurement
+
+    def check(self, name: str) -> Optional[Regression]:
+        if self.baseline is None or name not in self.results:
+            return None
+        return compare(name, self.results[name], self.baseline, self.tolerance)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "schema": BASELINE_SCHEMA,
+            "image": self.image,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "warmup": self.warmup,
+            "repeat": self.repeat,
+            "metrics": {name: m.as_dict() for name, m in sorted(self.results.items())},
+        }
+
+    def rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for name, measurement in sorted(self.results.items()):
+            row = {"metric": name, "unit": measurement.unit,
+                   "median": measurement.median, "stdev": measurement.stdev}
+            entry = (self.baseline or {}).get("metrics", {}).get(name)
+            if entry:
+                row["baseline"] = entry["median"]
+                row["change_pct"] = ((measurement.median - entry["median"]) / entry["median"] * 100
+                                     if entry["median"] else 0.0)
+            rows.append(row)
+        return rows
+
+    def write(self, path: str) -> str:
+        return write_json_report(path, self.as_dict())
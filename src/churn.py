@@ -0,0 +1,268 @@
+import math
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+from src.latency import decode_probe, encode_probe, percentile
+from src.load_generator import LoadGenerator
+from utils.helpers import decode_base64_payload
+from utils.report import add_report_section, write_json_report
+
+ACTIONS = ("restart", "kill", "pause")
+
+
+@dataclass
+class ChurnStep:
+    """One scheduled disruption.
+
+    ``targets`` names the nodes, or with ``fraction`` a random share of the
+    cluster (at least one node) is drawn when the step runs. Nodes stay
+    down (stopped, killed or paused) for ``down_s`` seconds.
+    """
+    at_s: float
+    action: str
+    targets: Sequence[str] = ()
+    fraction: Optional[float] = None
+    down_s: float = 1.0
+
+    def __post_init__(self):
+        if self.action not in ACTIONS:
+            raise ValueError(f"Unknown churn action {self.action!r}, expected one of {ACTIONS}")
+        if not self.targets and self.fraction is None:
+            raise ValueError("A churn step needs targets or a fraction")
+
+
+def every(interval: float, count: int, action: str = "restart",
+          targets: Union[Sequence[str], float] = 0.25, down_s: float = 1.0,
+          start_s: float = 0.0) -> List[ChurnStep]:
+    """``count`` steps ``interval`` seconds apart, against fixed nodes or a fraction"""
+    if isinstance(targets, (int, float)):
+        return [ChurnStep(start_s + i * interval, action, fraction=float(targets), down_s=down_s)
+                for i in range(count)]
+    return [ChurnStep(start_s + i * interval, action, tuple(targets), down_s=down_s)
+            for i in range(count)]
+
+
+@dataclass
+class ChurnEvent:
+    """Recovery of one node from one disruption.
+
+    ``restore_s`` is how long bringing the node back took (for restarts,
+    until it served its ENR again). ``reconnect_s`` runs from then until
+    the node has as many connected peers as before, ``resume_s`` until the
+    first probe published after that point reaches it. None means it did
+    not recover within the timeout.
+    """
+    node: str
+    action: str
+    at_s: float
+    down_s: float
+    peers_before: int
+    restore_s: Optional[float] = None
+    reconnect_s: Optional[float] = None
+    resume_s: Optional[float] = None
+    error: str = ""
+
+    @property
+    def recovered(self) -> bool:
+        return self.reconnect_s is not None and self.resume_s is not None
+
+
+@dataclass
+class ChurnReport:
+    events: List[ChurnEvent] = field(default_factory=list)
+    published: int = 0
+    failed: int = 0
+
+    @property
+    def unrecovered(self) -> List[ChurnEvent]:
+        return [event for event in self.events if not event.recovered]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [asdict(event) for event in self.events]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Recovery time percentiles per action"""
+        rows = []
+        for action in ACTIONS:
+            events = [e for e in self.events if e.action == action]
+            if not events:
+                continue
+            reconnect = sorted(e.reconnect_s for e in events if e.reconnect_s is not None)
+            resume = sorted(e.resume_s for e in events if e.resume_s is not None)
+            rows.append({
+                "action": action,
+                "events": len(events),
+                "unrecovered": sum(1 for e in events if not e.recovered),
+                "reconnect_p50_s": percentile(reconnect, 50),
+                "reconnect_max_s": reconnect[-1] if reconnect else 0.0,
+                "resume_p50_s": percentile(resume, 50),
+                "resume_max_s": resume[-1] if resume else 0.0,
+            })
+        return rows
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "failed": self.failed,
+            "summary": self.summary(),
+            "events": self.rows(),
+        }
+
+
+class ChurnRunner:
+    """Disrupts cluster nodes on a schedule while traffic keeps flowing.
+
+    A background ``LoadGenerator`` publishes at ``rate`` across all nodes.
+    At each step the chosen nodes are stopped, killed or paused together,
+    brought back after ``down_s``, re-subscribed (a restart loses relay
+    subscriptions) and then polled every ``poll_interval`` for their peer
+    count and for probes published by a node that was left alone.
+    """
+
+    def __init__(self, manager, nodes, content_topic: str, rate: float = 10.0,
+                 seed: Optional[int] = None, recovery_timeout: float = 60.0,
+                 poll_interval: float = 0.1, ready_timeout: float = 60.0):
+        self.manager = manager
+        self.nodes = list(nodes)
+        self.content_topic = content_topic
+        self.probe_topic = content_topic.rstrip("/") + "-churn-probe"
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.recovery_timeout = recovery_timeout
+        self.poll_interval = poll_interval
+        self.ready_timeout = ready_timeout
+        self.clients = {node.name: node.client(timeout=5) for node in self.nodes}
+        self.report = ChurnReport()
+        self._stop = threading.Event()
+        self._probe_seq = 0
+
+    def _load(self) -> None:
+        generator = LoadGenerator(list(self.clients.values()), [self.content_topic],
+                                  rate=self.rate, mode="open")
+        while not self._stop.is_set():
+            result = generator.run(duration=1.0)
+            self.report.published += result.succeeded
+            self.report.failed += result.failed
+
+    def _peer_count(self, name: str) -> int:
+        return len(self.clients[name].get_connected_peer_ids())
+
+    def _choose(self, step: ChurnStep) -> List[str]:
+        if step.targets:
+            return list(step.targets)
+        names = [node.name for node in self.nodes]
+        count = min(max(1, math.ceil(step.fraction * len(names))), len(names))
+        return self.rng.sample(names, count)
+
+    def _disrupt(self, action: str, name: str) -> None:
+        if action == "restart":
+            self.manager.stop_node(name)
+        elif action == "kill":
+            self.manager.kill_node(name)
+        else:
+            self.manager.pause_node(name)
+
+    def _restore(self, event: ChurnEvent) -> float:
+        """Bring a node back; returns when it was back, on the monotonic clock"""
+        started = time.monotonic()
+        if event.action == "pause":
+            self.manager.unpause_node(event.node)
+        else:
+            self.manager.start_node(event.node, ready_timeout=self.ready_timeout)
+        self.clients[event.node].subscribe_to_topic([self.content_topic, self.probe_topic])
+        back = time.monotonic()
+        event.restore_s = back - started
+        return back
+
+    def _measure(self, events: Dict[str, ChurnEvent], back: Dict[str, float],
+                 publisher: Optional[str]) -> None:
+        """Poll the recovered nodes until they are reconnected and receive probes"""
+        # Probes count once sent after the earliest node was back
+        first_back = min(back.values(), default=time.monotonic())
+        restored_ns = time.time_ns() - int((time.monotonic() - first_back) * 1e9)
+        deadline = time.monotonic() + self.recovery_timeout
+        waiting = dict(events)
+        while waiting and time.monotonic() < deadline:
+            if publisher is not None:
+                self._probe_seq += 1
+                self.clients[publisher].publish_message(
+                    self.probe_topic, encode_probe(publisher, self._probe_seq, time.time_ns()))
+            time.sleep(self.poll_interval)
+            now = time.monotonic()
+            for name, event in list(waiting.items()):
+                client = self.clients[name]
+                elapsed = now - back[name]
+                if event.reconnect_s is None and self._peer_count(name) >= event.peers_before:
+                    event.reconnect_s = elapsed
+                if event.resume_s is None and publisher is not None:
+                    for msg in client.get_messages(self.probe_topic):
+                        probe = decode_probe(decode_base64_payload(msg.get("payload", "")))
+                        if probe is not None and probe[2] >= restored_ns:
+                            event.resume_s = elapsed
+                            break
+                if event.reconnect_s is not None and (event.resume_s is not None
+                                                      or publisher is None):
+                    del waiting[name]
+        for name, event in waiting.items():
+            logging.warning(f"{name} did not recover from {event.action} "
+                            f"within {self.recovery_timeout}s")
+
+    def _batch(self, events: Dict[str, ChurnEvent], operation) -> Dict[str, Any]:
+        """Apply ``operation`` to every event without an error yet, concurrently"""
+        pending = [event for event in events.values() if not event.error]
+        results = self.manager.backend.run_batch(
+            [lambda event=event: operation(event) for event in pending])
+        succeeded = {}
+        for event, result in zip(pending, results):
+            if isinstance(result, Exception):
+                event.error = str(result)
+                logging.warning(f"Churn {event.action} of {event.node} failed: {result}")
+            else:
+                succeeded[event.node] = result
+        return succeeded
+
+    def _run_step(self, step: ChurnStep, elapsed_s: float) -> None:
+        victims = self._choose(step)
+        bystanders = [name for name in self.clients if name not in victims]
+        publisher = bystanders[0] if bystanders else None
+        events = {name: ChurnEvent(name, step.action, elapsed_s, step.down_s,
+                                   peers_before=self._peer_count(name))
+                  for name in victims}
+        logging.info(f"Churn: {step.action} {victims} for {step.down_s}s")
+
+        self._batch(events, lambda event: self._disrupt(event.action, event.node))
+        time.sleep(step.down_s)
+        back = self._batch(events, self._restore)
+        self._measure({name: events[name] for name in back}, back, publisher)
+        self.report.events.extend(events.values())
+
+    def run(self, steps: Sequence[ChurnStep]) -> ChurnReport:
+        """Execute ``steps`` in time order, then return the per-event recovery report"""
+        for client in self.clients.values():
+            client.subscribe_to_topic([self.content_topic, self.probe_topic])
+        self._stop.clear()
+        loader = threading.Thread(target=self._load, daemon=True, name="churn-load")
+        started = time.monotonic()
+        loader.start()
+        try:
+            for step in sorted(steps, key=lambda s: s.at_s):
+                delay = started + step.at_s - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self._run_step(step, time.monotonic() - started)
+        finally:
+            self._stop.set()
+            loader.join()
+
+        for row in self.report.summary():
+            logging.info(f"Churn {row['action']}: {row['events']} events, reconnect p50 "
+                         f"{row['reconnect_p50_s']:.2f}s, resume p50 {row['resume_p50_s']:.2f}s")
+        return self.report
+
+    def write_report(self, path: str) -> str:
+        add_report_section("Churn recovery", self.report.summary())
+        return write_json_report(path, self.report.as_dict())
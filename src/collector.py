@@ -0,0 +1,168 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import deque, defaultdict
+from typing import Dict, Any, List, Optional, Callable, Hashable, Iterable, Sequence
+
+from src.waku_client import WakuClient
+
+KeyFunc = Callable[[Dict[str, Any]], Optional[Hashable]]
+
+
+def message_key(msg: Dict[str, Any]) -> int:
+    """64-bit hash of a relay message's topic, payload and timestamp"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(msg.get("contentTopic", "").encode())
+    digest.update(b"\0")
+    digest.update(msg.get("payload", "").encode())
+    digest.update(b"\0")
+    digest.update(str(msg.get("timestamp", "")).encode())
+    return int.from_bytes(digest.digest(), "big")
+
+
+class MessageIndex:
+    """Bounded per-node index of seen message keys.
+
+    Lookups are plain dict hits. Once ``max_entries`` (node, key) pairs are
+    stored the oldest are evicted first; ``evicted`` counts them so a test
+    can tell a real loss from a ceiling hit.
+    """
+
+    def __init__(self, max_entries: int = 1_000_000):
+        self.max_entries = max_entries
+        self._seen: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self._order: deque = deque()
+        self._duplicates: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def add(self, node: str, key: Hashable, seen_ns: int) -> bool:
+        """Record ``key`` at ``node``; False if it was already there"""
+        with self._lock:
+            seen = self._seen[node]
+            if key in seen:
+                dups = self._duplicates[node]
+                dups[key] = dups.get(key, 0) + 1
+                return False
+            seen[key] = seen_ns
+            self._order.append((node, key))
+            while len(self._order) > self.max_entries:
+                old_node, old_key = self._order.popleft()
+                self._seen[old_node].pop(old_key, None)
+                self._duplicates[old_node].pop(old_key, None)
+                self.evicted += 1
+            return True
+
+    def has_seen(self, node: str, key: Hashable) -> bool:
+        return key in self._seen.get(node, {})
+
+    def first_seen(self, node: str, key: Hashable) -> Optional[int]:
+        """Time (ns since epoch) ``node`` first returned ``key``"""
+        return self._seen.get(node, {}).get(key)
+
+    def duplicates(self, node: str, key: Hashable) -> int:
+        return self._duplicates.get(node, {}).get(key, 0)
+
+    def missing(self, node: str, keys: Iterable[Hashable]) -> List[Hashable]:
+        """Keys of ``keys`` that ``node`` has not seen"""
+        seen = self._seen.get(node, {})
+        return [key for key in keys if key not in seen]
+
+    def count(self, node: str) -> int:
+        return len(self._seen.get(node, {}))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class MessageCollector:
+    """Continuously drains the relay message cache of every node.
+
+    nwaku only keeps ``--rest-relay-cache-capacity`` messages per topic and
+    each GET empties the cache, so one snapshot at the end of a run loses
+    everything that was evicted in between. The collector reads every node
+    every ``interval`` seconds on its own thread and records what it finds
+    in a ``MessageIndex``.
+    """
+
+    def __init__(self, clients: Dict[str, WakuClient], content_topics: Sequence[str],
+                 interval: float = 0.05, max_entries: int = 1_000_000,
+                 key_func: KeyFunc = message_key):
+        self.clients = clients
+        self.content_topics = list(content_topics)
+        self.interval = interval
+        self.key_func = key_func
+        self.index = MessageIndex(max_entries)
+        self.polls = 0
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def drain(self, node: str) -> int:
+        """Read every topic of ``node`` once; return the number of new keys"""
+        client = self.clients[node]
+        added = 0
+        for topic in self.content_topics:
+            messages = client.get_messages(topic)
+            seen_ns = time.time_ns()
+            for msg in messages:
+                key = self.key_func(msg)
+                if key is not None and self.index.add(node, key, seen_ns):
+                    added += 1
+        self.polls += 1
+        return added
+
+    def _run(self, node: str) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain(node)
+            except Exception as e:
+                logging.warning(f"Collector drain of {node} failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> "MessageCollector":
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, args=(node,), daemon=True,
+                             name=f"collector-{node}")
+            for node in self.clients
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, final_drain: bool = True) -> None:
+        """Stop the drain threads, optionally reading every node once more"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if final_drain:
+            for node in self.clients:
+                self.drain(node)
+
+    def __enter__(self) -> "MessageCollector":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def has_seen(self, node: str, key: Hashable) -> bool:
+        return self.index.has_seen(node, key)
+
+    def missing(self, node: str, keys: Iterable[Hashable]) -> List[Hashable]:
+        return self.index.missing(node, keys)
+
+    def wait_for(self, nodes: Iterable[str], keys: Sequence[Hashable],
+                 timeout: float = 10.0) -> bool:
+        """Wait until every node in ``nodes`` has seen every key in ``keys``"""
+        pending = {node: list(keys) for node in nodes}
+        deadline = time.monotonic() + timeout
+        while True:
+            pending = {node: self.index.missing(node, remaining)
+                       for node, remaining in pending.items()}
+            if not any(pending.values()):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.interval)
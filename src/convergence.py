@@ -0,0 +1,211 @@
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Iterable, Set
+
+from src.readiness import Backoff
+from src.waku_client import WakuClient
+
+
+class MeshGraph:
+    """Peer graph assembled from each node's own ``/admin/v1/peers`` view.
+
+    ``update`` replaces one node's view, so the graph can be refreshed a
+    node at a time. A link counts once either end reports it.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = list(names)
+        self.observed: Dict[str, Set[str]] = {name: set() for name in self.names}
+        self.reported: Set[str] = set()
+
+    def update(self, node: str, peers: Iterable[str]) -> bool:
+        """Record ``node``'s peers; True if its view changed"""
+        peers = {peer for peer in peers if peer in self.observed and peer != node}
+        self.reported.add(node)
+        if peers == self.observed[node]:
+            return False
+        self.observed[node] = peers
+        return True
+
+    def adjacency(self) -> Dict[str, Set[str]]:
+        adjacency = {name: set(peers) for name, peers in self.observed.items()}
+        for name, peers in self.observed.items():
+            for peer in peers:
+                adjacency[peer].add(name)
+        return adjacency
+
+    def degrees(self) -> Dict[str, int]:
+        return {name: len(peers) for name, peers in self.adjacency().items()}
+
+    def edge_count(self) -> int:
+        return sum(self.degrees().values()) // 2
+
+    def _distances(self, adjacency: Dict[str, Set[str]], source: str) -> Dict[str, int]:
+        distances = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for peer in adjacency[node]:
+                if peer not in distances:
+                    distances[peer] = distances[node] + 1
+                    queue.append(peer)
+        return distances
+
+    def is_connected(self) -> bool:
+        if not self.names:
+            return True
+        return len(self._distances(self.adjacency(), self.names[0])) == len(self.names)
+
+    def diameter(self) -> float:
+        """Longest shortest path; infinite while the graph is split"""
+        adjacency = self.adjacency()
+        longest = 0
+        for name in self.names:
+            distances = self._distances(adjacency, name)
+            if len(distances) < len(self.names):
+                return float("inf")
+            longest = max(longest, max(distances.values()))
+        return longest
+
+
+@dataclass
+class Predicate:
+    """Named condition on a ``MeshGraph``"""
+    description: str
+    check: Callable[[MeshGraph], bool]
+
+    def __call__(self, graph: MeshGraph) -> bool:
+        return self.check(graph)
+
+
+def connected() -> Predicate:
+    return Predicate("connected", MeshGraph.is_connected)
+
+
+def min_degree(k: int) -> Predicate:
+    return Predicate(f"min degree {k}",
+                     lambda graph: min(graph.degrees().values(), default=0) >= k)
+
+
+def max_diameter(d: int) -> Predicate:
+    return Predicate(f"diameter <= {d}", lambda graph: graph.diameter() <= d)
+
+
+def all_of(*predicates: Predicate) -> Predicate:
+    return Predicate(" and ".join(p.description for p in predicates),
+                     lambda graph: all(p(graph) for p in predicates))
+
+
+@dataclass
+class ConvergenceResult:
+    """Outcome of ``ConvergenceChecker.wait``"""
+    predicate: str
+    converged: bool
+    elapsed: float
+    rounds: int
+    queries: int
+    degrees: Dict[str, int] = field(default_factory=dict)
+    diameter: float = float("inf")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "predicate": self.predicate,
+            "converged": self.converged,
+            "elapsed": self.elapsed,
+            "rounds": self.rounds,
+            "queries": self.queries,
+            "degrees": self.degrees,
+            "diameter": self.diameter,
+        }
+
+
+class ConvergenceChecker:
+    """Waits until a cluster-wide predicate holds on the peer graph.
+
+    Each round queries ``/admin/v1/peers`` on every node concurrently and
+    re-checks the predicate as every answer arrives, so it returns on the
+    first answer that completes the graph. Rounds back off exponentially
+    while nothing changes and start over from ``backoff.initial`` as soon
+    as some node's peers do.
+    """
+
+    def __init__(self, clients: Dict[str, WakuClient], max_workers: int = 32,
+                 backoff: Optional[Backoff] = None):
+        self.clients = clients
+        self.max_workers = max_workers
+        self.backoff = backoff or Backoff(initial=0.1, factor=1.5, maximum=2.0)
+        self.graph = MeshGraph(clients)
+        self._names_by_peer_id: Dict[str, str] = {}
+
+    @classmethod
+    def for_nodes(cls, nodes, **kwargs) -> "ConvergenceChecker":
+        """Checker over ``ClusterNode`` handles"""
+        return cls({node.name: node.client() for node in nodes}, **kwargs)
+
+    def _peer_names(self, name: str) -> List[str]:
+        peer_ids = self.clients[name].get_connected_peer_ids()
+        return [self._names_by_peer_id[peer_id] for peer_id in peer_ids
+                if peer_id in self._names_by_peer_id]
+
+    def _resolve_peer_ids(self, pool: ThreadPoolExecutor) -> None:
+        missing = [name for name in self.clients
+                   if name not in self._names_by_peer_id.values()]
+        futures = {pool.submit(self.clients[name].get_peer_id): name for name in missing}
+        for future in as_completed(futures):
+            try:
+                peer_id = future.result()
+            except Exception as e:
+                logging.debug(f"Peer ID of {futures[future]} not available yet: {e}")
+                continue
+            if peer_id:
+                self._names_by_peer_id[peer_id] = futures[future]
+
+    def wait(self, predicate: Predicate, timeout: float = 60.0) -> ConvergenceResult:
+        started = time.monotonic()
+        deadline = started + timeout
+        rounds = queries = 0
+        delays = self.backoff.delays()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.clients) or 1)) as pool:
+            while True:
+                if len(self._names_by_peer_id) < len(self.clients):
+                    self._resolve_peer_ids(pool)
+                rounds += 1
+                changed = False
+                futures = {pool.submit(self._peer_names, name): name for name in self.clients}
+                for future in as_completed(futures):
+                    queries += 1
+                    try:
+                        changed |= self.graph.update(futures[future], future.result())
+                    except Exception as e:
+                        logging.debug(f"Peer query of {futures[future]} failed: {e}")
+                        continue
+                    if len(self.graph.reported) == len(self.clients) and predicate(self.graph):
+                        return self._result(predicate, True, started, rounds, queries)
+                if changed:
+                    delays = self.backoff.delays()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    result = self._result(predicate, False, started, rounds, queries)
+                    logging.warning(f"Mesh did not reach '{predicate.description}' within "
+                                    f"{timeout}s; degrees {result.degrees}")
+                    return result
+                time.sleep(min(next(delays), remaining))
+
+    def _result(self, predicate: Predicate, converged: bool, started: float,
+                rounds: int, queries: int) -> ConvergenceResult:
+        result = ConvergenceResult(
+            predicate=predicate.description,
+            converged=converged,
+            elapsed=time.monotonic() - started,
+            rounds=rounds,
+            queries=queries,
+            degrees=self.graph.degrees(),
+            diameter=self.graph.diameter()
+        )
+        if converged:
+            logging.info(f"Mesh reached '{predicate.description}' in {result.elapsed:.2f}s "
+                         f"({rounds} rounds, {queries} queries)")
+        return result
@@ -1,53 +1,159 @@
-import docker
 import time
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Union
+
+from src.allocator import NodeAllocator, WorkerNamespace
+from src.backends import (
+    ContainerBackend, DockerBackend, FakeBackend, BackendError, ContainerNotFound
+)
+from src.log_events import EventBus, LogStreamer, NodeEvent, PEER_CONNECTED
+from src.images import ImageCache, ImageCheck, prepare_images
+from src.readiness import ReadinessProbe, StartupTimings
+from src.startup_profile import StartupProfile
+from src.waku_client import WakuClient
+from src.topology import Topology, TopologyPlan, NodePlan, TOPOLOGY_BUILDERS, MODES as TOPOLOGY_MODES
+from src.topology import build as build_topology, plan as plan_topology
+
+TOPOLOGIES = tuple(TOPOLOGY_BUILDERS)
+DEFAULT_IMAGE = "wakuorg/nwaku:v0.24.0"
+FINGERPRINT_LABEL = "waku.fingerprint"
+
+
+def node_fingerprint(image: str, command: List[str], port_mappings: Dict[str, str]) -> str:
+    """Digest of everything that defines a node container's configuration"""
+    digest = hashlib.sha256(image.encode())
+    for arg in command:
+        digest.update(b"\0" + arg.encode())
+    for container_port, host_port in sorted(port_mappings.items()):
+        digest.update(f"\0{container_port}={host_port}".encode())
+    return digest.hexdigest()[:32]
+
+
+@dataclass
+class ClusterNode:
+    """Handle of a node started by ``DockerManager.start_cluster``"""
+    name: str
+    ports: Dict[str, str]
+    extip: str
+    container_id: str
+    enr: str
+    rest_url: str
+    timings: StartupTimings = field(default_factory=StartupTimings)
+
+    def client(self, timeout: int = 30) -> WakuClient:
+        return WakuClient(self.rest_url, timeout=timeout, node=self.name)
+
 
 class DockerManager:
-    def __init__(self):
-        self.client = docker.from_env()
+    def __init__(self, rest_host: str = "127.0.0.1",
+                 allocator: Optional[NodeAllocator] = None,
+                 stream_logs: bool = False,
+                 fake_nodes: bool = False,
+                 backend: Optional[ContainerBackend] = None,
+                 namespace: Optional[WorkerNamespace] = None,
+                 stop_grace: float = 2.0,
+                 reuse: bool = False,
+                 reset_topics: Optional[List[str]] = None,
+                 metrics_server: bool = False,
+                 image: str = DEFAULT_IMAGE,
+                 max_msg_size: Optional[str] = None,
+                 profile_bootstrap: bool = False):
+        # fake_nodes selects the in-process FakeBackend, so no Docker
+        # daemon is needed; an explicit backend takes precedence
+        if backend is None:
+            backend = FakeBackend(host=rest_host) if fake_nodes else DockerBackend()
+        self.backend = backend
+        self.fake_nodes = isinstance(backend, FakeBackend)
+        self.rest_host = rest_host
+        # Names, ports, subnet and labels of this pytest-xdist worker
+        self.namespace = namespace or WorkerNamespace.from_env()
+        self.allocator = allocator or self.namespace.allocator()
+        # Seconds a node gets to exit on teardown before it is killed
+        self.stop_grace = stop_grace
+        # With reuse, running containers with a matching fingerprint are
+        # adopted (after resetting reset_topics) and left running on cleanup
+        self.reuse = reuse
+        self.reset_topics = list(reset_topics or [])
+        # Enables each node's Prometheus endpoint on its "metrics" port
+        self.metrics_server = metrics_server
+        self.image = image
+        # nwaku --max-msg-size, e.g. "1MiB"; the node default (150KiB) if None
+        self.max_msg_size = max_msg_size
+        # Also time discv5 bootstrap (ENR served until the first peer) on
+        # every node started with bootstrap nodes; this blocks until then
+        self.profile_bootstrap = profile_bootstrap
+        self.prepared_images: Dict[str, ImageCheck] = {}
+        self._image_lock = threading.Lock()
+        self.startup_profile = StartupProfile()
         self.containers = {}
         self.networks = {}
+        self.enrs: Dict[str, str] = {}
+        self.node_ports: Dict[str, Dict[str, str]] = {}
+        self.startup_timings: Dict[str, StartupTimings] = {}
+        self.stream_logs = stream_logs
+        self.events = EventBus()
+        self.log_streamers: Dict[str, LogStreamer] = {}
+        # When each node's current run began, for nodes whose container
+        # log also holds earlier runs (restarted or adopted ones)
+        self._log_since: Dict[str, float] = {}
+        self._log_lock = threading.Lock()
         
-    def create_network(self, name: str, subnet: str = "172.18.0.0/16", 
-                      gateway: str = "172.18.0.1") -> None:
-        """Create a Docker network"""
-        try:
-            network = self.client.networks.create(
-                name,
-                driver="bridge",
-                ipam=docker.types.IPAMConfig(
-                    pool_configs=[
-                        docker.types.IPAMPool(
-                            subnet=subnet,
-                            gateway=gateway
-                        )
-                    ]
-                )
-            )
-            self.networks[name] = network
-            logging.info(f"Created network: {name}")
-        except docker.errors.APIError as e:
-            if "already exists" in str(e):
-                self.networks[name] = self.client.networks.get(name)
-                logging.info(f"Using existing network: {name}")
-            else:
-                raise
+    def prepare_images(self, images: Optional[List[str]] = None,
+                       cache: Optional[ImageCache] = None,
+                       expected: Optional[Dict[str, str]] = None,
+                       pull: bool = True) -> List[ImageCheck]:
+        """Pull and digest-check images (default: the node image) ahead of any node start"""
+        with self._image_lock:
+            checks = prepare_images(self.backend, images or [self.image], cache, expected, pull)
+            self.prepared_images.update((check.image, check) for check in checks)
+        return checks
+    
+    def _resolve_image(self, image: str) -> None:
+        """Make sure ``image`` is present, pulling it only if it is missing"""
+        if image in self.prepared_images:
+            return
+        with self._image_lock:
+            if image in self.prepared_images:
+                return
+            check, = prepare_images(self.backend, [image], pull=False)
+            self.prepared_images[image] = check
+        if check.pulled and not self.fake_nodes:
+            logging.warning(f"Pulled {image} during node startup ({check.seconds:.1f}s); "
+                            f"prepare images up front to keep it out of the tests")
+    
+    def create_network(self, name: Optional[str] = None, subnet: Optional[str] = None, 
+                      gateway: Optional[str] = None) -> None:
+        """Create a Docker network; defaults come from the worker namespace"""
+        name = name or self.namespace.network
+        self.networks[name] = self.backend.create_network(
+            name,
+            subnet or self.namespace.subnet,
+            gateway or self.namespace.gateway,
+            labels=self.namespace.labels
+        )
     
     def start_waku_node(self, node_name: str, ports: Dict[str, str], 
-                       extip: str, bootstrap_node: Optional[str] = None) -> str:
-        """Start a Waku node container"""
-        
-        # Clean up any existing container with the same name
-        try:
-            existing = self.client.containers.get(node_name)
-            existing.stop()
-            existing.remove()
-            logging.info(f"Removed existing container: {node_name}")
-        except docker.errors.NotFound:
-            pass
-        except Exception as e:
-            logging.warning(f"Error cleaning up existing container {node_name}: {e}")
+                       extip: str, bootstrap_node: Union[str, List[str], None] = None,
+                       wait_ready: bool = True,
+                       ready_timeout: float = 60.0,
+                       log_level: str = "INFO",
+                       discovery: bool = True,
+                       store: bool = False) -> str:
+        """Start a Waku node container.
+
+        When ``wait_ready`` is set, returns as soon as the node serves its
+        ENR on ``/debug/v1/info``; the phase breakdown is stored in
+        ``startup_timings[node_name]`` and the ENR in ``enrs[node_name]``.
+        ``bootstrap_node`` takes one ENR or a list of them. Without
+        ``discovery`` the node only connects to peers it is told to dial.
+        With ``store`` the node archives relayed messages and serves them
+        on ``/store/v1/messages``.
+        """
         
         # Base command
         command = [
@@ -55,7 +161,7 @@ class DockerManager:
             "--rest=true",
             "--rest-admin=true",
             "--websocket-support=true",
-            "--log-level=INFO",
+            f"--log-level={log_level}",
             "--rest-relay-cache-capacity=100",
             f"--websocket-port={ports['websocket']}",
             f"--rest-port={ports['rest']}",
@@ -63,14 +169,16 @@ class DockerManager:
             f"--discv5-udp-port={ports['discv5']}",
             "--rest-address=0.0.0.0",
             f"--nat=extip:{extip}",
-            "--peer-exchange=true",
-            "--discv5-discovery=true",
+            f"--peer-exchange={str(discovery).lower()}",
+            f"--discv5-discovery={str(discovery).lower()}",
             "--relay=true"
         ]
         
-        # Add bootstrap node if provided
-        if bootstrap_node:
-            command.append(f"--discv5-bootstrap-node={bootstrap_node}")
+        # Add bootstrap nodes if provided
+        if isinstance(bootstrap_node, str):
+            bootstrap_node = [bootstrap_node]
+        for enr in bootstrap_node or []:
+            command.append(f"--discv5-bootstrap-node={enr}")
         
         port_mappings = {
             f"{ports['rest']}/tcp": ports['rest'],
@@ -80,71 +188,497 @@ class DockerManager:
             f"{ports['rpc']}/tcp": ports['rpc']
         }
         
+        if self.max_msg_size:
+            command.append(f"--max-msg-size={self.max_msg_size}")
+        
+        if store:
+            command.append("--store=true")
+        
+        if self.metrics_server and "metrics" in ports:
+            command.extend([
+                "--metrics-server=true",
+                "--metrics-server-address=0.0.0.0",
+                f"--metrics-server-port={ports['metrics']}"
+            ])
+            port_mappings[f"{ports['metrics']}/tcp"] = ports['metrics']
+        
+        image = self.image
+        fingerprint = node_fingerprint(image, command, port_mappings)
+        
+        # Clean up any existing container with the same name, unless reuse
+        # is on and it runs exactly this configuration
+        adoptable = None
         try:
-            container = self.client.containers.run(
-                "wakuorg/nwaku:v0.24.0",
-                command=command,
-                ports=port_mappings,
-                detach=True,
-                name=node_name,
-                remove=False
+            existing = self.backend.get_container(node_name)
+            if self.reuse and self._is_adoptable(existing, fingerprint):
+                adoptable = existing
+            else:
+                self.backend.stop_remove(existing, self.stop_grace)
+                logging.info(f"Removed existing container: {node_name}")
+        except ContainerNotFound:
+            pass
+        except Exception as e:
+            logging.warning(f"Error cleaning up existing container {node_name}: {e}")
+        
+        if adoptable is not None:
+            return self._adopt_node(node_name, adoptable, ports, wait_ready, ready_timeout)
+        
+        # The old log stream ends with its container
+        self._end_log_stream(node_name)
+        
+        timings = StartupTimings()
+        
+        try:
+            phase_start = time.monotonic()
+            self._resolve_image(image)
+            timings.image = time.monotonic() - phase_start
+            
+            phase_start = time.monotonic()
+            container = self.backend.create_node(
+                node_name, image, command, port_mappings,
+                labels=dict(self.namespace.labels, **{FINGERPRINT_LABEL: fingerprint})
             )
+            timings.create = time.monotonic() - phase_start
+            
+            phase_start = time.monotonic()
+            self.backend.start_node(container)
+            timings.start = time.monotonic() - phase_start
             
             self.containers[node_name] = container
+            self.node_ports[node_name] = dict(ports)
+            self.startup_timings[node_name] = timings
+            self._log_since.pop(node_name, None)
+            self.startup_profile.add(image, timings)
             logging.info(f"Started container: {node_name}")
             
-            # Wait for container to be ready
-            time.sleep(15)
-            
-            return container.id
+            if self.stream_logs:
+                self.follow_logs(node_name)
             
-        except docker.errors.APIError as e:
+        except BackendError as e:
             logging.error(f"Failed to start container {node_name}: {e}")
             raise
+        
+        if wait_ready:
+            self.wait_until_ready(node_name, ports, timeout=ready_timeout)
+            if bootstrap_node and self.profile_bootstrap:
+                self.wait_for_bootstrap(node_name, timeout=ready_timeout)
+        
+        return container.id
+    
+    def _is_adoptable(self, container, fingerprint: str) -> bool:
+        container.reload()
+        return (container.status == "running"
+                and container.labels.get(FINGERPRINT_LABEL) == fingerprint)
+    
+    def _adopt_node(self, node_name: str, container, ports: Dict[str, str],
+                    wait_ready: bool, ready_timeout: float) -> str:
+        """Take over a running container instead of recreating it"""
+        self.containers[node_name] = container
+        self.node_ports[node_name] = dict(ports)
+        self.startup_timings[node_name] = StartupTimings()
+        self._log_since[node_name] = time.time()
+        logging.info(f"Reusing running container: {node_name}")
+        
+        if self.stream_logs and node_name not in self.log_streamers:
+            self.follow_logs(node_name)
+        
+        try:
+            if wait_ready:
+                self.wait_until_ready(node_name, ports, timeout=ready_timeout)
+            self.reset_relay_state(node_name, ports)
+        except Exception as e:
+            # Leave the container alone, but forget it: it is not ours yet
+            logging.error(f"Failed to adopt container {node_name}: {e}")
+            self._end_log_stream(node_name)
+            self.containers.pop(node_name, None)
+            self.enrs.pop(node_name, None)
+            self.node_ports.pop(node_name, None)
+            self.startup_timings.pop(node_name, None)
+            self._log_since.pop(node_name, None)
+            raise
+        return container.id
+    
+    def reset_relay_state(self, node_name: str, ports: Dict[str, str],
+                          topics: Optional[List[str]] = None) -> None:
+        """Drain relay caches and unsubscribe, so a reused node starts clean"""
+        topics = self.reset_topics if topics is None else topics
+        if not topics:
+            return
+        client = WakuClient(f"http://{self.rest_host}:{ports['rest']}")
+        for topic in topics:
+            client.get_messages(topic)
+        client.unsubscribe_from_topic(topics)
+        logging.info(f"Reset relay state of {node_name}: {topics}")
+    
+    def wait_until_ready(self, node_name: str, ports: Dict[str, str],
+                         timeout: float = 60.0) -> str:
+        """Block until the node serves its ENR and return it"""
+        timings = self.startup_timings.setdefault(node_name, StartupTimings())
+        probe = ReadinessProbe(
+            self.containers[node_name],
+            f"http://{self.rest_host}:{ports['rest']}",
+            timeout=timeout
+        )
+        enr = probe.wait(timings)
+        self.enrs[node_name] = enr
+        logging.info(
+            f"Node {node_name} ready in {timings.total:.2f}s "
+            f"(image {timings.image:.2f}s, create {timings.create:.2f}s, start {timings.start:.2f}s, "
+            f"rest {timings.rest_up:.2f}s, enr {timings.enr_available:.2f}s)"
+        )
+        return enr
+    
+    def wait_for_peers(self, node_name: str, min_peers: int = 1, timeout: float = 60.0,
+                       recheck: float = 1.0) -> bool:
+        """Block until the node has ``min_peers`` connected peers.
+
+        The REST peer count decides; the node's peer events only wake the
+        wait early. It is re-read at least every ``recheck`` seconds, since
+        the node may not log peer events at its log level.
+        """
+        self._ensure_log_stream(node_name)
+        client = WakuClient(f"http://{self.rest_host}:{self.node_ports[node_name]['rest']}",
+                            timeout=5)
+        deadline = time.monotonic() + timeout
+        while True:
+            cursor = self.events.cursor()
+            if len(client.get_connected_peer_ids()) >= min_peers:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.events.wait_for(PEER_CONNECTED, node=node_name,
+                                 timeout=min(recheck, remaining), after=cursor)
+    
+    def wait_for_bootstrap(self, node_name: str, timeout: float = 60.0,
+                           min_peers: int = 1) -> bool:
+        """Block until the node has ``min_peers`` connected peers, timing the bootstrap phase"""
+        timings = self.startup_timings.setdefault(node_name, StartupTimings())
+        phase_start = time.monotonic()
+        if not self.wait_for_peers(node_name, min_peers, timeout, recheck=0.05):
+            logging.warning(f"Node {node_name} had no {min_peers} peer(s) "
+                            f"after {timeout}s of bootstrap")
+            return False
+        timings.bootstrap = time.monotonic() - phase_start
+        return True
+    
+    def follow_logs(self, node_name: str, since: Optional[float] = None) -> LogStreamer:
+        """Stream a node's logs into ``self.events``, by default from the start of its current run"""
+        streamer = self.log_streamers.get(node_name)
+        if streamer is None:
+            if since is None:
+                since = self._log_since.get(node_name)
+            streamer = LogStreamer(self.containers[node_name], node_name, self.events,
+                                   since=since).start()
+            self.log_streamers[node_name] = streamer
+        return streamer
+    
+    def _ensure_log_stream(self, node_name: Optional[str] = None,
+                           since: Optional[float] = None) -> None:
+        """Follow the logs of ``node_name`` (or every node) if nothing does yet.
+
+        Without ``stream_logs`` this happens on the first event wait; the
+        stream then starts at ``since``, or at the start of the node's
+        current run, so events it logged before the wait are still seen.
+        """
+        names = [node_name] if node_name is not None else list(self.containers)
+        with self._log_lock:
+            for name in names:
+                if name in self.containers and name not in self.log_streamers:
+                    self.follow_logs(name, since=since)
+    
+    def _end_log_stream(self, node_name: str) -> None:
+        streamer = self.log_streamers.pop(node_name, None)
+        if streamer is not None:
+            streamer.stop()
+    
+    def stop_node(self, node_name: str, timeout: Optional[float] = None) -> None:
+        """Stop a node but keep its container, to be started again with ``start_node``"""
+        self.backend.stop_node(self.containers[node_name],
+                               self.stop_grace if timeout is None else timeout)
+        self._end_log_stream(node_name)
+        logging.info(f"Stopped container: {node_name}")
+    
+    def kill_node(self, node_name: str, signal: str = "SIGKILL") -> None:
+        """Kill a node without a graceful shutdown; ``start_node`` brings it back"""
+        self.backend.kill_node(self.containers[node_name], signal)
+        self._end_log_stream(node_name)
+        logging.info(f"Killed container: {node_name} ({signal})")
+    
+    def start_node(self, node_name: str, wait_ready: bool = True,
+                   ready_timeout: float = 60.0) -> str:
+        """Start a stopped or killed node again with its original configuration.
+
+        Relay subscriptions do not survive the restart. Returns the ENR when
+        ``wait_ready`` is set.
+        """
+        container = self.containers[node_name]
+        timings = StartupTimings()
+        self._log_since[node_name] = time.time()
+        phase_start = time.monotonic()
+        self.backend.start_node(container)
+        timings.start = time.monotonic() - phase_start
+        self.startup_timings[node_name] = timings
+        logging.info(f"Restarted container: {node_name}")
+        
+        if self.stream_logs:
+            self.follow_logs(node_name)
+        if wait_ready:
+            return self.wait_until_ready(node_name, self.node_ports[node_name],
+                                         timeout=ready_timeout)
+        return ""
+    
+    def restart_node(self, node_name: str, timeout: Optional[float] = None,
+                     wait_ready: bool = True, ready_timeout: float = 60.0) -> str:
+        self.stop_node(node_name, timeout)
+        return self.start_node(node_name, wait_ready, ready_timeout)
+    
+    def pause_node(self, node_name: str) -> None:
+        """Freeze a node in place: connections stay open but nothing is answered"""
+        self.backend.pause_node(self.containers[node_name])
+        logging.info(f"Paused container: {node_name}")
+    
+    def unpause_node(self, node_name: str) -> None:
+        self.backend.unpause_node(self.containers[node_name])
+        logging.info(f"Unpaused container: {node_name}")
+    
+    def wait_for_event(self, kind: str, node_name: Optional[str] = None,
+                       timeout: float = 30, after: Optional[int] = None,
+                       predicate=None) -> Optional[NodeEvent]:
+        """Wait for a parsed log event; see ``EventBus.wait_for``.
+
+        Without ``after`` only events logged from now on count. Pass a
+        ``self.events.cursor()`` taken earlier to also see what the node
+        logged in its current run since then.
+        """
+        if after is None:
+            after = self.events.cursor()
+            self._ensure_log_stream(node_name, since=time.time())
+        else:
+            self._ensure_log_stream(node_name)
+        return self.events.wait_for(kind, node=node_name, predicate=predicate,
+                                    timeout=timeout, after=after)
+    
+    def start_cluster(self, n: int, topology: Union[str, Topology] = "star",
+                      network: Optional[str] = None,
+                      subnet: Optional[str] = None, gateway: Optional[str] = None,
+                      max_workers: int = 16,
+                      ready_timeout: float = 60.0) -> List[ClusterNode]:
+        """Start ``n`` nodes with automatically allocated ports and IPs.
+
+        The bootstrap node is started first; the remaining nodes are then
+        started concurrently on a thread pool, each bootstrapping from it.
+        Returns one handle per node, bootstrap node first. Any other
+        ``topology`` (a name from ``TOPOLOGIES`` or a ``Topology``) is
+        handed to ``start_topology``.
+        """
+        if n < 1:
+            raise ValueError("A cluster needs at least one node")
+        if isinstance(topology, Topology):
+            return self.start_topology(topology, max_workers=max_workers,
+                                       ready_timeout=ready_timeout)
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+        if topology != "star":
+            return self.start_topology(build_topology(topology, n), max_workers=max_workers,
+                                       ready_timeout=ready_timeout)
+        
+        network = network or self.namespace.network
+        self.create_network(network, subnet, gateway)
+        configs = self.allocator.allocate(n, taken=self.containers)
+        
+        started = time.monotonic()
+        bootstrap = self.start_network_node(configs[0], network, None, ready_timeout)
+        nodes = [bootstrap]
+        
+        if n > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, n - 1)) as pool:
+                futures = [
+                    pool.submit(self.start_network_node, config, network,
+                                bootstrap.enr, ready_timeout)
+                    for config in configs[1:]
+                ]
+                nodes.extend(future.result() for future in futures)
+        
+        logging.info(f"Started {n}-node {topology} cluster in {time.monotonic() - started:.2f}s")
+        return nodes
+    
+    def start_network_node(self, config: Dict[str, Any], network: str,
+                           bootstrap_enr: Optional[str] = None,
+                           ready_timeout: float = 60.0) -> ClusterNode:
+        """Start the node of an allocator ``config`` and attach it to ``network``"""
+        name = config["name"]
+        container_id = self.start_waku_node(
+            name, config["ports"], config["extip"],
+            bootstrap_node=bootstrap_enr,
+            ready_timeout=ready_timeout
+        )
+        self.connect_to_network(name, network, config["extip"])
+        return self._cluster_node(name, config["ports"], config["extip"], container_id)
+    
+    def _cluster_node(self, name: str, ports: Dict[str, str], extip: str,
+                      container_id: str) -> ClusterNode:
+        return ClusterNode(
+            name=name,
+            ports=ports,
+            extip=extip,
+            container_id=container_id,
+            enr=self.enrs[name],
+            rest_url=f"http://{self.rest_host}:{ports['rest']}",
+            timings=self.startup_timings[name]
+        )
+    
+    def start_topology(self, topology: Topology, mode: str = "static",
+                       max_workers: int = 16,
+                       ready_timeout: float = 60.0) -> List[ClusterNode]:
+        """Start a cluster shaped like ``topology``; handles are in node index order.
+
+        In ``static`` mode nodes run without discovery and every edge is
+        dialled through ``/admin/v1/peers``, so the peer graph is exactly
+        the topology. In ``discv5`` mode nodes start in breadth-first waves
+        and bootstrap from their neighbours in earlier waves; discovery may
+        add further peers.
+        """
+        if mode not in TOPOLOGY_MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {TOPOLOGY_MODES}")
+        plan = plan_topology(topology, self.namespace, self.allocator, taken=self.containers)
+        for network in plan.networks:
+            if network.name not in self.networks:
+                self.create_network(network.name, network.subnet, network.gateway)
+        
+        started = time.monotonic()
+        discovery = mode == "discv5"
+        waves = topology.waves() if discovery else [list(range(topology.size))]
+        nodes: Dict[int, ClusterNode] = {}
+        for wave in waves:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(wave))) as pool:
+                futures = {}
+                for index in wave:
+                    node = plan.nodes[index]
+                    enrs = [nodes[peer].enr for peer in node.bootstrap] if discovery else []
+                    futures[index] = pool.submit(self._start_planned_node, node, enrs,
+                                                 discovery, ready_timeout)
+                nodes.update((index, future.result()) for index, future in futures.items())
+        ordered = [nodes[index] for index in range(topology.size)]
+        
+        if not discovery:
+            self._dial_edges(plan, ordered, max_workers)
+        
+        logging.info(f"Started {topology.size}-node {topology.kind} topology ({mode}) "
+                     f"in {time.monotonic() - started:.2f}s")
+        return ordered
+    
+    def _start_planned_node(self, node: NodePlan, bootstrap_enrs: List[str],
+                            discovery: bool, ready_timeout: float) -> ClusterNode:
+        container_id = self.start_waku_node(
+            node.name, node.ports, node.extip,
+            bootstrap_node=bootstrap_enrs,
+            ready_timeout=ready_timeout,
+            discovery=discovery
+        )
+        for network, ip in node.addresses.items():
+            self.connect_to_network(node.name, network, ip)
+        return self._cluster_node(node.name, node.ports, node.extip, container_id)
+    
+    def _dial_edges(self, plan: TopologyPlan, nodes: List[ClusterNode], max_workers: int) -> None:
+        """Have the lower-index end of every edge dial the other end"""
+        clients = [node.client() for node in nodes]
+        peer_ids = self.backend.run_batch([client.get_peer_id for client in clients], max_workers)
+        dials = {}
+        for a, b in sorted(plan.topology.edges):
+            dials.setdefault(a, []).append(
+                f"/ip4/{plan.dial_address(a, b)}/tcp/{nodes[b].ports['tcp']}/p2p/{peer_ids[b]}"
+            )
+        results = self.backend.run_batch(
+            [partial(clients[a].add_peers, multiaddrs) for a, multiaddrs in dials.items()],
+            max_workers
+        )
+        for a, result in zip(dials, results):
+            if result is not True:
+                logging.warning(f"Dialling peers from {nodes[a].name} failed: {result}")
     
     def connect_to_network(self, container_name: str, network_name: str, 
                           ip_address: str) -> None:
         """Connect container to network with specific IP"""
         if container_name in self.containers and network_name in self.networks:
             try:
-                self.networks[network_name].connect(
+                phase_start = time.monotonic()
+                self.backend.connect_to_network(
+                    self.networks[network_name],
                     self.containers[container_name],
-                    ipv4_address=ip_address
+                    ip_address
                 )
+                timings = self.startup_timings.get(container_name)
+                if timings is not None:
+                    timings.network = time.monotonic() - phase_start
                 logging.info(f"Connected {container_name} to {network_name} with IP {ip_address}")
-            except docker.errors.APIError as e:
+            except BackendError as e:
                 logging.warning(f"Failed to connect {container_name} to network: {e}")
     
+    def remove_nodes(self, names: List[str]) -> None:
+        """Concurrently stop and remove the given nodes"""
+        names = [name for name in names if name in self.containers]
+        results = self.backend.run_batch([
+            partial(self.backend.stop_remove, self.containers[name], self.stop_grace)
+            for name in names
+        ])
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Error cleaning up container {name}: {result}")
+            else:
+                logging.info(f"Stopped and removed container: {name}")
+            # Log streams end once their containers are gone
+            self._end_log_stream(name)
+            self.containers.pop(name, None)
+            self.enrs.pop(name, None)
+            self.node_ports.pop(name, None)
+            self.startup_timings.pop(name, None)
+            self._log_since.pop(name, None)
+            self.allocator.release(name)
+    
     def cleanup(self) -> None:
         """Clean up all containers and networks"""
-        for name, container in self.containers.items():
-            try:
-                container.stop()
-                container.remove()
-                logging.info(f"Stopped and removed container: {name}")
-            except Exception as e:
-                logging.warning(f"Error cleaning up container {name}: {e}")
+        if self.reuse:
+            self._release_for_reuse()
+            return
+        self.remove_nodes(list(self.containers))
         
         for name, network in self.networks.items():
             try:
-                network.remove()
+                self.backend.remove_network(network)
                 logging.info(f"Removed network: {name}")
             except Exception as e:
                 logging.warning(f"Error removing network {name}: {e}")
         
         self.containers.clear()
         self.networks.clear()
+        self.enrs.clear()
+        self.node_ports.clear()
+        self.startup_timings.clear()
+        self._log_since.clear()
+        self.allocator.reset()
         
         # Also clean up any orphaned containers that might exist
         try:
-            client = docker.from_env()
-            for container in client.containers.list(all=True):
-                if container.name.startswith('waku_node'):
-                    try:
-                        container.stop()
-                        container.remove()
-                        logging.info(f"Cleaned up orphaned container: {container.name}")
-                    except:
-                        pass
+            self.remove_orphans()
         except Exception as e:
-            logging.warning(f"Error during orphan cleanup: {e}")
\ No newline at end of file
+            logging.warning(f"Error during orphan cleanup: {e}")
+    
+    def _release_for_reuse(self) -> None:
+        """Forget all nodes but leave them running for the next session"""
+        for streamer in self.log_streamers.values():
+            streamer.stop()
+        self.log_streamers.clear()
+        logging.info(f"Leaving {len(self.containers)} container(s) running for reuse")
+        self.containers.clear()
+        self.networks.clear()
+        self.enrs.clear()
+        self.node_ports.clear()
+        self.startup_timings.clear()
+        self._log_since.clear()
+        self.allocator.reset()
+    
+    def remove_orphans(self) -> None:
+        """Stop and remove this worker's leftover containers and networks"""
+        for name in self.backend.remove_labelled(self.namespace.labels, self.stop_grace):
+            logging.info(f"Cleaned up orphaned resource: {name}")
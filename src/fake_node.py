@@ -0,0 +1,625 @@
+import json
+import time
+import uuid
+import base64
+import hashlib
+import threading
+from collections import deque, OrderedDict
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional
+from urllib.parse import unquote, urlparse, parse_qsl
+
+from src.waku_client import DEFAULT_MAX_MSG_SIZE, MAX_STORE_PAGE_SIZE, parse_size
+
+RELAY_PROTOCOL = "/vac/waku/relay/2.0.0"
+
+def parse_node_args(command: List[str]) -> Dict[str, List[str]]:
+    """Parse nwaku ``--flag=value`` arguments; repeated flags keep every value"""
+    args: Dict[str, List[str]] = {}
+    for arg in command:
+        if not arg.startswith("--"):
+            continue
+        key, _, value = arg[2:].partition("=")
+        args.setdefault(key, []).append(value)
+    return args
+
+
+class FakeMesh:
+    """In-process relay network connecting ``FakeWakuNode``s.
+
+    Publishing floods a message along peer links to every reachable node,
+    the way relay would on a fully joined gossip mesh.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, "FakeWakuNode"] = {}
+        self._by_enr: Dict[str, "FakeWakuNode"] = {}
+        self._lock = threading.RLock()
+
+    def add(self, node: "FakeWakuNode") -> None:
+        with self._lock:
+            self.nodes[node.name] = node
+            self._by_enr[node.enr] = node
+
+    def remove(self, node: "FakeWakuNode") -> None:
+        with self._lock:
+            for peer in list(node.peers):
+                self.disconnect(node, peer)
+            self.nodes.pop(node.name, None)
+            self._by_enr.pop(node.enr, None)
+
+    def by_enr(self, enr: str) -> Optional["FakeWakuNode"]:
+        return self._by_enr.get(enr)
+
+    def by_peer_id(self, peer_id: str) -> Optional["FakeWakuNode"]:
+        with self._lock:
+            for node in self.nodes.values():
+                if node.peer_id == peer_id:
+                    return node
+        return None
+
+    def connect(self, a: "FakeWakuNode", b: "FakeWakuNode") -> None:
+        if a is b:
+            return
+        with self._lock:
+            if b in a.peers:
+                return
+            a.peers.add(b)
+            b.peers.add(a)
+            a.known_peers.add(b)
+            b.known_peers.add(a)
+        a.log("INF", "Peer connected", peerId=b.peer_id)
+        b.log("INF", "Peer connected", peerId=a.peer_id)
+
+    def disconnect(self, a: "FakeWakuNode", b: "FakeWakuNode") -> None:
+        with self._lock:
+            if b not in a.peers:
+                return
+            a.peers.discard(b)
+            b.peers.discard(a)
+        a.log("INF", "Peer disconnected", peerId=b.peer_id)
+        b.log("INF", "Peer disconnected", peerId=a.peer_id)
+
+    def bootstrap(self, node: "FakeWakuNode", enrs: List[str]) -> None:
+        """Connect ``node`` to its bootstrap nodes and, as discv5 would, their peers"""
+        for enr in enrs:
+            boot = self.by_enr(enr)
+            if boot is None or not boot.reachable:
+                node.log("WRN", "Bootstrap node not reachable", enr=enr)
+                continue
+            self.connect(node, boot)
+            if node.discovery:
+                for peer in list(boot.peers):
+                    if peer.reachable:
+                        self.connect(node, peer)
+
+    def relay(self, origin: "FakeWakuNode", message: Dict[str, Any]) -> None:
+        key = message_hash(message)
+        frontier = [origin]
+        visited = {origin}
+        while frontier:
+            node = frontier.pop()
+            node.deliver(key, message)
+            for peer in list(node.peers):
+                if peer not in visited and peer.reachable:
+                    visited.add(peer)
+                    frontier.append(peer)
+
+
+def message_hash(message: Dict[str, Any]) -> str:
+    digest = hashlib.sha256()
+    for field in ("contentTopic", "payload", "timestamp", "meta"):
+        digest.update(str(message.get(field, "")).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class FakeWakuNode:
+    """Stand-in for an nwaku node serving the REST endpoints ``WakuClient`` uses"""
+
+    def __init__(self, name: str, mesh: FakeMesh, rest_port: int,
+                 host: str = "127.0.0.1", tcp_port: int = 0, extip: str = "127.0.0.1",
+                 cache_capacity: int = 100, bootstrap: Optional[List[str]] = None,
+                 discovery: bool = True, metrics_port: Optional[int] = None,
+                 max_msg_size: int = DEFAULT_MAX_MSG_SIZE, store: bool = False):
+        self.name = name
+        self.mesh = mesh
+        self.host = host
+        self.rest_port = rest_port
+        self.tcp_port = tcp_port
+        self.extip = extip
+        self.cache_capacity = cache_capacity
+        self.bootstrap_enrs = bootstrap or []
+        self.discovery = discovery
+        self.metrics_port = metrics_port
+        self.max_msg_size = max_msg_size
+        self.store = store
+        self.peer_id = "16Uiu2HAm" + uuid.uuid4().hex
+        self.enr = "enr:-fake" + base64.urlsafe_b64encode(
+            f"{name}|{self.peer_id}|{extip}|{tcp_port}".encode()).decode().rstrip("=")
+        self.peers = set()
+        # Every peer ever connected, redialled after a restart like a peer store
+        self.known_peers = set()
+        self.subscriptions = set()
+        self.running = False
+        # Cleared while the container is paused; requests block on it
+        self.unpaused = threading.Event()
+        self.unpaused.set()
+        self._cache: Dict[str, deque] = {}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        # Store archive in arrival order, and each entry's position by digest
+        self._archive: List[Dict[str, Any]] = []
+        self._archive_index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # (epoch seconds, line) pairs, so ``logs(since=...)`` can skip earlier runs
+        self._log_lines: List[tuple] = []
+        self._log_cond = threading.Condition()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._metrics_server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        # Resource counters behind ``stats()`` and ``/metrics``
+        self.busy_ns = 0
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.messages_relayed = 0
+
+    @classmethod
+    def from_command(cls, name: str, command: List[str], mesh: FakeMesh,
+                     host: str = "127.0.0.1") -> "FakeWakuNode":
+        """Build a node from the nwaku CLI arguments ``DockerManager`` uses"""
+        args = parse_node_args(command)
+        nat = args.get("nat", ["extip:127.0.0.1"])[0]
+        return cls(
+            name, mesh,
+            rest_port=int(args["rest-port"][0]),
+            host=host,
+            tcp_port=int(args.get("tcp-port", ["0"])[0]),
+            extip=nat.split(":", 1)[1] if nat.startswith("extip:") else "127.0.0.1",
+            cache_capacity=int(args.get("rest-relay-cache-capacity", ["100"])[0]),
+            bootstrap=args.get("discv5-bootstrap-node", []),
+            discovery=args.get("discv5-discovery", ["false"])[0] == "true",
+            metrics_port=(int(args.get("metrics-server-port", ["8008"])[0])
+                          if args.get("metrics-server", ["false"])[0] == "true" else None),
+            max_msg_size=parse_size(args.get("max-msg-size", [str(DEFAULT_MAX_MSG_SIZE)])[0]),
+            store=args.get("store", ["false"])[0] == "true"
+        )
+
+    @property
+    def reachable(self) -> bool:
+        return self.running and self.unpaused.is_set()
+
+    @property
+    def multiaddr(self) -> str:
+        return f"/ip4/{self.extip}/tcp/{self.tcp_port}/p2p/{self.peer_id}"
+
+    def log(self, level: str, message: str, **fields) -> None:
+        """Append an nwaku-formatted log line"""
+        now = datetime.now(timezone.utc)
+        stamp = now.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "+00:00"
+        rendered = " ".join(f'{k}="{v}"' if " " in str(v) else f"{k}={v}"
+                            for k, v in fields.items())
+        with self._log_cond:
+            self._log_lines.append(
+                (now.timestamp(), f"{level} {stamp} {message:<40} {rendered}".rstrip()))
+            self._log_cond.notify_all()
+
+    def logs(self, stream: bool = False, follow: bool = False, tail: Any = "all",
+             since: Optional[float] = None, **kwargs):
+        """docker-py compatible ``Container.logs``; ``since`` is an epoch timestamp"""
+        if not stream:
+            with self._log_cond:
+                lines = [line for logged, line in self._log_lines
+                         if since is None or logged >= since]
+            lines = lines if tail == "all" else lines[-int(tail):]
+            return "".join(line + "\n" for line in lines).encode()
+        return self._follow_logs(follow, since)
+
+    def _follow_logs(self, follow: bool, since: Optional[float] = None):
+        position = 0
+        while True:
+            with self._log_cond:
+                while position >= len(self._log_lines):
+                    if not follow or not self.running:
+                        return
+                    self._log_cond.wait(0.5)
+                chunk = [line for logged, line in self._log_lines[position:]
+                         if since is None or logged >= since]
+                position = len(self._log_lines)
+            if chunk:
+                yield "".join(line + "\n" for line in chunk).encode()
+
+    def start(self) -> None:
+        handler = type("Handler", (_FakeNodeHandler,), {"node": self})
+        self._server = ThreadingHTTPServer((self.host, self.rest_port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                                        daemon=True, name=f"fake-{self.name}")
+        self._thread.start()
+        if self.metrics_port is not None:
+            self._metrics_server = ThreadingHTTPServer((self.host, self.metrics_port), handler)
+            self._metrics_server.daemon_threads = True
+            threading.Thread(target=self._metrics_server.serve_forever, args=(0.05,),
+                             daemon=True, name=f"fake-metrics-{self.name}").start()
+        self.running = True
+        self.mesh.add(self)
+        self.log("INF", "Node setup complete", topics="wakunode main")
+        self.mesh.bootstrap(self, self.bootstrap_enrs)
+        for peer in list(self.known_peers):
+            if peer.reachable:
+                self.mesh.connect(self, peer)
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        self.unpaused.set()
+        self.mesh.remove(self)
+        for server in (self._server, self._metrics_server):
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        # Subscriptions and relay caches live in process memory; the store
+        # archive is on disk and survives a restart
+        with self._lock:
+            self.subscriptions.clear()
+            self._cache.clear()
+            self._seen.clear()
+        self.log("INF", "Node stopped")
+        with self._log_cond:
+            self._log_cond.notify_all()
+
+    def pause(self) -> None:
+        self.unpaused.clear()
+
+    def unpause(self) -> None:
+        self.unpaused.set()
+
+    def subscribe(self, topics: List[str]) -> None:
+        with self._lock:
+            for topic in topics:
+                self.subscriptions.add(topic)
+                self._cache.setdefault(topic, deque(maxlen=self.cache_capacity))
+        for topic in topics:
+            self.log("INF", "subscribe", contentTopic=topic)
+
+    def unsubscribe(self, topics: List[str]) -> None:
+        with self._lock:
+            for topic in topics:
+                self.subscriptions.discard(topic)
+                self._cache.pop(topic, None)
+
+    def dial(self, multiaddrs: List[str]) -> None:
+        """Connect to peers by multiaddr; only the peer ID is used"""
+        for multiaddr in multiaddrs:
+            peer = self.mesh.by_peer_id(multiaddr.rsplit("/p2p/", 1)[-1])
+            if peer is None or not peer.reachable:
+                self.log("WRN", "Failed to dial peer", multiaddr=multiaddr)
+                continue
+            self.mesh.connect(self, peer)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        if not message.get("timestamp"):
+            message["timestamp"] = time.time_ns()
+        with self._lock:
+            self.tx_bytes += len(message.get("payload", "")) * max(len(self.peers), 1)
+        self.mesh.relay(self, message)
+
+    def deliver(self, key: str, message: Dict[str, Any]) -> None:
+        topic = message.get("contentTopic", "")
+        with self._lock:
+            if key in self._seen:
+                return
+            self._seen[key] = None
+            if len(self._seen) > 10000:
+                self._seen.popitem(last=False)
+            self.rx_bytes += len(message.get("payload", ""))
+            self.messages_relayed += 1
+            if self.store:
+                self._archive_index[key] = len(self._archive)
+                self._archive.append({"message": message, "digest": key,
+                                      "storeTime": time.time_ns()})
+            if topic not in self.subscriptions:
+                return
+            self._cache[topic].append(dict(message))
+        self.log("DBG", "waku.relay received", contentTopic=topic)
+
+    def add_busy_time(self, ns: int) -> None:
+        with self._lock:
+            self.busy_ns += ns
+
+    def drain(self, topic: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            cache = self._cache.get(topic)
+            if cache is None:
+                return []
+            messages = list(cache)
+            cache.clear()
+            return messages
+
+    def store_query(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """One page of archived messages, in the shape of nwaku's store REST API"""
+        topics = {topic for topic in params.get("contentTopics", "").split(",") if topic}
+        start = int(params["startTime"]) if params.get("startTime") else None
+        end = int(params["endTime"]) if params.get("endTime") else None
+        page_size = min(int(params.get("pageSize", 20)), MAX_STORE_PAGE_SIZE)
+        ascending = params.get("ascending", "true") != "false"
+        with self._lock:
+            if "digest" in params:
+                if params["digest"] not in self._archive_index:
+                    raise KeyError(params["digest"])
+                after = self._archive_index[params["digest"]]
+                positions = (range(after + 1, len(self._archive)) if ascending
+                             else range(after - 1, -1, -1))
+            else:
+                positions = (range(len(self._archive)) if ascending
+                             else range(len(self._archive) - 1, -1, -1))
+            page = []
+            for position in positions:
+                entry = self._archive[position]
+                message = entry["message"]
+                if topics and message.get("contentTopic") not in topics:
+                    continue
+                timestamp = message.get("timestamp", 0)
+                if (start is not None and timestamp < start) or \
+                        (end is not None and timestamp > end):
+                    continue
+                page.append(entry)
+                if len(page) == page_size:
+                    break
+        cursor = None
+        if len(page) == page_size:
+            last = page[-1]
+            cursor = {
+                "pubsubTopic": "/waku/2/rs/0/0",
+                "senderTime": last["message"].get("timestamp", 0),
+                "storeTime": last["storeTime"],
+                "digest": last["digest"]
+            }
+        return {
+            "messages": [dict(entry["message"], version=0) for entry in page],
+            "cursor": cursor,
+            "error_message": ""
+        }
+
+    def debug_info(self) -> Dict[str, Any]:
+        return {
+            "listenAddresses": [f"/ip4/0.0.0.0/tcp/{self.tcp_port}/p2p/{self.peer_id}"],
+            "enrUri": self.enr
+        }
+
+    def memory_bytes(self) -> int:
+        """Rough resident size: a fixed base plus cached and seen messages"""
+        with self._lock:
+            cached = sum(len(m.get("payload", "")) + 200
+                         for cache in self._cache.values() for m in cache)
+            archived = sum(len(e["message"].get("payload", "")) + 300 for e in self._archive)
+            return 20 * 1024 * 1024 + cached + archived + len(self._seen) * 100
+
+    def stats(self) -> Dict[str, Any]:
+        """docker-py style ``Container.stats`` snapshot"""
+        with self._lock:
+            busy_ns, rx_bytes, tx_bytes = self.busy_ns, self.rx_bytes, self.tx_bytes
+        return {
+            "read": datetime.now(timezone.utc).isoformat(),
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": busy_ns},
+                "system_cpu_usage": time.monotonic_ns(),
+                "online_cpus": 1
+            },
+            "memory_stats": {"usage": self.memory_bytes(), "stats": {"inactive_file": 0}},
+            "networks": {"eth0": {"rx_bytes": rx_bytes, "tx_bytes": tx_bytes}}
+        }
+
+    def metrics_text(self) -> str:
+        """Prometheus exposition of a few nwaku metrics"""
+        return (
+            "# TYPE libp2p_peers gauge\n"
+            f"libp2p_peers {len(self.peers)}\n"
+            "# TYPE waku_node_messages_total counter\n"
+            f'waku_node_messages_total{{type="relay"}} {self.messages_relayed}\n'
+            "# TYPE process_resident_memory_bytes gauge\n"
+            f"process_resident_memory_bytes {self.memory_bytes()}\n"
+        )
+
+    def peer_list(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "multiaddr": peer.multiaddr,
+                "protocols": [{"protocol": RELAY_PROTOCOL, "connected": True}]
+            }
+            for peer in list(self.peers)
+        ]
+
+
+class _FakeNodeHandler(BaseHTTPRequestHandler):
+    """Routes nwaku REST paths to a ``FakeWakuNode``"""
+    node: FakeWakuNode = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, every
+    # keep-alive response stalls on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: Any = "OK") -> None:
+        if isinstance(body, str):
+            data, content_type = body.encode(), "text/plain"
+        else:
+            data, content_type = json.dumps(body).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else None
+
+    def _timed(self, handle) -> None:
+        # A paused container accepts connections but never answers
+        self.node.unpaused.wait()
+        # Handler time stands in for the node's CPU usage
+        started = time.perf_counter_ns()
+        try:
+            handle()
+        finally:
+            self.node.add_busy_time(time.perf_counter_ns() - started)
+
+    def do_GET(self) -> None:
+        self._timed(self._get)
+
+    def do_POST(self) -> None:
+        self._timed(self._post)
+
+    def do_DELETE(self) -> None:
+        self._timed(self._delete)
+
+    def _get(self) -> None:
+        url = urlparse(self.path)
+        path = url.path
+        if path == "/metrics":
+            self._send(200, self.node.metrics_text())
+        elif path == "/debug/v1/info":
+            self._send(200, self.node.debug_info())
+        elif path == "/admin/v1/peers":
+            self._send(200, self.node.peer_list())
+        elif path.startswith("/relay/v1/auto/messages/"):
+            topic = unquote(path[len("/relay/v1/auto/messages/"):])
+            self._send(200, self.node.drain(topic))
+        elif path == "/store/v1/messages":
+            if not self.node.store:
+                self._send(412, "No suitable service peer & none discovered")
+                return
+            try:
+                self._send(200, self.node.store_query(dict(parse_qsl(url.query))))
+            except (KeyError, ValueError) as e:
+                self._send(400, f"Invalid store query: {e}")
+        else:
+            self._send(404, "Not Found")
+
+    def _post(self) -> None:
+        path = urlparse(self.path).path
+        try:
+            body = self._body()
+        except ValueError:
+            self._send(400, "Invalid JSON")
+            return
+        if path == "/relay/v1/auto/subscriptions":
+            self.node.subscribe(body or [])
+            self._send(200)
+        elif path == "/admin/v1/peers":
+            self.node.dial(body or [])
+            self._send(200)
+        elif path == "/relay/v1/auto/messages":
+            if not body or "payload" not in body or "contentTopic" not in body:
+                self._send(400, "Missing payload or contentTopic")
+                return
+            encoded = body["payload"]
+            size = len(encoded) * 3 // 4 - encoded[-2:].count("=")
+            if size > self.node.max_msg_size:
+                self._send(400, f"Message size {size} exceeds {self.node.max_msg_size}")
+                return
+            self.node.publish(body)
+            self._send(200)
+        else:
+            self._send(404, "Not Found")
+
+    def _delete(self) -> None:
+        path = urlparse(self.path).path
+        if path == "/relay/v1/auto/subscriptions":
+            self.node.unsubscribe(self._body() or [])
+            self._send(200)
+        else:
+            self._send(404, "Not Found")
+
+
+class FakeContainer:
+    """docker-py ``Container`` look-alike wrapping a ``FakeWakuNode``"""
+    # Seconds between streamed stats snapshots; the daemon sends one a second
+    stats_interval = 1.0
+
+    def __init__(self, node: FakeWakuNode, labels: Optional[Dict[str, str]] = None):
+        self.node = node
+        self.name = node.name
+        self.labels = labels or {}
+        self.id = uuid.uuid4().hex
+        self.status = "created"
+        self.attrs: Dict[str, Any] = {"NetworkSettings": {"Networks": {}}}
+
+    def start(self) -> None:
+        self.node.start()
+        self.status = "running"
+
+    def reload(self) -> None:
+        pass
+
+    def stop(self, timeout: int = 10) -> None:
+        self.node.stop()
+        self.status = "exited"
+
+    def kill(self, signal: str = "SIGKILL") -> None:
+        self.stop()
+
+    def pause(self) -> None:
+        if self.status != "running":
+            raise RuntimeError(f"Container {self.name} is not running")
+        self.node.pause()
+        self.status = "paused"
+
+    def unpause(self) -> None:
+        if self.status != "paused":
+            raise RuntimeError(f"Container {self.name} is not paused")
+        self.node.unpause()
+        self.status = "running"
+
+    def remove(self, force: bool = False) -> None:
+        if self.status in ("running", "paused"):
+            if not force:
+                raise RuntimeError(f"Container {self.name} is running")
+            self.stop()
+        self.status = "removed"
+
+    def logs(self, **kwargs):
+        return self.node.logs(**kwargs)
+
+    def stats(self, stream: bool = False, decode: bool = False, **kwargs):
+        """docker-py ``Container.stats``: one snapshot, or a stream of one per ``stats_interval``"""
+        if not stream:
+            return self.node.stats()
+        return self._stream_stats(decode)
+
+    def _stream_stats(self, decode: bool):
+        # Like the daemon, raw JSON documents unless decoded. TelemetryRecorder
+        # reads these; the stream ends as soon as the node stops, not a frame later
+        node = self.node
+        while node.running:
+            snapshot = node.stats()
+            yield snapshot if decode else json.dumps(snapshot).encode()
+            with node._log_cond:
+                node._log_cond.wait_for(lambda: not node.running, timeout=self.stats_interval)
+
+
+class FakeNetwork:
+    """docker-py ``Network`` look-alike that only records attachments"""
+
+    def __init__(self, name: str, subnet: str, gateway: str,
+                 labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.subnet = subnet
+        self.gateway = gateway
+        self.labels = labels or {}
+        self.containers: Dict[str, str] = {}
+
+    def connect(self, container, ipv4_address: Optional[str] = None) -> None:
+        self.containers[container.name] = ipv4_address
+        container.attrs["NetworkSettings"]["Networks"][self.name] = {"IPAddress": ipv4_address}
+
+    def disconnect(self, container, force: bool = False) -> None:
+        self.containers.pop(container.name, None)
+
+    def remove(self) -> None:
+        self.containers.clear()
@@ -0,0 +1,315 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from src.latency import percentile
+from src.waku_client import WakuClient
+from utils.helpers import decode_base64_payload
+from utils.report import add_report_section, write_json_report
+
+FANOUT_PREFIX = "waku-fanout"
+
+
+def content_topics(count: int, app: str = "fanout", version: int = 1,
+                   encoding: str = "proto") -> List[str]:
+    """``count`` distinct content topics of one application (so one autoshard)"""
+    return [f"/{app}/{version}/topic-{i}/{encoding}" for i in range(count)]
+
+
+def encode_cell(topic_index: int, seq: int) -> str:
+    return f"{FANOUT_PREFIX}|{topic_index}|{seq}"
+
+
+def decode_cell(payload: str) -> Optional[Tuple[int, int]]:
+    """Inverse of ``encode_cell``; None for other payloads"""
+    parts = payload.split("|")
+    if len(parts) != 3 or parts[0] != FANOUT_PREFIX:
+        return None
+    try:
+        return int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+def subscribe_batched(client: WakuClient, topics: Sequence[str],
+                      batch_size: int = 100) -> Tuple[List[float], int]:
+    """Subscribe in calls of ``batch_size`` topics; (ms per call, failed calls)"""
+    timings, failed = [], 0
+    for start in range(0, len(topics), batch_size):
+        started = time.perf_counter()
+        if not client.subscribe_to_topic(list(topics[start:start + batch_size])):
+            failed += 1
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, failed
+
+
+@dataclass
+class SubscriptionCost:
+    """What subscribing one node to the whole topic set took"""
+    node: str
+    topics: int
+    batches: int
+    failed_batches: int
+    total_ms: float
+    p50_batch_ms: float
+    max_batch_ms: float
+    unsubscribe_ms: float = 0.0
+
+    @property
+    def per_topic_ms(self) -> float:
+        return self.total_ms / self.topics if self.topics else 0.0
+
+
+@dataclass
+class TopicDelivery:
+    """Messages of one topic expected and received across all subscribers"""
+    topic: str
+    sent: int
+    expected: int
+    received: int
+
+    @property
+    def ratio(self) -> float:
+        return self.received / self.expected if self.expected else 1.0
+
+
+class FanoutMatrix:
+    """Sent-versus-received bitmap of a many-topic run.
+
+    Cells are bytes laid out topic x node x message, so one topic's cells
+    are one contiguous slice. The expected matrix repeats each topic's
+    sent row for every subscriber but its publisher; delivery counts,
+    missing cells and completeness come from slice counts and bitwise
+    operations over the whole matrix, not per-message loops.
+    """
+
+    def __init__(self, topics: Sequence[str], nodes: Sequence[str],
+                 messages_per_topic: int, publishers: Optional[Sequence[int]] = None):
+        self.topics = list(topics)
+        self.nodes = list(nodes)
+        self.messages = messages_per_topic
+        # Node index publishing each topic; its own copies are not counted
+        self.publishers = list(publishers) if publishers is not None else \
+            [t % len(self.nodes) for t in range(len(self.topics))]
+        self.sent = bytearray(len(self.topics) * messages_per_topic)
+        self.received = bytearray(len(self.topics) * len(self.nodes) * messages_per_topic)
+        self.duplicates = 0
+        self.misrouted = 0
+
+    @property
+    def cell_count(self) -> int:
+        return len(self.topics) * len(self.nodes)
+
+    def mark_sent(self, topic_index: int, seq: int) -> None:
+        self.sent[topic_index * self.messages + seq] = 1
+
+    def record(self, topic_index: int, node_index: int,
+               messages: Sequence[Dict[str, Any]]) -> int:
+        """Mark what ``node_index`` drained from ``topic_index``; returns new deliveries"""
+        if node_index == self.publishers[topic_index]:
+            return 0
+        base = (topic_index * len(self.nodes) + node_index) * self.messages
+        new = 0
+        for msg in messages:
+            cell = decode_cell(decode_base64_payload(msg.get("payload", "")))
+            if cell is None:
+                continue
+            if cell[0] != topic_index or not 0 <= cell[1] < self.messages:
+                self.misrouted += 1
+                continue
+            if self.received[base + cell[1]]:
+                self.duplicates += 1
+            else:
+                self.received[base + cell[1]] = 1
+                new += 1
+        return new
+
+    def expected(self) -> bytes:
+        m, n = self.messages, len(self.nodes)
+        empty = bytes(m)
+        return b"".join(
+            row * publisher + empty + row * (n - publisher - 1)
+            for row, publisher in ((bytes(self.sent[t * m:(t + 1) * m]), self.publishers[t])
+                                   for t in range(len(self.topics)))
+        )
+
+    def missing(self) -> bytes:
+        """Cells expected but not received, as a 0/1 byte matrix"""
+        expected = self.expected()
+        missing = int.from_bytes(expected, "little") & ~int.from_bytes(self.received, "little")
+        return missing.to_bytes(len(expected), "little")
+
+    def pending_cells(self) -> List[Tuple[int, int]]:
+        """(topic, node) cells still waiting for at least one message"""
+        missing, m, n = self.missing(), self.messages, len(self.nodes)
+        return [divmod(cell, n) for cell in range(self.cell_count)
+                if missing.find(1, cell * m, (cell + 1) * m) >= 0]
+
+    def deliveries(self) -> List[TopicDelivery]:
+        expected, m = self.expected(), self.messages
+        span = len(self.nodes) * m
+        return [TopicDelivery(topic,
+                              sent=self.sent.count(1, t * m, (t + 1) * m),
+                              expected=expected.count(1, t * span, (t + 1) * span),
+                              received=self.received.count(1, t * span, (t + 1) * span))
+                for t, topic in enumerate(self.topics)]
+
+
+@dataclass
+class FanoutReport:
+    """Subscription cost and per-topic delivery of a fan-out run"""
+    topics: int
+    nodes: List[str]
+    messages_per_topic: int
+    subscriptions: List[SubscriptionCost]
+    deliveries: List[TopicDelivery]
+    published: int
+    duplicates: int
+    misrouted: int
+    publish_s: float
+    collect_s: float
+    drains: int
+    missing_samples: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def delivery_ratio(self) -> float:
+        expected = sum(d.expected for d in self.deliveries)
+        return sum(d.received for d in self.deliveries) / expected if expected else 1.0
+
+    def worst(self, count: int = 10) -> List[TopicDelivery]:
+        return sorted(self.deliveries, key=lambda d: d.ratio)[:count]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [{**asdict(d), "ratio": d.ratio} for d in self.deliveries]
+
+    def subscription_rows(self) -> List[Dict[str, Any]]:
+        return [{**asdict(s), "per_topic_ms": s.per_topic_ms} for s in self.subscriptions]
+
+    def as_dict(self) -> Dict[str, Any]:
+        ratios = sorted(d.ratio for d in self.deliveries)
+        return {
+            "topics": self.topics,
+            "nodes": self.nodes,
+            "messages_per_topic": self.messages_per_topic,
+            "published": self.published,
+            "delivery_ratio": self.delivery_ratio,
+            "min_topic_ratio": ratios[0] if ratios else 1.0,
+            "p10_topic_ratio": percentile(ratios, 10),
+            "duplicates": self.duplicates,
+            "misrouted": self.misrouted,
+            "publish_s": self.publish_s,
+            "collect_s": self.collect_s,
+            "drains": self.drains,
+            "subscriptions": self.subscription_rows(),
+            "missing_samples": self.missing_samples,
+            "per_topic": self.rows(),
+        }
+
+
+class FanoutRunner:
+    """Subscribes every node to a large topic set and checks fan-out across it.
+
+    Each node subscribes in ``batch_size``-topic calls (timed per call),
+    topic ``t`` is published ``messages_per_topic`` times by node
+    ``t % len(clients)``, and every (topic, node) cell is drained until
+    the ``FanoutMatrix`` has all it expects or ``settle_timeout`` passes.
+    Drains run ``workers`` at a time, and only for cells still pending.
+    """
+
+    def __init__(self, clients: Dict[str, WakuClient], topics: Sequence[str],
+                 messages_per_topic: int = 5, batch_size: int = 100,
+                 poll_interval: float = 0.2, settle_timeout: float = 30.0, workers: int = 16,
+                 unsubscribe: bool = True):
+        self.clients = clients
+        self.names = list(clients)
+        self.topics = list(topics)
+        self.messages_per_topic = messages_per_topic
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.settle_timeout = settle_timeout
+        self.workers = workers
+        self.unsubscribe = unsubscribe
+        self.matrix = FanoutMatrix(self.topics, self.names, messages_per_topic)
+        self.report: Optional[FanoutReport] = None
+
+    def _subscribe(self, name: str) -> SubscriptionCost:
+        timings, failed = subscribe_batched(self.clients[name], self.topics, self.batch_size)
+        ordered = sorted(timings)
+        return SubscriptionCost(name, len(self.topics), len(timings), failed,
+                                total_ms=sum(timings),
+                                p50_batch_ms=percentile(ordered, 50),
+                                max_batch_ms=ordered[-1] if ordered else 0.0)
+
+    def _unsubscribe(self, cost: SubscriptionCost) -> None:
+        client = self.clients[cost.node]
+        started = time.perf_counter()
+        for start in range(0, len(self.topics), self.batch_size):
+            client.unsubscribe_from_topic(self.topics[start:start + self.batch_size])
+        cost.unsubscribe_ms = (time.perf_counter() - started) * 1000
+
+    def _publish(self, node_index: int) -> int:
+        client = self.clients[self.names[node_index]]
+        published = 0
+        for t in range(node_index, len(self.topics), len(self.names)):
+            for seq in range(self.messages_per_topic):
+                if client.publish_message(self.topics[t], encode_cell(t, seq)):
+                    self.matrix.mark_sent(t, seq)
+                    published += 1
+        return published
+
+    def _drain(self, cell: Tuple[int, int]) -> None:
+        topic_index, node_index = cell
+        messages = self.clients[self.names[node_index]].get_messages(self.topics[topic_index])
+        self.matrix.record(topic_index, node_index, messages)
+
+    def run(self) -> FanoutReport:
+        with ThreadPoolExecutor(max_workers=max(min(self.workers, len(self.names)), 1)) as pool:
+            subscriptions = list(pool.map(self._subscribe, self.names))
+            started = time.monotonic()
+            published = sum(pool.map(self._publish, range(len(self.names))))
+            publish_s = time.monotonic() - started
+
+        # Publishers expect nothing on their own topics, so are never drained
+        pending = self.matrix.pending_cells()
+        drains = 0
+        started = time.monotonic()
+        deadline = started + self.settle_timeout
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending:
+                list(pool.map(self._drain, pending))
+                drains += len(pending)
+                pending = self.matrix.pending_cells()
+                if not pending or time.monotonic() >= deadline:
+                    break
+                time.sleep(self.poll_interval)
+        collect_s = time.monotonic() - started
+
+        if self.unsubscribe:
+            with ThreadPoolExecutor(max_workers=max(min(self.workers, len(self.names)), 1)) as pool:
+                list(pool.map(self._unsubscribe, subscriptions))
+
+        self.report = FanoutReport(
+            topics=len(self.topics),
+            nodes=self.names,
+            messages_per_topic=self.messages_per_topic,
+            subscriptions=subscriptions,
+            deliveries=self.matrix.deliveries(),
+            published=published,
+            duplicates=self.matrix.duplicates,
+            misrouted=self.matrix.misrouted,
+            publish_s=publish_s,
+            collect_s=collect_s,
+            drains=drains,
+            missing_samples=[{"topic": self.topics[t], "node": self.names[n]}
+                             for t, n in pending[:10]]
+        )
+        logging.info(f"Fan-out over {len(self.topics)} topics x {len(self.names)} nodes: "
+                     f"delivery {self.report.delivery_ratio:.2%}, {len(pending)} cells incomplete, "
+                     f"subscribe {max(s.total_ms for s in subscriptions):.0f}ms per node")
+        return self.report
+
+    def write_report(self, path: str) -> str:
+        add_report_section("Fan-out subscription cost", self.report.subscription_rows())
+        return write_json_report(path, self.report.as_dict())
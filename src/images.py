@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Sequence
+
+from src.backends import BackendError, ContainerBackend
+
+DEFAULT_IMAGE_CACHE = ".cache/images.json"
+# How long a completed image check is trusted before the registry is asked again
+DEFAULT_IMAGE_CACHE_TTL = 24 * 3600.0
+
+
+class ImageDigestMismatch(BackendError):
+    """A pulled image does not have the digest it was pinned to"""
+
+
+def repository(image: str) -> str:
+    """``image`` without its tag or digest, e.g. ``wakuorg/nwaku``"""
+    name = image.partition("@")[0]
+    if ":" in name.rsplit("/", 1)[-1]:
+        name = name.rsplit(":", 1)[0]
+    return name
+
+
+def repo_digest(image: str, digests: Sequence[str]) -> str:
+    """The ``sha256:...`` digest of ``image`` among an image's repo digests"""
+    repo = repository(image)
+    for entry in digests:
+        name, _, digest = entry.partition("@")
+        if name == repo or name.endswith("/" + repo):
+            return digest
+    return digests[0].partition("@")[2] if digests else ""
+
+
+@dataclass
+class ImageCheck:
+    """Outcome of preparing one image"""
+    image: str
+    id: str
+    digest: str
+    pulled: bool
+    cached: bool
+    seconds: float
+
+
+class ImageCache:
+    """JSON record of image checks, so later runs can skip the registry.
+
+    An entry is trusted while it is younger than ``ttl`` seconds and the
+    local image still has the ID that was checked.
+    """
+
+    def __init__(self, path: str = DEFAULT_IMAGE_CACHE, ttl: float = DEFAULT_IMAGE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            logging.warning(f"Ignoring unreadable image cache {path}: {e}")
+
+    def fresh(self, image: str, image_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(image)
+        if entry is None or entry.get("id") != image_id:
+            return None
+        if time.time() - entry.get("checked_at", 0) > self.ttl:
+            return None
+        return entry
+
+    def record(self, check: ImageCheck) -> None:
+        self.entries[check.image] = {"id": check.id, "digest": check.digest,
+                                     "checked_at": time.time()}
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def prepare_images(backend: ContainerBackend, images: Sequence[str],
+                   cache: Optional[ImageCache] = None,
+                   expected: Optional[Dict[str, str]] = None,
+                   pull: bool = True) -> List[ImageCheck]:
+    """Make sure ``images`` are present locally before any node starts.
+
+    An image with a fresh ``cache`` entry is only inspected. Any other is
+    pulled (which also refreshes a moved tag) unless ``pull`` is off, in
+    which case it only has to be present. The digest is then checked
+    against the one pinned in the name (``repo@sha256:...``) or in
+    ``expected``, raising ``ImageDigestMismatch`` if they differ.
+    """
+    expected = expected or {}
+    checks = []
+    for image in dict.fromkeys(images):
+        started = time.monotonic()
+        info = backend.inspect_image(image)
+        entry = cache.fresh(image, info["id"]) if cache is not None and info else None
+        pulled = False
+        if entry is None and (pull or info is None):
+            info = backend.pull_image(image)
+            pulled = True
+        digest = repo_digest(image, info["digests"])
+        check = ImageCheck(image, info["id"], digest, pulled, entry is not None,
+                           time.monotonic() - started)
+
+        pinned = image.partition("@")[2] or expected.get(image)
+        if pinned and digest != pinned:
+            raise ImageDigestMismatch(f"{image} has digest {digest or 'none'}, expected {pinned}")
+        if cache is not None:
+            cache.record(check)
+        logging.info(f"Image {image} ready in {check.seconds:.2f}s "
+                     f"({'pulled' if pulled else 'cached' if check.cached else 'present'}, "
+                     f"{digest or check.id})")
+        checks.append(check)
+    if cache is not None:
+        cache.save()
+    return checks
+
+
+def check_rows(checks: Sequence[ImageCheck]) -> List[Dict[str, Any]]:
+    return [asdict(check) for check in checks]
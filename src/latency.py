@@ -0,0 +1,179 @@
+import math
+import time
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.collector import MessageCollector
+from src.waku_client import WakuClient
+from utils.helpers import decode_base64_payload
+
+PROBE_PREFIX = "waku-probe"
+
+
+def encode_probe(publisher: str, seq: int, sent_ns: int) -> str:
+    """Payload carrying the publisher, a sequence number and the send time"""
+    return f"{PROBE_PREFIX}|{publisher}|{seq}|{sent_ns}"
+
+
+def decode_probe(payload: str) -> Optional[Tuple[str, int, int]]:
+    """Inverse of ``encode_probe``; None for non-probe payloads"""
+    parts = payload.split("|")
+    if len(parts) != 4 or parts[0] != PROBE_PREFIX:
+        return None
+    try:
+        return parts[1], int(parts[2]), int(parts[3])
+    except ValueError:
+        return None
+
+
+def probe_key(msg: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    """Collector key of a probe message: (publisher, seq)"""
+    probe = decode_probe(decode_base64_payload(msg.get("payload", "")))
+    if probe is None:
+        return None
+    return probe[0], probe[1]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class PairStats:
+    """Delivery latency (ms) from one publisher to one receiver"""
+    publisher: str
+    receiver: str
+    sent: int
+    received: int
+    lost: int
+    duplicates: int
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+@dataclass
+class LatencyReport:
+    """Per-pair propagation latency and loss of a harness run"""
+    content_topic: str
+    poll_interval: float
+    pairs: List[PairStats] = field(default_factory=list)
+
+    @property
+    def total_lost(self) -> int:
+        return sum(pair.lost for pair in self.pairs)
+
+    @property
+    def total_duplicates(self) -> int:
+        return sum(pair.duplicates for pair in self.pairs)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [asdict(pair) for pair in self.pairs]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "content_topic": self.content_topic,
+            "poll_interval": self.poll_interval,
+            "total_lost": self.total_lost,
+            "total_duplicates": self.total_duplicates,
+            "pairs": self.rows()
+        }
+
+
+class LatencyHarness:
+    """Measures publisher to receiver delivery latency over relay.
+
+    Every probe payload embeds its publisher, sequence number and send
+    time. Receivers are drained by a ``MessageCollector`` every
+    ``poll_interval`` seconds, so reported latencies carry up to one poll
+    interval of quantisation error.
+    """
+
+    def __init__(self, publishers: Dict[str, WakuClient],
+                 receivers: Dict[str, WakuClient], content_topic: str,
+                 poll_interval: float = 0.05):
+        self.publishers = publishers
+        self.receivers = receivers
+        self.content_topic = content_topic
+        self.poll_interval = poll_interval
+        self.collector = MessageCollector(receivers, [content_topic],
+                                          interval=poll_interval, key_func=probe_key)
+        self._sent: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def _expected(self) -> Dict[str, List[Tuple[str, int]]]:
+        with self._lock:
+            return {
+                receiver: [(publisher, seq)
+                           for publisher, sent in self._sent.items() if publisher != receiver
+                           for seq in sent]
+                for receiver in self.receivers
+            }
+
+    def run(self, messages_per_publisher: int = 10, interval: float = 0.1,
+            settle_timeout: float = 10.0) -> LatencyReport:
+        """Publish probes from every publisher and collect them everywhere"""
+        self.collector.start()
+        try:
+            for seq in range(messages_per_publisher):
+                for name, client in self.publishers.items():
+                    sent_ns = time.time_ns()
+                    if client.publish_message(self.content_topic,
+                                              encode_probe(name, seq, sent_ns)):
+                        with self._lock:
+                            self._sent[name][seq] = sent_ns
+                if interval:
+                    time.sleep(interval)
+
+            deadline = time.monotonic() + settle_timeout
+            for receiver, keys in self._expected().items():
+                self.collector.wait_for([receiver], keys,
+                                        timeout=max(deadline - time.monotonic(), 0))
+        finally:
+            self.collector.stop()
+
+        report = self.report()
+        logging.info(
+            f"Latency run on {self.content_topic}: {len(report.pairs)} pairs, "
+            f"{report.total_lost} lost, {report.total_duplicates} duplicates"
+        )
+        return report
+
+    def report(self) -> LatencyReport:
+        """Build the per-pair statistics from what has been collected"""
+        report = LatencyReport(self.content_topic, self.poll_interval)
+        index = self.collector.index
+        with self._lock:
+            for publisher, sent in self._sent.items():
+                for receiver in self.receivers:
+                    if receiver == publisher:
+                        continue
+                    latencies = []
+                    duplicates = 0
+                    for seq, sent_ns in sent.items():
+                        seen_ns = index.first_seen(receiver, (publisher, seq))
+                        if seen_ns is not None:
+                            latencies.append((seen_ns - sent_ns) / 1e6)
+                            duplicates += index.duplicates(receiver, (publisher, seq))
+                    latencies.sort()
+                    report.pairs.append(PairStats(
+                        publisher=publisher,
+                        receiver=receiver,
+                        sent=len(sent),
+                        received=len(latencies),
+                        lost=len(sent) - len(latencies),
+                        duplicates=duplicates,
+                        p50_ms=percentile(latencies, 50),
+                        p90_ms=percentile(latencies, 90),
+                        p99_ms=percentile(latencies, 99),
+                        max_ms=latencies[-1] if latencies else 0.0
+                    ))
+        return report
@@ -0,0 +1,320 @@
+import os
+import time
+import asyncio
+import math
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Sequence
+
+from src.async_waku_client import AsyncClientPool
+from src.waku_client import WakuClient
+
+MODES = ("closed", "open")
+TRANSPORTS = ("threads", "async")
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        # Default to 50 ms worth of tokens so sleep overshoot is absorbed
+        self.capacity = burst if burst is not None else max(1.0, rate / 20)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def _take(self) -> float:
+        """Take a token and return 0, or return the wait until one is due"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without blocking"""
+        return self._take() == 0.0
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Block until a token is available; False if ``deadline`` passes first"""
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    async def acquire_async(self, deadline: Optional[float] = None) -> bool:
+        """``acquire`` for coroutines: waits without blocking the event loop"""
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            await asyncio.sleep(wait)
+
+
+class PayloadBuffer:
+    """Pre-encoded publish request bodies, spread round-robin over topics.
+
+    All base64 and JSON encoding happens here, before the send loop. Every
+    body carries a distinct random payload so relay dedup does not drop
+    repeats.
+    """
+
+    def __init__(self, content_topics: Sequence[str], count: int,
+                 payload_size: int = 256):
+        if not content_topics:
+            raise ValueError("At least one content topic is required")
+        self.content_topics = list(content_topics)
+        self.bodies: List[bytes] = []
+        self.topics: List[str] = []
+        for i in range(count):
+            topic = self.content_topics[i % len(self.content_topics)]
+            self.bodies.append(WakuClient.encode_message(topic, os.urandom(payload_size)))
+            self.topics.append(topic)
+
+    def __len__(self) -> int:
+        return len(self.bodies)
+
+    def client_index(self, index: int, clients: int) -> int:
+        """Client sending body ``index``: the next one after each full round of
+        topics, so every client publishes to every topic whatever the counts"""
+        return (index // len(self.content_topics)) % clients
+
+
+@dataclass
+class LoadReport:
+    """Achieved throughput and error rate of a load run"""
+    mode: str
+    target_rate: Optional[float]
+    attempted: int
+    succeeded: int
+    failed: int
+    duration: float
+    # Open loop: publishes still queued behind in-flight ones at the
+    # deadline, dropped instead of sent late
+    backlog: int = 0
+
+    @property
+    def achieved_rate(self) -> float:
+        return self.succeeded / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.failed / self.attempted if self.attempted else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["achieved_rate"] = self.achieved_rate
+        data["error_rate"] = self.error_rate
+        return data
+
+
+class LoadGenerator:
+    """Rate-controlled publisher spreading messages over nodes and topics.
+
+    ``closed`` mode runs ``concurrency`` workers that each wait for their
+    previous publish before taking the next token. ``open`` mode dispatches
+    on every token regardless of outstanding requests, so slow nodes show
+    up as backlog (``LoadReport.backlog``) and errors instead of a lower
+    offered rate.
+
+    With the ``threads`` transport every in-flight publish holds a thread.
+    The ``async`` transport sends through one ``AsyncClientPool`` on an
+    event loop instead, so ``concurrency`` (in-flight publishes per node)
+    can go into the thousands.
+    """
+
+    def __init__(self, clients: Sequence[WakuClient], content_topics: Sequence[str],
+                 rate: Optional[float] = None, mode: str = "closed",
+                 concurrency: int = 8, payload_size: int = 256,
+                 transport: str = "threads"):
+        if not clients:
+            raise ValueError("At least one client is required")
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport {transport!r}, expected one of {TRANSPORTS}")
+        if mode == "open" and not rate:
+            raise ValueError("open mode needs a target rate")
+        self.clients = list(clients)
+        self.content_topics = list(content_topics)
+        self.rate = rate
+        self.mode = mode
+        self.concurrency = concurrency
+        self.payload_size = payload_size
+        self.transport = transport
+        self._lock = threading.Lock()
+
+    def run(self, count: Optional[int] = None,
+            duration: Optional[float] = None) -> LoadReport:
+        """Publish ``count`` messages, or for ``duration`` seconds at ``rate``"""
+        if count is None:
+            if duration is None or not self.rate:
+                raise ValueError("Pass count, or duration together with a rate")
+            count = math.ceil(self.rate * duration)
+
+        buffer = PayloadBuffer(self.content_topics, count, self.payload_size)
+        bucket = TokenBucket(self.rate) if self.rate else None
+        deadline = time.monotonic() + duration if duration is not None else None
+        self._next = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._backlog = 0
+
+        started = time.monotonic()
+        if self.transport == "async":
+            asyncio.run(self._run_async(buffer, bucket, deadline))
+        elif self.mode == "closed":
+            self._run_closed(buffer, bucket, deadline)
+        else:
+            self._run_open(buffer, bucket, deadline)
+        elapsed = time.monotonic() - started
+
+        report = LoadReport(
+            mode=self.mode,
+            target_rate=self.rate,
+            attempted=self._succeeded + self._failed,
+            succeeded=self._succeeded,
+            failed=self._failed,
+            duration=elapsed,
+            backlog=self._backlog
+        )
+        logging.info(
+            f"Load run ({self.mode}, {self.transport}): {report.succeeded}/{report.attempted} published "
+            f"in {elapsed:.2f}s, {report.achieved_rate:.1f} msg/s, "
+            f"error rate {report.error_rate:.2%}, backlog {report.backlog}"
+        )
+        return report
+
+    def _take_index(self, total: int) -> Optional[int]:
+        with self._lock:
+            if self._next >= total:
+                return None
+            index = self._next
+            self._next += 1
+            return index
+
+    def _send(self, buffer: PayloadBuffer, index: int) -> None:
+        client = self.clients[buffer.client_index(index, len(self.clients))]
+        ok = client.publish_encoded(buffer.bodies[index])
+        with self._lock:
+            if ok:
+                self._succeeded += 1
+            else:
+                self._failed += 1
+
+    def _run_closed(self, buffer: PayloadBuffer, bucket: Optional[TokenBucket],
+                    deadline: Optional[float]) -> None:
+        def worker():
+            while True:
+                if bucket is not None and not bucket.acquire(deadline):
+                    return
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                index = self._take_index(len(buffer))
+                if index is None:
+                    return
+                self._send(buffer, index)
+
+        threads = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _run_open(self, buffer: PayloadBuffer, bucket: TokenBucket,
+                  deadline: Optional[float]) -> None:
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        futures = []
+        for index in range(len(buffer)):
+            if not bucket.acquire(deadline):
+                break
+            futures.append(pool.submit(self._send, buffer, index))
+        if deadline is not None:
+            # Sends still queued at the deadline are the backlog; in-flight ones finish
+            wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            self._backlog = sum(future.cancel() for future in futures)
+        pool.shutdown(wait=True)
+
+    async def _run_async(self, buffer: PayloadBuffer, bucket: Optional[TokenBucket],
+                         deadline: Optional[float]) -> None:
+        async with AsyncClientPool(limit=self.concurrency * len(self.clients),
+                                   limit_per_node=self.concurrency,
+                                   timeout=self.clients[0].timeout) as pool:
+            # Recorded into the same metrics, under the same labels, as the sync clients
+            clients = [pool.client(client.base_url, metrics=client.session.metrics,
+                                   node=client.node) for client in self.clients]
+
+            async def send(index: int) -> None:
+                client = clients[buffer.client_index(index, len(clients))]
+                ok = await client.publish_encoded(buffer.bodies[index])
+                with self._lock:
+                    if ok:
+                        self._succeeded += 1
+                    else:
+                        self._failed += 1
+
+            if self.mode == "closed":
+                async def worker():
+                    while True:
+                        if bucket is not None and not await bucket.acquire_async(deadline):
+                            return
+                        if deadline is not None and time.monotonic() >= deadline:
+                            return
+                        index = self._take_index(len(buffer))
+                        if index is None:
+                            return
+                        await send(index)
+
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+                return
+
+            # Open loop: sends beyond ``concurrency`` per node queue for a slot
+            slots = [asyncio.Semaphore(self.concurrency) for _ in clients]
+            in_flight = set()
+
+            async def queued(index: int) -> None:
+                async with slots[buffer.client_index(index, len(clients))]:
+                    in_flight.add(index)
+                    await send(index)
+
+            tasks = {}
+            for index in range(len(buffer)):
+                if not await bucket.acquire_async(deadline):
+                    break
+                tasks[asyncio.create_task(queued(index))] = index
+            if deadline is not None and tasks:
+                # Sends still queued at the deadline are the backlog; in-flight ones finish
+                _, pending = await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+                for task in pending:
+                    if tasks[task] not in in_flight:
+                        task.cancel()
+                        self._backlog += 1
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+def publish_many(clients: Sequence[WakuClient], content_topics: Sequence[str],
+                 count: int, rate: Optional[float] = None, **kwargs) -> LoadReport:
+    """Publish ``count`` messages across ``clients`` and ``content_topics``"""
+    return LoadGenerator(clients, content_topics, rate=rate, **kwargs).run(count=count)
@@ -0,0 +1,151 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Callable, Tuple, Pattern
+
+NODE_STARTED = "node_started"
+PEER_CONNECTED = "peer_connected"
+PEER_DISCONNECTED = "peer_disconnected"
+MESSAGE_RELAYED = "message_relayed"
+SUBSCRIPTION_ADDED = "subscription_added"
+
+# Matched, in order, against the message part of an nwaku (chronicles) log
+# line. Peer and relay events are only logged at DEBUG by some releases, so
+# start nodes with ``log_level="DEBUG"`` when waiting on them.
+EVENT_PATTERNS: List[Tuple[str, Pattern]] = [
+    (NODE_STARTED, re.compile(r"node setup complete|node started", re.I)),
+    (PEER_DISCONNECTED, re.compile(r"peer disconnected|disconnected from peer|peereventkind\.left", re.I)),
+    (PEER_CONNECTED, re.compile(r"peer connected|connected to peer|peereventkind\.joined", re.I)),
+    (MESSAGE_RELAYED, re.compile(r"waku\.relay received|received relay message|message relayed", re.I)),
+    # nwaku logs exactly "subscribe" (and "unsubscribe") per relay topic
+    (SUBSCRIPTION_ADDED, re.compile(r"^subscribe$", re.I)),
+]
+
+_LINE_RE = re.compile(r"^(TRC|DBG|INF|NTC|WRN|ERR|FTL) (\S+ \S+) (.*)$")
+_FIELD_RE = re.compile(r'(\w+)=("(?:[^"\\]|\\.)*"|\S+)')
+
+
+@dataclass
+class NodeEvent:
+    """Typed event parsed from a node's log output"""
+    kind: str
+    node: str
+    message: str
+    fields: Dict[str, str] = field(default_factory=dict)
+    level: str = ""
+    log_time: str = ""
+    received: float = field(default_factory=time.monotonic)
+    seq: int = 0
+
+
+def parse_log_line(node: str, line: str) -> Optional[NodeEvent]:
+    """Turn one nwaku log line into a ``NodeEvent``, or None if uninteresting"""
+    match = _LINE_RE.match(line.strip())
+    if not match:
+        return None
+    level, log_time, rest = match.groups()
+    first_field = _FIELD_RE.search(rest)
+    message = (rest[:first_field.start()] if first_field else rest).strip()
+    for kind, pattern in EVENT_PATTERNS:
+        if pattern.search(message):
+            fields = {key: value.strip('"') for key, value in _FIELD_RE.findall(rest)}
+            return NodeEvent(kind, node, message, fields, level, log_time)
+    return None
+
+
+class EventBus:
+    """Thread-safe event history that tests can block on"""
+
+    def __init__(self, history: int = 10000):
+        self._events: deque = deque(maxlen=history)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def publish(self, event: NodeEvent) -> None:
+        with self._cond:
+            self._seq += 1
+            event.seq = self._seq
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def cursor(self) -> int:
+        """Sequence number of the newest event; pass to ``wait_for(after=...)``"""
+        with self._cond:
+            return self._seq
+
+    def events(self, kind: Optional[str] = None, node: Optional[str] = None) -> List[NodeEvent]:
+        with self._cond:
+            return [e for e in self._events
+                    if (kind is None or e.kind == kind) and (node is None or e.node == node)]
+
+    def wait_for(self, kind: str, node: Optional[str] = None,
+                 predicate: Optional[Callable[[NodeEvent], bool]] = None,
+                 timeout: float = 30, after: Optional[int] = None) -> Optional[NodeEvent]:
+        """Wait for an event newer than ``after`` (by default, newer than the wait); None on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            checked = self._seq if after is None else after
+            while True:
+                newer = []
+                for event in reversed(self._events):
+                    if event.seq <= checked:
+                        break
+                    newer.append(event)
+                for event in reversed(newer):
+                    if (event.kind == kind and (node is None or event.node == node)
+                            and (predicate is None or predicate(event))):
+                        return event
+                checked = self._seq
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+class LogStreamer:
+    """Follows one container's log output and publishes parsed events"""
+
+    def __init__(self, container, node: str, bus: EventBus, since: Optional[int] = None):
+        self.container = container
+        self.node = node
+        self.bus = bus
+        self.since = since
+        self._stream = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"logs-{node}")
+
+    def start(self) -> "LogStreamer":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        buffer = b""
+        try:
+            kwargs = {"since": self.since} if self.since is not None else {}
+            self._stream = self.container.logs(stream=True, follow=True, **kwargs)
+            for chunk in self._stream:
+                if self._stopped.is_set():
+                    break
+                buffer += chunk
+                # Chunks are frames, not lines: keep any trailing partial line
+                *lines, buffer = buffer.split(b"\n")
+                for raw in lines:
+                    event = parse_log_line(self.node, raw.decode(errors="replace"))
+                    if event is not None:
+                        self.bus.publish(event)
+        except Exception as e:
+            if not self._stopped.is_set():
+                logging.warning(f"Log stream of {self.node} ended: {e}")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stopped.set()
+        if self._stream is not None and hasattr(self._stream, "close"):
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        self._thread.join(timeout)
@@ -0,0 +1,203 @@
+import re
+import time
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Path parameters collapsed so every topic lands in the same endpoint
+ENDPOINT_TEMPLATES: List[Tuple["re.Pattern", str]] = [
+    (re.compile(r"^/relay/v1/auto/messages/[^/]+$"), "/relay/v1/auto/messages/{topic}"),
+    (re.compile(r"^/relay/v1/messages/[^/]+$"), "/relay/v1/messages/{pubsubTopic}"),
+]
+
+
+def endpoint_of(path: str) -> str:
+    for pattern, template in ENDPOINT_TEMPLATES:
+        if pattern.match(path):
+            return template
+    return path
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; keeps counts only, never samples"""
+
+    __slots__ = ("bounds", "counts", "count", "total", "min", "max")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding quantile ``q`` (capped at ``max``)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                bound = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(bound, self.max)
+        return self.max
+
+
+@dataclass
+class RequestSample:
+    """One REST request, as passed to metrics sinks"""
+    node: str
+    method: str
+    endpoint: str
+    seconds: float
+    bytes_sent: int
+    bytes_received: int
+    status: Optional[int]
+    error: bool
+
+
+class EndpointStats:
+    __slots__ = ("requests", "errors", "bytes_sent", "bytes_received", "latency")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(bounds)
+
+
+class RequestMetrics:
+    """Per node, per endpoint request counters and latency histograms.
+
+    ``add_sink`` registers a callable that receives a ``RequestSample`` for
+    every request, to forward measurements to an external metrics system.
+    Samples are only built while a sink is registered.
+    """
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self._stats: Dict[Tuple[str, str, str], EndpointStats] = {}
+        self._sinks: List[Callable[[RequestSample], None]] = []
+        self._lock = threading.Lock()
+
+    def record(self, node: str, method: str, endpoint: str, seconds: float,
+               bytes_sent: int = 0, bytes_received: int = 0,
+               status: Optional[int] = None, error: bool = False) -> None:
+        key = (node, method, endpoint)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats(self.bounds)
+            stats.requests += 1
+            stats.errors += error
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency.observe(seconds)
+            sinks = self._sinks
+        if sinks:
+            sample = RequestSample(node, method, endpoint, seconds, bytes_sent,
+                                   bytes_received, status, error)
+            for sink in sinks:
+                sink(sample)
+
+    def add_sink(self, sink: Callable[[RequestSample], None]) -> None:
+        with self._lock:
+            self._sinks = self._sinks + [sink]
+
+    def remove_sink(self, sink: Callable[[RequestSample], None]) -> None:
+        with self._lock:
+            # Equality, not identity: each ``obj.method`` access is a new bound method
+            self._sinks = [s for s in self._sinks if s != sink]
+
+    def stats(self, node: str, method: str, endpoint: str) -> Optional[EndpointStats]:
+        return self._stats.get((node, method, endpoint))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """One summary row per (node, method, endpoint), for reports"""
+        with self._lock:
+            items = sorted(self._stats.items())
+        rows = []
+        for (node, method, endpoint), stats in items:
+            latency = stats.latency
+            rows.append({
+                "node": node,
+                "method": method,
+                "endpoint": endpoint,
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "bytes_sent": stats.bytes_sent,
+                "bytes_received": stats.bytes_received,
+                "mean_ms": latency.mean * 1000,
+                "p50_ms": latency.quantile(0.5) * 1000,
+                "p95_ms": latency.quantile(0.95) * 1000,
+                "p99_ms": latency.quantile(0.99) * 1000,
+                "max_ms": latency.max * 1000,
+            })
+        return rows
+
+
+# Shared by every WakuClient unless one is given its own registry
+REQUEST_METRICS = RequestMetrics()
+
+
+class InstrumentedSession(requests.Session):
+    """``requests.Session`` that records every request into ``RequestMetrics``"""
+
+    def __init__(self, metrics: Optional[RequestMetrics] = None, node: Optional[str] = None):
+        super().__init__()
+        self.metrics = metrics if metrics is not None else REQUEST_METRICS
+        # Label of the node in the metrics; host:port of the request if None
+        self.node = node
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        parts = urlsplit(request.url)
+        node = self.node or parts.netloc
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode()
+        sent = len(body) if body else 0
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            self.metrics.record(node, request.method, endpoint_of(parts.path),
+                                time.perf_counter() - started, sent, error=True)
+            raise
+        elapsed = time.perf_counter() - started
+        if kwargs.get("stream"):
+            received = int(response.headers.get("content-length") or 0)
+        else:
+            received = len(response.content)
+        self.metrics.record(node, request.method, endpoint_of(parts.path),
+                            elapsed, sent, received, response.status_code,
+                            error=response.status_code >= 400)
+        return response
@@ -0,0 +1,88 @@
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Optional, Sequence
+
+from src.docker_manager import ClusterNode, DockerManager
+
+
+class PoolExhausted(Exception):
+    """No idle node became available in time"""
+
+
+class NodePool:
+    """Pre-started idle nodes handed out on demand.
+
+    ``start`` brings up ``size`` standalone nodes (no bootstrap peer) in
+    parallel. ``acquire`` hands one out without paying container start and
+    readiness cost; ``release`` drains and unsubscribes ``reset_topics`` so
+    the next borrower gets a clean relay state. Pool nodes take allocator
+    slots from ``first_index`` on, clear of the low slots tests use directly.
+    """
+
+    def __init__(self, manager: DockerManager, size: int = 4,
+                 reset_topics: Sequence[str] = (), first_index: int = 50,
+                 max_workers: int = 16):
+        self.manager = manager
+        self.size = size
+        self.first_index = first_index
+        self.reset_topics = list(reset_topics)
+        self.max_workers = max_workers
+        self.nodes: List[ClusterNode] = []
+        self._idle: "queue.Queue[ClusterNode]" = queue.Queue()
+
+    def start(self, network: Optional[str] = None,
+              ready_timeout: float = 60.0) -> "NodePool":
+        if network is None:
+            network = self.manager.namespace.network
+        if network not in self.manager.networks:
+            self.manager.create_network(network)
+        configs = [self.manager.allocator.node_config(self.first_index + i)
+                   for i in range(self.size)]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, self.size)) as pool:
+            futures = [
+                pool.submit(self.manager.start_network_node, config, network,
+                            None, ready_timeout)
+                for config in configs
+            ]
+            self.nodes = [future.result() for future in futures]
+        for node in self.nodes:
+            self._idle.put(node)
+        logging.info(f"Node pool ready with {self.size} idle node(s)")
+        return self
+
+    def acquire(self, timeout: float = 30.0) -> ClusterNode:
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolExhausted(f"No idle node within {timeout}s "
+                                f"(pool size {self.size})") from None
+
+    def release(self, node: ClusterNode, topics: Optional[Sequence[str]] = None) -> None:
+        """Reset ``node``'s relay state and return it to the pool"""
+        topics = list(self.reset_topics if topics is None else topics)
+        try:
+            self.manager.reset_relay_state(node.name, node.ports, topics)
+        except Exception as e:
+            logging.warning(f"Resetting pooled node {node.name} failed: {e}")
+        self._idle.put(node)
+
+    @contextmanager
+    def node(self, timeout: float = 30.0, topics: Optional[Sequence[str]] = None):
+        """Borrow a node for the duration of a ``with`` block"""
+        node = self.acquire(timeout)
+        try:
+            yield node
+        finally:
+            self.release(node, topics)
+
+    def close(self) -> None:
+        """Remove every pool node"""
+        self.manager.remove_nodes([node.name for node in self.nodes])
+        self.nodes = []
+        self._idle = queue.Queue()
+
+    @property
+    def idle(self) -> int:
+        return self._idle.qsize()
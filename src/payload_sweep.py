@@ -0,0 +1,121 @@
+import os
+import time
+import struct
+import logging
+import binascii
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.collector import MessageCollector
+from src.latency import percentile
+from src.waku_client import WakuClient, DEFAULT_MAX_MSG_SIZE
+
+# size, sequence number, send time (ns since epoch)
+_HEADER = struct.Struct(">IIQ")
+# Room left under the node limit for the rest of the encoded WakuMessage
+ENVELOPE_HEADROOM = 512
+
+
+def size_steps(max_size: int, min_size: int = 1024, factor: int = 2) -> List[int]:
+    """``min_size``, doubling up to and including ``max_size``"""
+    sizes = []
+    size = min_size
+    while size < max_size:
+        sizes.append(size)
+        size *= factor
+    sizes.append(max_size)
+    return sizes
+
+
+def sweep_key(msg: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """(size, seq) of a sweep message, decoding only the header's base64"""
+    encoded = msg.get("payload", "")
+    try:
+        size, seq, _ = _HEADER.unpack_from(binascii.a2b_base64(encoded[:24]))
+    except (binascii.Error, struct.error):
+        return None
+    return size, seq
+
+
+@dataclass
+class SweepPoint:
+    """Publish throughput and delivery latency at one payload size"""
+    size: int
+    sent: int
+    received: int
+    lost: int
+    publish_rate: float
+    throughput_mib_s: float
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class PayloadSweep:
+    """Publishes binary payloads of growing size from one node to another.
+
+    Each payload is one preallocated random buffer whose 16-byte header
+    (size, sequence, send time) is rewritten in place before every publish
+    and handed to ``WakuClient`` as a ``memoryview``. Latency is measured
+    like ``LatencyHarness``, to within one ``poll_interval``.
+    """
+
+    def __init__(self, publisher: WakuClient, receiver: WakuClient, content_topic: str,
+                 max_size: int = DEFAULT_MAX_MSG_SIZE, min_size: int = 1024,
+                 messages_per_size: int = 20, poll_interval: float = 0.02):
+        self.publisher = publisher
+        self.receiver = receiver
+        self.content_topic = content_topic
+        self.sizes = size_steps(max_size - ENVELOPE_HEADROOM, min_size)
+        self.messages_per_size = messages_per_size
+        self.collector = MessageCollector({"receiver": receiver}, [content_topic],
+                                          interval=poll_interval, key_func=sweep_key)
+        self.points: List[SweepPoint] = []
+
+    def run(self, settle_timeout: float = 10.0) -> List[SweepPoint]:
+        self.collector.start()
+        try:
+            for size in self.sizes:
+                self.points.append(self._run_size(size, settle_timeout))
+        finally:
+            self.collector.stop()
+        return self.points
+
+    def _run_size(self, size: int, settle_timeout: float) -> SweepPoint:
+        buffer = bytearray(os.urandom(size))
+        view = memoryview(buffer)
+        sent: Dict[int, int] = {}
+        started = time.perf_counter()
+        for seq in range(self.messages_per_size):
+            sent_ns = time.time_ns()
+            _HEADER.pack_into(buffer, 0, size, seq, sent_ns)
+            if self.publisher.publish_message(self.content_topic, view):
+                sent[seq] = sent_ns
+        duration = time.perf_counter() - started
+
+        keys = [(size, seq) for seq in sent]
+        self.collector.wait_for(["receiver"], keys, timeout=settle_timeout)
+        index = self.collector.index
+        latencies = sorted(
+            (index.first_seen("receiver", (size, seq)) - sent_ns) / 1e6
+            for seq, sent_ns in sent.items()
+            if index.has_seen("receiver", (size, seq))
+        )
+        point = SweepPoint(
+            size=size,
+            sent=len(sent),
+            received=len(latencies),
+            lost=len(sent) - len(latencies),
+            publish_rate=len(sent) / duration if duration > 0 else 0.0,
+            throughput_mib_s=len(sent) * size / duration / 1024 ** 2 if duration > 0 else 0.0,
+            p50_ms=percentile(latencies, 50),
+            p99_ms=percentile(latencies, 99),
+            max_ms=latencies[-1] if latencies else 0.0
+        )
+        logging.info(f"Payload {size}B: {point.publish_rate:.1f} msg/s, "
+                     f"{point.throughput_mib_s:.2f} MiB/s, p50 {point.p50_ms:.1f}ms, "
+                     f"lost {point.lost}")
+        return point
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [asdict(point) for point in self.points]
@@ -0,0 +1,164 @@
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Iterator, Optional
+
+import requests
+
+
+class NodeNotReadyError(Exception):
+    """Raised when a node does not become ready within its deadline"""
+
+
+@dataclass
+class StartupTimings:
+    """Per-phase durations (seconds) of a node start, in the order they happen.
+
+    ``network`` is only set for nodes attached to a cluster network and
+    ``bootstrap`` (ENR served until the first peer connected) only when
+    the manager profiles it.
+    """
+    image: float = 0.0
+    create: float = 0.0
+    start: float = 0.0
+    rest_up: float = 0.0
+    enr_available: float = 0.0
+    network: float = 0.0
+    bootstrap: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return (self.image + self.create + self.start + self.rest_up + self.enr_available
+                + self.network + self.bootstrap)
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data["total"] = self.total
+        return data
+
+
+class Backoff:
+    """Bounded exponential backoff schedule"""
+
+    def __init__(self, initial: float = 0.1, factor: float = 2.0,
+                 maximum: float = 2.0):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+
+    def delays(self) -> Iterator[float]:
+        """Yield successive sleep intervals, capped at ``maximum``"""
+        delay = self.initial
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.maximum)
+
+
+class ReadinessProbe:
+    """Polls a node container and its REST API until the ENR is served"""
+
+    def __init__(self, container, rest_url: str, timeout: float = 60.0,
+                 backoff: Optional[Backoff] = None):
+        self.container = container
+        self.rest_url = rest_url.rstrip('/')
+        self.timeout = timeout
+        self.backoff = backoff or Backoff()
+        self.session = requests.Session()
+        self.debug_info: Dict[str, Any] = {}
+
+    def _remaining(self, deadline: float) -> float:
+        return deadline - time.monotonic()
+
+    def _sleep(self, delays: Iterator[float], deadline: float) -> None:
+        remaining = self._remaining(deadline)
+        if remaining <= 0:
+            return
+        time.sleep(min(next(delays), remaining))
+
+    def wait_running(self, deadline: float) -> None:
+        """Wait until the container reports the running state"""
+        delays = self.backoff.delays()
+        while True:
+            self.container.reload()
+            status = self.container.status
+            if status == "running":
+                return
+            if status in ("exited", "dead"):
+                raise NodeNotReadyError(
+                    f"Container {self.container.name} {status}: "
+                    f"{self._log_tail()}"
+                )
+            if self._remaining(deadline) <= 0:
+                raise NodeNotReadyError(
+                    f"Container {self.container.name} not running "
+                    f"after {self.timeout}s (status: {status})"
+                )
+            self._sleep(delays, deadline)
+
+    def wait_rest_up(self, deadline: float) -> Optional[requests.Response]:
+        """Wait until the REST server accepts connections"""
+        delays = self.backoff.delays()
+        while True:
+            try:
+                return self.session.get(
+                    f"{self.rest_url}/debug/v1/info",
+                    timeout=max(min(self._remaining(deadline), 2.0), 0.1)
+                )
+            except requests.RequestException:
+                pass
+            if self._remaining(deadline) <= 0:
+                raise NodeNotReadyError(
+                    f"REST API of {self.container.name} not reachable "
+                    f"after {self.timeout}s"
+                )
+            self._sleep(delays, deadline)
+
+    def wait_enr(self, deadline: float,
+                 response: Optional[requests.Response] = None) -> str:
+        """Wait until ``/debug/v1/info`` returns a non-empty ENR"""
+        delays = self.backoff.delays()
+        while True:
+            if response is not None and response.ok:
+                try:
+                    self.debug_info = response.json()
+                except ValueError:
+                    self.debug_info = {}
+                enr = self.debug_info.get('enrUri', '')
+                if enr:
+                    return enr
+            if self._remaining(deadline) <= 0:
+                raise NodeNotReadyError(
+                    f"Node {self.container.name} did not serve its ENR "
+                    f"after {self.timeout}s"
+                )
+            self._sleep(delays, deadline)
+            try:
+                response = self.session.get(
+                    f"{self.rest_url}/debug/v1/info",
+                    timeout=max(min(self._remaining(deadline), 2.0), 0.1)
+                )
+            except requests.RequestException:
+                response = None
+
+    def wait(self, timings: StartupTimings) -> str:
+        """Run all readiness phases, filling ``timings``; return the ENR"""
+        deadline = time.monotonic() + self.timeout
+        try:
+            phase_start = time.monotonic()
+            self.wait_running(deadline)
+            response = self.wait_rest_up(deadline)
+            timings.rest_up = time.monotonic() - phase_start
+
+            phase_start = time.monotonic()
+            enr = self.wait_enr(deadline, response)
+            timings.enr_available = time.monotonic() - phase_start
+            return enr
+        finally:
+            self.session.close()
+
+    def _log_tail(self, lines: int = 20) -> str:
+        try:
+            return self.container.logs(tail=lines).decode(errors='replace')
+        except Exception as e:
+            logging.warning(f"Could not read logs of {self.container.name}: {e}")
+            return ""
@@ -0,0 +1,256 @@
+import math
+import time
+import heapq
+import random
+import logging
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from src.latency import LatencyReport, PairStats, percentile
+from src.topology import Topology
+
+_NAN = float("nan")
+
+
+@dataclass
+class LinkModel:
+    """Behaviour of every peer link.
+
+    Each directed link gets a fixed one-way latency drawn uniformly from
+    ``latency_ms`` +/- ``jitter_ms``. Every transmission is dropped with
+    probability ``loss``; with ``bandwidth_mbps`` set, messages queue
+    behind each other on a link for their serialisation time.
+    """
+    latency_ms: float = 1.0
+    jitter_ms: float = 0.0
+    loss: float = 0.0
+    bandwidth_mbps: Optional[float] = None
+    # Validation and forwarding time on each receiving node
+    processing_ms: float = 0.0
+
+
+@dataclass
+class Workload:
+    """Publish schedule: (time in ms, publisher index) per message"""
+    publishes: List[Tuple[float, int]]
+    payload_size: int = 256
+    content_topic: str = "/sim/1/relay/proto"
+
+    @classmethod
+    def rounds(cls, publishers: Sequence[int], messages_per_publisher: int = 10,
+               interval: float = 0.1, **kwargs) -> "Workload":
+        """Every publisher once per round, ``interval`` s apart, as ``LatencyHarness.run``"""
+        return cls([(seq * interval * 1000, publisher)
+                    for seq in range(messages_per_publisher) for publisher in publishers],
+                   **kwargs)
+
+    @classmethod
+    def rate(cls, publishers: Sequence[int], count: int, rate: float,
+             **kwargs) -> "Workload":
+        """``count`` messages at ``rate`` msg/s, round-robin over publishers, as ``LoadGenerator``"""
+        return cls([(i * 1000 / rate, publishers[i % len(publishers)]) for i in range(count)],
+                   **kwargs)
+
+
+@dataclass
+class SimulationResult:
+    """Delivery and latency of a simulated run, in ``LatencyHarness`` terms"""
+    report: LatencyReport
+    nodes: int
+    edges: int
+    messages: int
+    deliveries: int
+    transmissions: int
+    lost_transmissions: int
+    events: int
+    elapsed_s: float
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def delivery_ratio(self) -> float:
+        expected = self.messages * (self.nodes - 1)
+        return self.deliveries / expected if expected else 1.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "messages": self.messages,
+            "delivery_ratio": self.delivery_ratio,
+            "duplicates": self.report.total_duplicates,
+            "transmissions": self.transmissions,
+            "lost_transmissions": self.lost_transmissions,
+            "p50_ms": percentile(self.latencies_ms, 50),
+            "p99_ms": percentile(self.latencies_ms, 99),
+            "max_ms": self.latencies_ms[-1] if self.latencies_ms else 0.0,
+            "events": self.events,
+            "elapsed_s": self.elapsed_s,
+        }
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return self.report.rows()
+
+
+class GossipSimulator:
+    """Seeded discrete-event model of relay propagation over a ``Topology``.
+
+    A node forwards a message to all its peers but the sender the first
+    time it receives it, the way relay floods its mesh; later copies only
+    count as duplicates. Lost transmissions are not repaired (no gossip
+    IHAVE/IWANT). Adjacency is kept in CSR form and per-link and per-node
+    state in ``array``s, so a 10k-node graph costs a few hundred KB plus
+    one float per node per message.
+    """
+
+    def __init__(self, topology: Topology, link: Optional[LinkModel] = None,
+                 seed: Optional[int] = None, names: Optional[Sequence[str]] = None):
+        self.topology = topology
+        self.link = link or LinkModel()
+        self.seed = seed
+        self.names = list(names) if names is not None else [f"node{i}" for i in range(topology.size)]
+        if len(self.names) != topology.size:
+            raise ValueError(f"{len(self.names)} names for {topology.size} nodes")
+
+        n = topology.size
+        self.offsets = array("l", [0]) * (n + 1)
+        for index, degree in enumerate(topology.degrees()):
+            self.offsets[index + 1] = self.offsets[index] + degree
+        self.targets = array("l", [0]) * self.offsets[n]
+        fill = array("l", self.offsets[:n])
+        for a, b in sorted(topology.edges):
+            self.targets[fill[a]] = b
+            fill[a] += 1
+            self.targets[fill[b]] = a
+            fill[b] += 1
+
+        rng = random.Random(seed)
+        low = max(self.link.latency_ms - self.link.jitter_ms, 0.0)
+        high = self.link.latency_ms + self.link.jitter_ms
+        self.latency = array("d", (rng.uniform(low, high) for _ in range(len(self.targets))))
+
+    def run(self, workload: Workload, receivers: Optional[Sequence[int]] = None) -> SimulationResult:
+        """Simulate ``workload``; per-pair stats cover ``receivers`` (default every node)"""
+        started = time.perf_counter()
+        n = self.topology.size
+        link = self.link
+        rng = random.Random(self.seed)
+        offsets, targets, latency = self.offsets, self.targets, self.latency
+        busy = array("d", [0.0]) * len(targets) if link.bandwidth_mbps else None
+        tx_ms = (workload.payload_size * 8 / (link.bandwidth_mbps * 1000)
+                 if link.bandwidth_mbps else 0.0)
+
+        publishers = sorted({publisher for _, publisher in workload.publishes})
+        duplicates = {publisher: array("l", [0]) * n for publisher in publishers}
+        first_seen = [array("d", [_NAN]) * n for _ in workload.publishes]
+        # (arrival ms, tie-break, node, sender, message); sender -1 is the publisher itself
+        events: List[Tuple[float, int, int, int, int]] = []
+        counter = 0
+        for message, (at, publisher) in enumerate(workload.publishes):
+            events.append((at, counter, publisher, -1, message))
+            counter += 1
+        heapq.heapify(events)
+
+        processed = transmissions = lost = 0
+        while events:
+            at, _, node, sender, message = heapq.heappop(events)
+            processed += 1
+            seen = first_seen[message]
+            if not math.isnan(seen[node]):
+                duplicates[workload.publishes[message][1]][node] += 1
+                continue
+            seen[node] = at
+            departs = at + (link.processing_ms if sender >= 0 else 0.0)
+            for slot in range(offsets[node], offsets[node + 1]):
+                peer = targets[slot]
+                if peer == sender:
+                    continue
+                transmissions += 1
+                if link.loss and rng.random() < link.loss:
+                    lost += 1
+                    continue
+                if busy is not None:
+                    start = busy[slot] if busy[slot] > departs else departs
+                    busy[slot] = start + tx_ms
+                    arrives = start + tx_ms + latency[slot]
+                else:
+                    arrives = departs + latency[slot]
+                heapq.heappush(events, (arrives, counter, peer, node, message))
+                counter += 1
+
+        report, latencies, deliveries = self._report(workload, first_seen, duplicates,
+                                                     range(n) if receivers is None else receivers)
+        result = SimulationResult(
+            report=report,
+            nodes=n,
+            edges=len(self.topology.edges),
+            messages=len(workload.publishes),
+            deliveries=deliveries,
+            transmissions=transmissions,
+            lost_transmissions=lost,
+            events=processed,
+            elapsed_s=time.perf_counter() - started,
+            latencies_ms=latencies
+        )
+        logging.info(f"Simulated {result.messages} messages over {n} nodes: delivery "
+                     f"{result.delivery_ratio:.2%}, {processed} events in {result.elapsed_s:.2f}s")
+        return result
+
+    def _report(self, workload: Workload, first_seen: List[array],
+                duplicates: Dict[int, array],
+                receivers: Sequence[int]) -> Tuple[LatencyReport, List[float], int]:
+        report = LatencyReport(workload.content_topic, poll_interval=0.0)
+        by_publisher: Dict[int, List[int]] = {}
+        for message, (_, publisher) in enumerate(workload.publishes):
+            by_publisher.setdefault(publisher, []).append(message)
+
+        everything: List[float] = []
+        deliveries = 0
+        for message, (at, publisher) in enumerate(workload.publishes):
+            for node, seen in enumerate(first_seen[message]):
+                if node != publisher and not math.isnan(seen):
+                    deliveries += 1
+                    everything.append(seen - at)
+        everything.sort()
+
+        for publisher, messages in by_publisher.items():
+            for receiver in receivers:
+                if receiver == publisher:
+                    continue
+                latencies = sorted(
+                    first_seen[message][receiver] - workload.publishes[message][0]
+                    for message in messages
+                    if not math.isnan(first_seen[message][receiver])
+                )
+                report.pairs.append(PairStats(
+                    publisher=self.names[publisher],
+                    receiver=self.names[receiver],
+                    sent=len(messages),
+                    received=len(latencies),
+                    lost=len(messages) - len(latencies),
+                    duplicates=duplicates[publisher][receiver],
+                    p50_ms=percentile(latencies, 50),
+                    p90_ms=percentile(latencies, 90),
+                    p99_ms=percentile(latencies, 99),
+                    max_ms=latencies[-1] if latencies else 0.0
+                ))
+        return report, everything, deliveries
+
+
+def compare_reports(simulated: LatencyReport, measured: LatencyReport) -> List[Dict[str, Any]]:
+    """Side by side p50 latency and loss of the pairs both reports cover"""
+    simulated_pairs = {(p.publisher, p.receiver): p for p in simulated.pairs}
+    rows = []
+    for pair in measured.pairs:
+        sim = simulated_pairs.get((pair.publisher, pair.receiver))
+        if sim is None:
+            continue
+        rows.append({
+            "publisher": pair.publisher,
+            "receiver": pair.receiver,
+            "measured_p50_ms": pair.p50_ms,
+            "simulated_p50_ms": sim.p50_ms,
+            "measured_lost": pair.lost,
+            "simulated_lost": sim.lost,
+        })
+    return rows
@@ -0,0 +1,328 @@
+import math
+import time
+import logging
+import threading
+from array import array
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.latency import LatencyHarness
+from src.load_generator import LoadGenerator
+from src.telemetry import TelemetryRecorder
+from utils.report import add_report_section, write_json_report
+
+class RingBuffer:
+    """Fixed-capacity ``array('d')`` keeping the latest ``capacity`` values"""
+
+    __slots__ = ("data", "capacity", "count")
+
+    def __init__(self, capacity: int):
+        self.data = array("d", [math.nan]) * capacity
+        self.capacity = capacity
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self.data[self.count % self.capacity] = value
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def values(self) -> List[float]:
+        """Oldest to newest"""
+        if self.count <= self.capacity:
+            return list(self.data[:self.count])
+        start = self.count % self.capacity
+        return list(self.data[start:]) + list(self.data[:start])
+
+    def last(self) -> float:
+        return self.data[(self.count - 1) % self.capacity] if self.count else math.nan
+
+
+class TrendFit:
+    """Online least-squares line through (x, y) samples.
+
+    Keeps six running sums, so memory stays constant however long the
+    run. With ``half_life`` older samples are discounted exponentially
+    (by sample count), so the slope follows the recent trend.
+    """
+
+    __slots__ = ("decay", "x0", "w", "sx", "sy", "sxx", "sxy", "syy")
+
+    def __init__(self, half_life: Optional[float] = None):
+        self.decay = 0.5 ** (1.0 / half_life) if half_life else 1.0
+        self.x0: Optional[float] = None
+        self.w = self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+
+    def add(self, x: float, y: float) -> None:
+        if math.isnan(y):
+            return
+        if self.x0 is None:
+            self.x0 = x
+        x -= self.x0
+        d = self.decay
+        self.w = self.w * d + 1.0
+        self.sx = self.sx * d + x
+        self.sy = self.sy * d + y
+        self.sxx = self.sxx * d + x * x
+        self.sxy = self.sxy * d + x * y
+        self.syy = self.syy * d + y * y
+
+    @property
+    def mean(self) -> float:
+        return self.sy / self.w if self.w else math.nan
+
+    @property
+    def slope(self) -> float:
+        denominator = self.w * self.sxx - self.sx * self.sx
+        if self.w < 2 or denominator <= 0:
+            return 0.0
+        return (self.w * self.sxy - self.sx * self.sy) / denominator
+
+    @property
+    def t_stat(self) -> float:
+        """Slope over its standard error; small values mean the slope is noise"""
+        if self.w <= 2:
+            return 0.0
+        sxx = self.sxx - self.sx * self.sx / self.w
+        sxy = self.sxy - self.sx * self.sy / self.w
+        syy = self.syy - self.sy * self.sy / self.w
+        if sxx <= 0:
+            return 0.0
+        slope = sxy / sxx
+        residual = max(syy - slope * sxy, 0.0) / (self.w - 2)
+        if residual == 0:
+            return math.inf if slope else 0.0
+        return slope / math.sqrt(residual / sxx)
+
+
+@dataclass
+class SoakThresholds:
+    """When a soak run raises an alert"""
+    max_memory_growth_bytes_per_hour: float = 64 * 1024 * 1024
+    max_rest_latency_growth_ms_per_hour: float = 50.0
+    max_latency_growth_ms_per_hour: float = 100.0
+    min_delivery_ratio: float = 0.99
+    # Samples before anything is judged, and run time before slopes are:
+    # a per-hour slope fitted over a few seconds is noise
+    warmup_samples: int = 10
+    min_elapsed_s: float = 300.0
+    # Slopes must also stand this many standard errors clear of zero
+    min_t_stat: float = 3.0
+
+
+@dataclass
+class SoakAlert:
+    """A trend that crossed its threshold"""
+    metric: str
+    node: str
+    value: float
+    threshold: float
+    elapsed_s: float
+
+    def __str__(self) -> str:
+        return (f"{self.metric} on {self.node}: {self.value:.3f} "
+                f"(threshold {self.threshold:.3f}) after {self.elapsed_s:.0f}s")
+
+
+class SoakMonitor:
+    """Bounded history and online trends of soak samples, with alerting.
+
+    Every metric keeps its last ``capacity`` samples in a ``RingBuffer``
+    for reporting, and feeds a ``TrendFit`` over the whole run (with
+    ``half_life`` samples of discounting). Trends are judged after every
+    sample, so a leak is reported while the run is still going.
+    """
+
+    def __init__(self, thresholds: Optional[SoakThresholds] = None, capacity: int = 720,
+                 half_life: Optional[float] = None):
+        self.thresholds = thresholds or SoakThresholds()
+        self.capacity = capacity
+        self.half_life = half_life
+        self.buffers: Dict[Tuple[str, str], RingBuffer] = {}
+        self.trends: Dict[Tuple[str, str], TrendFit] = {}
+        self.elapsed = RingBuffer(capacity)
+        self.samples = 0
+        self.alerts: List[SoakAlert] = []
+        self._alerted = set()
+
+    def record(self, elapsed_s: float, values: Dict[Tuple[str, str], float]) -> List[SoakAlert]:
+        """Add one sample, keyed by (node, metric); returns the alerts it raised"""
+        self.elapsed.append(elapsed_s)
+        self.samples += 1
+        for key, value in values.items():
+            if key not in self.buffers:
+                self.buffers[key] = RingBuffer(self.capacity)
+                self.trends[key] = TrendFit(self.half_life)
+            self.buffers[key].append(value)
+            self.trends[key].add(elapsed_s / 3600.0, value)
+        return self._check(elapsed_s)
+
+    def _check(self, elapsed_s: float) -> List[SoakAlert]:
+        t = self.thresholds
+        if self.samples < t.warmup_samples:
+            return []
+        judge_slopes = elapsed_s >= t.min_elapsed_s
+        raised = []
+        for (node, metric), trend in self.trends.items():
+            if metric == "memory_bytes":
+                value, threshold = trend.slope, t.max_memory_growth_bytes_per_hour
+                exceeded = value > threshold
+            elif metric == "rest_ms":
+                value, threshold = trend.slope, t.max_rest_latency_growth_ms_per_hour
+                exceeded = value > threshold
+            elif metric == "latency_p50_ms":
+                value, threshold = trend.slope, t.max_latency_growth_ms_per_hour
+                exceeded = value > threshold
+            elif metric == "delivery_ratio":
+                value, threshold = trend.mean, t.min_delivery_ratio
+                exceeded = value < threshold
+            else:
+                continue
+            if metric != "delivery_ratio":
+                exceeded = exceeded and judge_slopes and trend.t_stat >= t.min_t_stat
+            if exceeded and (node, metric) not in self._alerted:
+                self._alerted.add((node, metric))
+                alert = SoakAlert(metric, node, value, threshold, elapsed_s)
+                logging.warning(f"Soak alert: {alert}")
+                raised.append(alert)
+        self.alerts.extend(raised)
+        return raised
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Latest value, mean and hourly slope of every (node, metric)"""
+        rows = []
+        for (node, metric), trend in sorted(self.trends.items()):
+            rows.append({
+                "node": node,
+                "metric": metric,
+                "last": self.buffers[(node, metric)].last(),
+                "mean": trend.mean,
+                "slope_per_hour": trend.slope,
+            })
+        return rows
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "thresholds": asdict(self.thresholds),
+            "alerts": [asdict(alert) for alert in self.alerts],
+            "trends": self.rows(),
+            "elapsed_s": self.elapsed.values(),
+            "series": {f"{node}/{metric}": [None if math.isnan(v) else v for v in buf.values()]
+                       for (node, metric), buf in sorted(self.buffers.items())},
+        }
+
+
+@dataclass
+class SoakReport:
+    """Outcome of a soak run"""
+    duration_s: float
+    samples: int
+    published: int
+    failed: int
+    stopped_early: bool
+    alerts: List[SoakAlert] = field(default_factory=list)
+
+
+class SoakRunner:
+    """Holds a cluster at a fixed publish rate for a long time and watches it decay.
+
+    A background ``LoadGenerator`` publishes at ``rate`` across the nodes.
+    Every ``interval`` seconds the runner takes a Docker stats snapshot,
+    times one REST call per node and runs a short ``LatencyHarness``
+    round for delivery ratio and latency, and feeds all of it to a
+    ``SoakMonitor``. With ``fail_fast`` the run stops at the first alert.
+    """
+
+    def __init__(self, manager, nodes, content_topic: str, rate: float = 10.0,
+                 interval: float = 30.0, thresholds: Optional[SoakThresholds] = None,
+                 capacity: int = 720, probes_per_sample: int = 2, fail_fast: bool = False):
+        self.manager = manager
+        self.nodes = list(nodes)
+        self.content_topic = content_topic
+        self.probe_topic = content_topic.rstrip("/") + "-soak-probe"
+        self.rate = rate
+        self.interval = interval
+        self.probes_per_sample = probes_per_sample
+        self.fail_fast = fail_fast
+        self.clients = {node.name: node.client() for node in self.nodes}
+        self.monitor = SoakMonitor(thresholds, capacity)
+        self.telemetry = TelemetryRecorder(manager, prometheus_metrics=())
+        self._stop = threading.Event()
+        self._published = 0
+        self._failed = 0
+
+    def _load(self) -> None:
+        generator = LoadGenerator(list(self.clients.values()), [self.content_topic],
+                                  rate=self.rate, mode="open")
+        # Short chunks so a stop takes effect within a second
+        while not self._stop.is_set():
+            report = generator.run(duration=1.0)
+            self._published += report.succeeded
+            self._failed += report.failed
+
+    def _sample(self, elapsed_s: float) -> List[SoakAlert]:
+        values: Dict[Tuple[str, str], float] = {}
+        snapshot = self.telemetry.snapshot()
+        for name, client in self.clients.items():
+            stats = snapshot.get(name, {})
+            values[(name, "memory_bytes")] = stats.get("memory_bytes", math.nan)
+            values[(name, "cpu_percent")] = stats.get("cpu_percent", math.nan)
+            started = time.perf_counter()
+            try:
+                client.get_debug_info()
+                values[(name, "rest_ms")] = (time.perf_counter() - started) * 1000
+            except Exception as e:
+                logging.warning(f"Soak REST probe of {name} failed: {e}")
+                values[(name, "rest_ms")] = math.nan
+
+        report = LatencyHarness(self.clients, self.clients, self.probe_topic,
+                                poll_interval=0.05) \
+            .run(messages_per_publisher=self.probes_per_sample, interval=0,
+                 settle_timeout=min(self.interval, 10.0))
+        sent = sum(pair.sent for pair in report.pairs)
+        received = sum(pair.received for pair in report.pairs)
+        p50s = sorted(pair.p50_ms for pair in report.pairs if pair.received)
+        values[("cluster", "delivery_ratio")] = received / sent if sent else math.nan
+        values[("cluster", "latency_p50_ms")] = p50s[len(p50s) // 2] if p50s else math.nan
+        values[("cluster", "publish_rate")] = self._published / elapsed_s if elapsed_s else 0.0
+        return self.monitor.record(elapsed_s, values)
+
+    def run(self, duration: float) -> SoakReport:
+        """Soak for ``duration`` seconds (less if ``fail_fast`` trips)"""
+        for client in self.clients.values():
+            client.subscribe_to_topic([self.content_topic, self.probe_topic])
+        self._stop.clear()
+        loader = threading.Thread(target=self._load, daemon=True, name="soak-load")
+        started = time.monotonic()
+        loader.start()
+        stopped_early = False
+        try:
+            next_at = started + self.interval
+            while time.monotonic() < started + duration:
+                self._stop.wait(max(min(next_at, started + duration) - time.monotonic(), 0))
+                next_at += self.interval
+                if self._sample(time.monotonic() - started) and self.fail_fast:
+                    stopped_early = True
+                    break
+        finally:
+            self._stop.set()
+            loader.join()
+            self.telemetry.close_streams()
+
+        report = SoakReport(
+            duration_s=time.monotonic() - started,
+            samples=self.monitor.samples,
+            published=self._published,
+            failed=self._failed,
+            stopped_early=stopped_early,
+            alerts=list(self.monitor.alerts)
+        )
+        logging.info(f"Soak ran {report.duration_s:.0f}s: {report.samples} samples, "
+                     f"{report.published} published, {len(report.alerts)} alert(s)")
+        return report
+
+    def write_report(self, path: str, report: SoakReport) -> str:
+        add_report_section("Soak trends", self.monitor.rows())
+        return write_json_report(path, {**asdict(report), **self.monitor.as_dict()})
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import logging
+import statistics
+from dataclasses import dataclass, fields
+from typing import Dict, Any, List, Optional
+
+from src.latency import percentile
+from src.readiness import StartupTimings
+
+PHASES = tuple(f.name for f in fields(StartupTimings))
+DEFAULT_HISTORY = "reports/startup_history.jsonl"
+
+
+@dataclass
+class PhaseStats:
+    """One startup phase over many node starts"""
+    phase: str
+    count: int
+    mean_s: float
+    p50_s: float
+    p90_s: float
+    max_s: float
+    # Fraction of the summed startup time spent in this phase
+    share: float
+
+
+class StartupProfile:
+    """Startup phase durations of every node start, grouped by image.
+
+    ``summary`` aggregates one run; ``append_history`` adds it as one JSON
+    line to a history file, and ``aggregate_history`` folds those lines
+    into per-image, per-phase trends across runs.
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[StartupTimings]] = {}
+
+    def add(self, image: str, timings: StartupTimings) -> None:
+        """Record a start; ``timings`` may still be filled in afterwards"""
+        self.samples.setdefault(image, []).append(timings)
+
+    def phase_stats(self, image: str) -> List[PhaseStats]:
+        samples = self.samples.get(image, [])
+        total = sum(timings.total for timings in samples)
+        stats = []
+        for phase in PHASES:
+            values = sorted(getattr(timings, phase) for timings in samples)
+            stats.append(PhaseStats(
+                phase=phase,
+                count=len(values),
+                mean_s=statistics.fmean(values) if values else 0.0,
+                p50_s=percentile(values, 50),
+                p90_s=percentile(values, 90),
+                max_s=values[-1] if values else 0.0,
+                share=sum(values) / total if total else 0.0
+            ))
+        return stats
+
+    def dominant(self, image: str) -> Optional[str]:
+        """Phase taking the largest share of startup time"""
+        stats = [s for s in self.phase_stats(image) if s.share > 0]
+        return max(stats, key=lambda s: s.share).phase if stats else None
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [{"image": image, **vars(stats)}
+                for image in sorted(self.samples) for stats in self.phase_stats(image)]
+
+    def summary(self, run_id: str) -> List[Dict[str, Any]]:
+        """One history record per image of this run"""
+        return [{
+            "run_id": run_id,
+            "created": time.time(),
+            "image": image,
+            "nodes": len(samples),
+            "dominant": self.dominant(image),
+            "phases": {stats.phase: {"mean_s": stats.mean_s, "p50_s": stats.p50_s,
+                                     "max_s": stats.max_s}
+                       for stats in self.phase_stats(image)},
+        } for image, samples in sorted(self.samples.items()) if samples]
+
+    def append_history(self, path: str, run_id: str) -> str:
+        """Append this run's records as JSON lines; workers of a run may share a file"""
+        records = self.summary(run_id)
+        if not records:
+            return path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a") as f:
+            f.write("".join(json.dumps(record, sort_keys=True) + "\n" for record in records))
+        return path
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    records = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logging.warning(f"Skipping malformed startup history line in {path}")
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def aggregate_history(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per image and phase: runs, nodes, and the median and latest of the run means.
+
+    Records of the same run (e.g. one per xdist worker) are weighted by
+    their node counts into one run mean.
+    """
+    runs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for record in sorted(records, key=lambda r: r.get("created", 0)):
+        run = runs.setdefault(record["image"], {}).setdefault(
+            record["run_id"], {"nodes": 0, "sums": {}})
+        run["nodes"] += record["nodes"]
+        for phase, stats in record["phases"].items():
+            run["sums"][phase] = run["sums"].get(phase, 0.0) + stats["mean_s"] * record["nodes"]
+
+    rows = []
+    for image in sorted(runs):
+        image_runs = list(runs[image].values())
+        nodes = sum(run["nodes"] for run in image_runs)
+        for phase in PHASES:
+            means = [run["sums"].get(phase, 0.0) / run["nodes"]
+                     for run in image_runs if run["nodes"]]
+            rows.append({
+                "image": image,
+                "phase": phase,
+                "runs": len(image_runs),
+                "nodes": nodes,
+                "median_mean_s": statistics.median(means) if means else 0.0,
+                "latest_mean_s": means[-1] if means else 0.0,
+            })
+    return rows
@@ -0,0 +1,106 @@
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Callable, Sequence
+
+from src.load_generator import LoadGenerator
+from src.waku_client import WakuClient
+
+
+@dataclass
+class StoreScan:
+    """Cost of paging through the full result of one store query"""
+    page_size: int
+    prefetch: bool
+    messages: int
+    pages: int
+    first_page_ms: float
+    elapsed_s: float
+
+    @property
+    def rate(self) -> float:
+        return self.messages / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["rate"] = self.rate
+        return data
+
+
+def scan_store(client: WakuClient, content_topics: Sequence[str], page_size: int = 20,
+               prefetch: bool = False,
+               on_message: Optional[Callable[[Dict[str, Any]], None]] = None,
+               **query) -> StoreScan:
+    """Page through a store query, counting rather than keeping messages.
+
+    ``on_message`` sees every message as its page arrives; ``query`` takes
+    the filters of ``WakuClient.query_store``.
+    """
+    messages = pages = 0
+    first_page_ms = 0.0
+    started = time.perf_counter()
+    for page in client.iter_store_pages(list(content_topics), page_size, prefetch, **query):
+        if not pages:
+            first_page_ms = (time.perf_counter() - started) * 1000
+        pages += 1
+        messages += len(page)
+        if on_message is not None:
+            for msg in page:
+                on_message(msg)
+    elapsed = time.perf_counter() - started
+    return StoreScan(page_size, prefetch, messages, pages, first_page_ms, elapsed)
+
+
+def resync(client: WakuClient, content_topics: Sequence[str], since_ns: int,
+           page_size: int = 100, prefetch: bool = True, **kwargs) -> StoreScan:
+    """Catch up on everything stored since ``since_ns``, as a reconnecting client would"""
+    scan = scan_store(client, content_topics, page_size, prefetch,
+                      start_time=since_ns, **kwargs)
+    logging.info(f"Resynced {scan.messages} messages in {scan.pages} pages, "
+                 f"{scan.elapsed_s:.3f}s ({scan.rate:.0f} msg/s)")
+    return scan
+
+
+class StoreLatencySweep:
+    """Store query cost as the archived history grows.
+
+    Publishes through ``publisher`` until the topic's history reaches each
+    of ``history_sizes`` in turn, then scans the whole history from
+    ``store``. ``first_page_ms`` shows what an interactive client waits for;
+    ``elapsed_s`` what a full resync costs.
+    """
+
+    def __init__(self, publisher: WakuClient, store: WakuClient, content_topic: str,
+                 history_sizes: Sequence[int] = (100, 500, 1000), page_size: int = 100,
+                 prefetch: bool = True, concurrency: int = 8):
+        self.publisher = publisher
+        self.store = store
+        self.content_topic = content_topic
+        self.history_sizes = sorted(history_sizes)
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.generator = LoadGenerator([publisher], [content_topic], concurrency=concurrency)
+        self.points: List[Dict[str, Any]] = []
+
+    def run(self, settle_timeout: float = 10.0) -> List[Dict[str, Any]]:
+        published = 0
+        for size in self.history_sizes:
+            published += self.generator.run(count=size - published).succeeded
+            scan = self._scan_until(published, settle_timeout)
+            point = {"history": published, **scan.as_dict()}
+            self.points.append(point)
+            logging.info(f"Store history {published}: first page {scan.first_page_ms:.1f}ms, "
+                         f"full scan {scan.elapsed_s:.3f}s")
+        return self.points
+
+    def _scan_until(self, expected: int, timeout: float) -> StoreScan:
+        """Scan the topic, retrying until archival has caught up with ``expected``"""
+        deadline = time.monotonic() + timeout
+        while True:
+            scan = scan_store(self.store, [self.content_topic], self.page_size, self.prefetch)
+            if scan.messages >= expected or time.monotonic() >= deadline:
+                return scan
+            time.sleep(0.1)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return list(self.points)
@@ -0,0 +1,359 @@
+import re
+import math
+import time
+import logging
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import requests
+
+from utils.report import add_report_section, write_json_report
+
+STAT_FIELDS = ("cpu_percent", "memory_bytes", "rx_bytes", "tx_bytes")
+
+# Prometheus metrics scraped from nodes started with a metrics server
+DEFAULT_PROMETHEUS_METRICS = (
+    "libp2p_peers",
+    "waku_node_messages_total",
+    "process_resident_memory_bytes",
+)
+
+NAN = float("nan")
+
+_SAMPLE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{[^}]*\})?\s+(\S+)")
+
+
+def parse_prometheus(text: str, names: Sequence[str]) -> Dict[str, float]:
+    """Sum the samples of each metric in ``names`` across its label sets"""
+    wanted = set(names)
+    values: Dict[str, float] = {}
+    for line in text.splitlines():
+        match = _SAMPLE_RE.match(line)
+        if not match or match.group(1) not in wanted:
+            continue
+        try:
+            value = float(match.group(2))
+        except ValueError:
+            continue
+        values[match.group(1)] = values.get(match.group(1), 0.0) + value
+    return values
+
+
+class NodeSeries:
+    """Fixed-interval numeric series of one node.
+
+    Every series is a preallocated ``array('d')``; slot ``i`` holds the
+    sample of tick ``first_tick + i`` and missed ticks stay NaN. Arrays
+    grow by ``capacity`` slots at a time when a run outlasts them.
+    """
+
+    def __init__(self, first_tick: int, capacity: int,
+                 prometheus: Sequence[str] = ()):
+        self.first_tick = first_tick
+        self.capacity = capacity
+        self.length = 0
+        self.series: Dict[str, array] = {
+            name: array("d", [NAN]) * capacity
+            for name in tuple(STAT_FIELDS) + tuple(prometheus)
+        }
+
+    def set(self, tick: int, values: Dict[str, float]) -> None:
+        slot = tick - self.first_tick
+        if slot < 0:
+            return
+        while slot >= len(self.series[STAT_FIELDS[0]]):
+            for data in self.series.values():
+                data.extend(array("d", [NAN]) * self.capacity)
+        for name, value in values.items():
+            data = self.series.get(name)
+            if data is not None:
+                data[slot] = value
+        self.length = max(self.length, slot + 1)
+
+    def values(self, name: str) -> List[Tuple[int, float]]:
+        """(slot, value) pairs of the recorded samples of ``name``"""
+        data = self.series[name]
+        return [(i, data[i]) for i in range(self.length) if not math.isnan(data[i])]
+
+
+def _slope(points: List[Tuple[int, float]]) -> float:
+    """Least-squares slope of (x, y) points"""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def parse_stats(stats: Dict[str, Any],
+                previous: Optional[Tuple[float, float]] = None
+                ) -> Tuple[Dict[str, float], Tuple[float, float]]:
+    """Values of one Docker stats frame, and its (total, system) CPU counters.
+
+    CPU percent is taken against the frame's ``precpu_stats`` or, where
+    that is empty, against ``previous`` counters.
+    """
+    cpu = stats.get("cpu_stats", {})
+    total = float(cpu.get("cpu_usage", {}).get("total_usage", 0))
+    system = float(cpu.get("system_cpu_usage", 0))
+    cpus = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or [1])
+    precpu = stats.get("precpu_stats", {})
+    if precpu.get("system_cpu_usage"):
+        previous = (float(precpu.get("cpu_usage", {}).get("total_usage", 0)),
+                    float(precpu["system_cpu_usage"]))
+    cpu_percent = NAN
+    if previous is not None and system > previous[1]:
+        cpu_percent = (total - previous[0]) / (system - previous[1]) * cpus * 100.0
+
+    memory = stats.get("memory_stats", {})
+    extra = memory.get("stats", {})
+    # Page cache is reclaimable; "inactive_file" on cgroup v2, "cache" on v1
+    cache = extra.get("inactive_file", extra.get("cache", 0))
+    networks = stats.get("networks", {}).values()
+    return {
+        "cpu_percent": cpu_percent,
+        "memory_bytes": float(memory.get("usage", 0) - cache),
+        "rx_bytes": float(sum(n.get("rx_bytes", 0) for n in networks)),
+        "tx_bytes": float(sum(n.get("tx_bytes", 0) for n in networks)),
+    }, (total, system)
+
+
+class StatsStream:
+    """One container's streamed Docker stats, keeping the latest parsed frame.
+
+    The daemon pushes a frame about once a second over a single request.
+    ``close`` only flags the reader thread: it ends at the next frame, or
+    when the daemon ends the stream because the container stopped.
+    """
+
+    def __init__(self, name: str, container):
+        self.name = name
+        self.container = container
+        self.latest: Optional[Dict[str, float]] = None
+        self.frames = 0
+        self._first = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"stats-{name}")
+
+    def start(self) -> "StatsStream":
+        self._thread.start()
+        return self
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and not self._closed.is_set()
+
+    def _run(self) -> None:
+        previous = None
+        try:
+            for frame in self.container.stats(stream=True, decode=True):
+                if self._closed.is_set():
+                    break
+                self.latest, previous = parse_stats(frame, previous)
+                self.frames += 1
+                self._first.set()
+        except Exception as e:
+            if not self._closed.is_set():
+                logging.debug(f"Stats stream of {self.name} ended: {e}")
+        finally:
+            self._first.set()
+
+    def wait_first(self, timeout: float) -> Optional[Dict[str, float]]:
+        """Latest values, after waiting up to ``timeout`` for the first frame"""
+        self._first.wait(timeout)
+        return self.latest
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class TelemetryRecorder:
+    """Background recorder of per-node CPU, memory and network I/O.
+
+    Docker stats are streamed: one ``StatsStream`` per container, opened
+    when the container is first seen and closed once it is gone. Every
+    ``interval`` seconds the latest frame of each stream goes into the
+    fixed-interval series, so a tick costs no Docker API call; nodes with
+    a metrics server also have their Prometheus endpoint scraped, in
+    parallel.
+    """
+
+    def __init__(self, manager, interval: float = 1.0, capacity: int = 3600,
+                 prometheus_metrics: Optional[Sequence[str]] = None,
+                 max_workers: int = 8, timeout: float = 5.0):
+        self.manager = manager
+        self.interval = interval
+        self.capacity = capacity
+        self.prometheus_metrics = tuple(DEFAULT_PROMETHEUS_METRICS if prometheus_metrics is None
+                                        else prometheus_metrics)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.nodes: Dict[str, NodeSeries] = {}
+        self.started: Optional[float] = None
+        self._streams: Dict[str, StatsStream] = {}
+        self._streams_lock = threading.Lock()
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> "TelemetryRecorder":
+        self._stop.clear()
+        self.started = time.monotonic()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix="telemetry")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="telemetry")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self.close_streams()
+
+    def close_streams(self) -> None:
+        with self._streams_lock:
+            for stream in self._streams.values():
+                stream.close()
+            self._streams.clear()
+
+    def __enter__(self) -> "TelemetryRecorder":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        tick = 0
+        while not self._stop.is_set():
+            self.sample(tick)
+            tick += 1
+            # Ticks stay on the fixed grid even if a sample runs long
+            next_at = self.started + tick * self.interval
+            delay = next_at - time.monotonic()
+            if delay < 0:
+                tick = int((time.monotonic() - self.started) / self.interval) + 1
+                delay = self.started + tick * self.interval - time.monotonic()
+            self._stop.wait(delay)
+
+    def _sync_streams(self, containers: Dict[str, Any]) -> List[StatsStream]:
+        """Open streams of new (or restarted) containers and close those of gone ones"""
+        opened = []
+        with self._streams_lock:
+            for name in list(self._streams):
+                stream = self._streams[name]
+                if containers.get(name) is not stream.container or not stream.alive:
+                    stream.close()
+                    del self._streams[name]
+            for name, container in containers.items():
+                if name not in self._streams:
+                    self._streams[name] = StatsStream(name, container).start()
+                    opened.append(self._streams[name])
+        return opened
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Latest streamed stats (and scraped Prometheus metrics) of every running node"""
+        containers = dict(self.manager.containers)
+        for stream in self._sync_streams(containers):
+            stream.wait_first(self.timeout)
+        with self._streams_lock:
+            snapshot = {name: dict(stream.latest) for name, stream in self._streams.items()
+                        if stream.latest is not None}
+
+        if not (self.manager.metrics_server and self.prometheus_metrics):
+            return snapshot
+        scraped = [name for name in containers
+                   if "metrics" in self.manager.node_ports.get(name, {})]
+        pool = self._pool or ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="telemetry")
+        try:
+            futures = [(name, pool.submit(self._scrape, name)) for name in scraped]
+            for name, future in futures:
+                try:
+                    snapshot.setdefault(name, {}).update(future.result())
+                except Exception as e:
+                    logging.debug(f"Prometheus scrape of {name} failed: {e}")
+            return snapshot
+        finally:
+            if pool is not self._pool:
+                pool.shutdown(wait=True)
+
+    def sample(self, tick: int) -> None:
+        """Record the latest values of every running node into slot ``tick``"""
+        for name, values in self.snapshot().items():
+            series = self.nodes.get(name)
+            if series is None:
+                series = self.nodes[name] = NodeSeries(tick, self.capacity,
+                                                       self.prometheus_metrics)
+            series.set(tick, values)
+
+    def _scrape(self, name: str) -> Dict[str, float]:
+        port = self.manager.node_ports[name]["metrics"]
+        response = self._session.get(
+            f"http://{self.manager.rest_host}:{port}/metrics",
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return parse_prometheus(response.text, self.prometheus_metrics)
+
+    def summary(self, messages: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-node peak RSS, mean CPU, memory growth and network bytes.
+
+        With ``messages`` (the number of messages the run relayed), bytes
+        per message are included.
+        """
+        rows = []
+        for name in sorted(self.nodes):
+            series = self.nodes[name]
+            memory = series.values("memory_bytes")
+            cpu = [v for _, v in series.values("cpu_percent")]
+            rx = series.values("rx_bytes")
+            tx = series.values("tx_bytes")
+            network_bytes = ((rx[-1][1] - rx[0][1]) if rx else 0.0) + \
+                ((tx[-1][1] - tx[0][1]) if tx else 0.0)
+            row = {
+                "node": name,
+                "samples": len(memory),
+                "peak_rss_bytes": max((v for _, v in memory), default=0.0),
+                "mean_cpu_percent": sum(cpu) / len(cpu) if cpu else 0.0,
+                "memory_growth_bytes": (memory[-1][1] - memory[0][1]) if memory else 0.0,
+                # Slots are ``interval`` seconds apart
+                "memory_growth_bytes_per_min": _slope(memory) * 60.0 / self.interval,
+                "network_bytes": network_bytes,
+            }
+            if messages:
+                row["bytes_per_msg"] = network_bytes / messages
+            rows.append(row)
+        return rows
+
+    def as_dict(self, messages: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "summary": self.summary(messages),
+            "series": {
+                name: {
+                    "first_tick": series.first_tick,
+                    **{field: [None if math.isnan(v) else v
+                               for v in data[:series.length]]
+                       for field, data in series.series.items()}
+                }
+                for name, series in self.nodes.items()
+            }
+        }
+
+    def write_report(self, path: str, title: str = "Node resource usage",
+                     messages: Optional[int] = None) -> str:
+        """Write series and summaries to ``path`` and the HTML report"""
+        add_report_section(title, self.summary(messages))
+        return write_json_report(path, self.as_dict(messages))
@@ -0,0 +1,323 @@
+import random
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set, Tuple, FrozenSet, Iterable
+
+from src.allocator import IPAllocator, NodeAllocator, WorkerNamespace
+
+Edge = Tuple[int, int]
+
+MODES = ("static", "discv5")
+
+
+def _edge(a: int, b: int) -> Edge:
+    return (a, b) if a < b else (b, a)
+
+
+@dataclass(frozen=True)
+class Topology:
+    """Intended peer graph of a cluster, by node index.
+
+    ``membership[i]`` lists the logical networks node ``i`` is attached to,
+    its primary network first; every edge must join two nodes sharing a
+    network. Single-network topologies have one network, ``0``.
+    """
+    kind: str
+    size: int
+    edges: FrozenSet[Edge]
+    membership: Tuple[Tuple[int, ...], ...] = ()
+    network_count: int = 1
+
+    def __post_init__(self):
+        if not self.membership:
+            object.__setattr__(self, "membership", tuple((0,) for _ in range(self.size)))
+        for a, b in self.edges:
+            if not 0 <= a < b < self.size:
+                raise ValueError(f"Invalid edge {(a, b)} for {self.size} nodes")
+            if self.shared_network(a, b) is None:
+                raise ValueError(f"Nodes {a} and {b} share no network")
+
+    def neighbours(self, index: int) -> List[int]:
+        return sorted(b if a == index else a for a, b in self.edges if index in (a, b))
+
+    def shared_network(self, a: int, b: int) -> Optional[int]:
+        """First network of ``a`` that ``b`` is attached to as well"""
+        other = set(self.membership[b])
+        return next((net for net in self.membership[a] if net in other), None)
+
+    def degrees(self) -> List[int]:
+        degrees = [0] * self.size
+        for a, b in self.edges:
+            degrees[a] += 1
+            degrees[b] += 1
+        return degrees
+
+    def waves(self) -> List[List[int]]:
+        """Breadth-first start order: each node after at least one neighbour"""
+        adjacency = {i: self.neighbours(i) for i in range(self.size)}
+        level = {}
+        for root in range(self.size):
+            if root in level:
+                continue
+            level[root] = 0
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                for peer in adjacency[node]:
+                    if peer not in level:
+                        level[peer] = level[node] + 1
+                        queue.append(peer)
+        waves: List[List[int]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for node in range(self.size):
+            waves[level[node]].append(node)
+        return waves
+
+    def is_connected(self) -> bool:
+        return _connected(self.size, self.edges)
+
+
+def star(size: int) -> Topology:
+    return Topology("star", size, frozenset(_edge(0, i) for i in range(1, size)))
+
+
+def line(size: int) -> Topology:
+    return Topology("line", size, frozenset(_edge(i, i + 1) for i in range(size - 1)))
+
+
+def ring(size: int) -> Topology:
+    if size < 3:
+        return line(size)
+    return Topology("ring", size, frozenset(_edge(i, (i + 1) % size) for i in range(size)))
+
+
+def k_regular(size: int, k: int = 3, seed: Optional[int] = None,
+              attempts: int = 1000) -> Topology:
+    """Random connected graph where every node has exactly ``k`` peers"""
+    if not 0 < k < size or size * k % 2:
+        raise ValueError(f"No {k}-regular graph on {size} nodes")
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        # Configuration model: pair up k stubs per node, reject self loops
+        # and parallel edges
+        stubs = [node for node in range(size) for _ in range(k)]
+        rng.shuffle(stubs)
+        edges = set()
+        for a, b in zip(stubs[::2], stubs[1::2]):
+            if a == b or _edge(a, b) in edges:
+                break
+            edges.add(_edge(a, b))
+        else:
+            if _connected(size, edges):
+                return Topology("k_regular", size, frozenset(edges))
+    raise ValueError(f"No connected {k}-regular graph on {size} nodes "
+                     f"found in {attempts} attempts")
+
+
+def _connected(size: int, edges: Iterable[Edge]) -> bool:
+    if size == 0:
+        return True
+    adjacency: Dict[int, List[int]] = {i: [] for i in range(size)}
+    for a, b in edges:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    seen = {0}
+    queue = deque([0])
+    while queue:
+        for peer in adjacency[queue.popleft()]:
+            if peer not in seen:
+                seen.add(peer)
+                queue.append(peer)
+    return len(seen) == size
+
+
+def multi_cluster(clusters: int, size: int, inner: str = "full",
+                  link: str = "ring", kind: str = "multi_cluster") -> Topology:
+    """``clusters`` groups of ``size`` nodes, each group on its own network.
+
+    Inside a group nodes form a full mesh (``inner="full"``), a ring or a
+    star. The first node of each group is its gateway: it is also attached
+    to the next group's network and peers with that group's gateway, the
+    gateways forming a ``ring`` or a ``line``.
+    """
+    if clusters < 1 or size < 1:
+        raise ValueError("Need at least one cluster of one node")
+    edges: Set[Edge] = set()
+    membership = []
+    for c in range(clusters):
+        first = c * size
+        members = list(range(first, first + size))
+        if inner == "full":
+            edges.update(_edge(a, b) for i, a in enumerate(members) for b in members[i + 1:])
+        elif inner == "ring":
+            edges.update((first + a, first + b) for a, b in ring(size).edges)
+        elif inner == "star":
+            edges.update((first + a, first + b) for a, b in star(size).edges)
+        else:
+            raise ValueError(f"Unknown inner layout {inner!r}")
+        membership.extend((c,) for _ in members)
+
+    links = range(clusters if link == "ring" and clusters > 2 else clusters - 1)
+    for c in links:
+        gateway, next_gateway = c * size, ((c + 1) % clusters) * size
+        next_net = (c + 1) % clusters
+        membership[gateway] = membership[gateway] + (next_net,)
+        edges.add(_edge(gateway, next_gateway))
+    return Topology(kind, clusters * size, frozenset(edges), tuple(membership), clusters)
+
+
+def multi_bridge(bridges: int, size: int) -> Topology:
+    """Nodes spread over a chain of Docker bridges.
+
+    Each bridge holds a star around its hub; consecutive hubs peer through
+    the hub attached to both bridges.
+    """
+    return multi_cluster(bridges, size, inner="star", link="line", kind="multi_bridge")
+
+
+TOPOLOGY_BUILDERS = {
+    "star": star,
+    "line": line,
+    "ring": ring,
+    "k_regular": k_regular,
+}
+
+
+def build(kind: str, size: int, **kwargs) -> Topology:
+    """Single-network topology of ``kind`` over ``size`` nodes"""
+    if kind not in TOPOLOGY_BUILDERS:
+        raise ValueError(f"Unknown topology {kind!r}, expected one of "
+                         f"{tuple(TOPOLOGY_BUILDERS)}")
+    return TOPOLOGY_BUILDERS[kind](size, **kwargs)
+
+
+@dataclass
+class NetworkPlan:
+    name: str
+    subnet: str
+    gateway: str
+
+
+@dataclass
+class NodePlan:
+    """Where and how one node of a topology runs"""
+    index: int
+    name: str
+    ports: Dict[str, str]
+    addresses: Dict[str, str]
+    extip: str
+    bootstrap: List[int] = field(default_factory=list)
+
+
+@dataclass
+class TopologyPlan:
+    """Networks, addresses and start order computed for a ``Topology``"""
+    topology: Topology
+    networks: List[NetworkPlan]
+    nodes: List[NodePlan]
+
+    def dial_address(self, a: int, b: int) -> str:
+        """IP of node ``b`` on a network it shares with node ``a``"""
+        network = self.networks[self.topology.shared_network(a, b)].name
+        return self.nodes[b].addresses[network]
+
+
+def plan(topology: Topology, namespace: WorkerNamespace, allocator: NodeAllocator,
+         taken: Iterable[str] = ()) -> TopologyPlan:
+    """Allocate names, ports, subnets and IPs and the bootstrap lists.
+
+    Single-network topologies use the namespace's main network and IPs.
+    Multi-network topologies get one extra bridge per logical network from
+    ``WorkerNamespace.topology_network``. A node's bootstrap list holds its
+    neighbours from earlier start waves.
+    """
+    configs = allocator.allocate(topology.size, taken=taken)
+    if topology.network_count == 1:
+        networks = [NetworkPlan(namespace.network, namespace.subnet, namespace.gateway)]
+        ip_allocators = None
+    else:
+        specs = [namespace.topology_network(n) for n in range(topology.network_count)]
+        networks = [NetworkPlan(s["name"], s["subnet"], s["gateway"]) for s in specs]
+        ip_allocators = [IPAllocator(s["subnet"], s["first_ip"], s["gateway"]) for s in specs]
+    used = [0] * len(networks)
+
+    wave_of = {node: number for number, wave in enumerate(topology.waves()) for node in wave}
+    nodes = []
+    for index, config in enumerate(configs):
+        addresses = {}
+        for net in topology.membership[index]:
+            if ip_allocators is None:
+                addresses[networks[net].name] = config["extip"]
+            else:
+                addresses[networks[net].name] = ip_allocators[net].ip_for(used[net])
+                used[net] += 1
+        primary = networks[topology.membership[index][0]].name
+        nodes.append(NodePlan(
+            index=index,
+            name=config["name"],
+            ports=config["ports"],
+            addresses=addresses,
+            extip=addresses[primary],
+            bootstrap=[peer for peer in topology.neighbours(index)
+                       if wave_of[peer] < wave_of[index]]
+        ))
+    return TopologyPlan(topology, networks, nodes)
+
+
+@dataclass
+class PeerGraph:
+    """Peer graph actually observed through ``/admin/v1/peers``"""
+    names: List[str]
+    edges: Set[FrozenSet[str]]
+    # Peers of a node that are not part of the cluster
+    foreign: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def observe(cls, nodes) -> "PeerGraph":
+        """Query every node (``ClusterNode``s) for its connected peers"""
+        clients = {node.name: node.client() for node in nodes}
+        by_peer_id = {client.get_peer_id(): name for name, client in clients.items()}
+        edges: Set[FrozenSet[str]] = set()
+        foreign: Dict[str, int] = {}
+        for name, client in clients.items():
+            for peer_id in client.get_connected_peer_ids():
+                peer = by_peer_id.get(peer_id)
+                if peer is None:
+                    foreign[name] = foreign.get(name, 0) + 1
+                elif peer != name:
+                    edges.add(frozenset((name, peer)))
+        return cls(list(clients), edges, foreign)
+
+    def degrees(self) -> Dict[str, int]:
+        degrees = {name: 0 for name in self.names}
+        for edge in self.edges:
+            for name in edge:
+                degrees[name] += 1
+        return degrees
+
+    def compare(self, expected: Set[FrozenSet[str]]) -> Dict[str, Any]:
+        """Expected edges not observed, and observed edges not expected"""
+        return {
+            "missing": sorted(tuple(sorted(e)) for e in expected - self.edges),
+            "unexpected": sorted(tuple(sorted(e)) for e in self.edges - expected),
+        }
+
+
+def expected_edges(topology: Topology, names: List[str]) -> Set[FrozenSet[str]]:
+    return {frozenset((names[a], names[b])) for a, b in topology.edges}
+
+
+def verify(topology: Topology, nodes, exact: bool = True) -> Dict[str, Any]:
+    """Compare the observed peer graph of ``nodes`` (in index order) with ``topology``.
+
+    With ``exact`` every unexpected edge counts as a mismatch too; use
+    ``exact=False`` for discv5 deployments, where discovery adds peers.
+    """
+    graph = PeerGraph.observe(nodes)
+    result = graph.compare(expected_edges(topology, [node.name for node in nodes]))
+    result["ok"] = not result["missing"] and (not exact or not result["unexpected"])
+    result["degrees"] = graph.degrees()
+    if not result["ok"]:
+        logging.warning(f"{topology.kind} topology mismatch: "
+                        f"missing {result['missing']}, unexpected {result['unexpected']}")
+    return result
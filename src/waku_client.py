@@ -1,15 +1,46 @@
+import re
 import requests
 import time
 import logging
-from typing import Dict, Any, Optional, List
-import base64
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Union
+from concurrent.futures import ThreadPoolExecutor
+import binascii
 import json
 
+from src.metrics import InstrumentedSession, RequestMetrics
+from src.readiness import Backoff
+from utils.helpers import decode_payload_bytes
+
+Payload = Union[str, bytes, bytearray, memoryview]
+
+# nwaku's default --max-msg-size, in bytes
+DEFAULT_MAX_MSG_SIZE = 150 * 1024
+# Largest page a store node returns
+MAX_STORE_PAGE_SIZE = 100
+
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1000, "KIB": 1024, "MB": 1000 ** 2, "MIB": 1024 ** 2}
+
+
+def parse_size(value: str) -> int:
+    """Byte count of an nwaku size argument such as ``150KiB`` or ``1MiB``"""
+    match = re.fullmatch(r"\s*(\d+)\s*([A-Za-z]*)\s*", value)
+    if not match or match.group(2).upper() not in _SIZE_UNITS:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]
+
 class WakuClient:
-    def __init__(self, base_url: str, timeout: int = 30):
+    def __init__(self, base_url: str, timeout: int = 30,
+                 metrics: Optional[RequestMetrics] = None, node: Optional[str] = None):
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
-        self.session = requests.Session()
+        self.node = node
+        # Records per-endpoint counts, bytes and latency into ``metrics``
+        # (the shared REQUEST_METRICS registry by default) under ``node``
+        self.session = InstrumentedSession(metrics, node)
+    
+    def _event(self, event: str, **fields) -> Dict[str, Any]:
+        """``extra`` of a structured log record about this node"""
+        return {"event": event, "node": self.node or self.base_url, **fields}
         
     def get_debug_info(self) -> Dict[str, Any]:
         """Get node debug information"""
@@ -42,39 +73,91 @@ class WakuClient:
                 timeout=self.timeout
             )
             response.raise_for_status()
-            logging.info(f"Subscribed to topics: {topics}")
+            logging.info("Subscribed to topics: %s", topics,
+                         extra=self._event("subscribe", topics=topics))
             return True
         except requests.RequestException as e:
             logging.error(f"Failed to subscribe to topics: {e}")
             return False
     
-    def publish_message(self, content_topic: str, payload: str, 
+    def unsubscribe_from_topic(self, topics: List[str]) -> bool:
+        """Unsubscribe from relay topics"""
+        try:
+            response = self.session.delete(
+                f"{self.base_url}/relay/v1/auto/subscriptions",
+                headers={
+                    "accept": "text/plain",
+                    "content-type": "application/json"
+                },
+                json=topics,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            logging.info("Unsubscribed from topics: %s", topics,
+                         extra=self._event("unsubscribe", topics=topics))
+            return True
+        except requests.RequestException as e:
+            logging.error(f"Failed to unsubscribe from topics: {e}")
+            return False
+    
+    def publish_message(self, content_topic: str, payload: Payload,
                        timestamp: Optional[int] = None) -> bool:
-        """Publish a message to a topic"""
+        """Publish a message to a topic; ``payload`` is text or raw bytes"""
+        if self.publish_encoded(self.encode_message(content_topic, payload, timestamp)):
+            logging.debug("Published message to %s", content_topic,
+                          extra=self._event("publish", topic=content_topic))
+            return True
+        return False
+    
+    @staticmethod
+    def encode_message(content_topic: str, payload: Payload,
+                       timestamp: Optional[int] = None) -> bytes:
+        """Build the JSON request body of a relay publish.
+
+        Bytes-like payloads are base64-encoded straight from their buffer
+        and spliced into the body, with no intermediate ``str`` or JSON
+        re-serialisation of the payload.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode()
+        parts = [
+            b'{"payload":"',
+            binascii.b2a_base64(payload, newline=False),
+            b'","contentTopic":',
+            json.dumps(content_topic).encode()
+        ]
+        
+        if timestamp:
+            parts.extend((b',"timestamp":', str(int(timestamp)).encode()))
+        
+        parts.append(b"}")
+        return b"".join(parts)
+    
+    def publish_encoded(self, body: bytes) -> bool:
+        """Publish a pre-encoded message body (see ``encode_message``)"""
         try:
-            encoded_payload = base64.b64encode(payload.encode()).decode()
-            
-            message_data = {
-                "payload": encoded_payload,
-                "contentTopic": content_topic
-            }
-            
-            if timestamp:
-                message_data["timestamp"] = timestamp
-            
             response = self.session.post(
                 f"{self.base_url}/relay/v1/auto/messages",
                 headers={"content-type": "application/json"},
-                json=message_data,
+                data=body,
                 timeout=self.timeout
             )
             response.raise_for_status()
-            logging.info(f"Published message to {content_topic}")
             return True
         except requests.RequestException as e:
-            logging.error(f"Failed to publish message: {e}")
+            logging.error("Failed to publish message: %s", e,
+                          extra=self._event("publish_failed"))
             return False
     
+    def publish_many(self, content_topic: str, payloads: Iterable[Payload]) -> int:
+        """Publish several messages back to back, returning how many succeeded"""
+        bodies = [self.encode_message(content_topic, payload) for payload in payloads]
+        published = sum(1 for body in bodies if self.publish_encoded(body))
+        logging.info("Published %d/%d messages to %s", published, len(bodies), content_topic,
+                     extra=self._event("publish_many", topic=content_topic,
+                                       published=published))
+        return published
+    
     def get_messages(self, content_topic: str) -> List[Dict[str, Any]]:
         """Get messages from a topic"""
         try:
@@ -88,9 +171,92 @@ class WakuClient:
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
-            logging.error(f"Failed to get messages: {e}")
+            logging.error("Failed to get messages: %s", e,
+                          extra=self._event("get_messages_failed", topic=content_topic))
             return []
     
+    def get_payloads(self, content_topic: str) -> List[bytes]:
+        """Get the raw payloads of a topic's messages"""
+        return [decode_payload_bytes(msg["payload"])
+                for msg in self.get_messages(content_topic) if "payload" in msg]
+    
+    def query_store(self, content_topics: List[str], pubsub_topic: Optional[str] = None,
+                    start_time: Optional[int] = None, end_time: Optional[int] = None,
+                    page_size: int = 20, ascending: bool = True,
+                    cursor: Optional[Dict[str, Any]] = None,
+                    peer_addr: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch one page of store history.
+
+        Times are nanoseconds since the epoch. Pass the ``cursor`` of the
+        previous page to get the next one; the last page has none. Without
+        ``peer_addr`` the node answers from its own archive.
+        """
+        params: Dict[str, Any] = {
+            "contentTopics": ",".join(content_topics),
+            "pageSize": min(page_size, MAX_STORE_PAGE_SIZE),
+            "ascending": str(ascending).lower()
+        }
+        if pubsub_topic:
+            params["pubsubTopic"] = pubsub_topic
+        if start_time is not None:
+            params["startTime"] = start_time
+        if end_time is not None:
+            params["endTime"] = end_time
+        if peer_addr:
+            params["peerAddr"] = peer_addr
+        if cursor:
+            params.update(cursor)
+        try:
+            response = self.session.get(
+                f"{self.base_url}/store/v1/messages",
+                params=params,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            page = response.json()
+        except requests.RequestException as e:
+            logging.error(f"Failed to query store: {e}")
+            raise
+        if page.get("error_message"):
+            raise requests.HTTPError(f"Store query failed: {page['error_message']}",
+                                     response=response)
+        return page
+    
+    def iter_store_pages(self, content_topics: List[str], page_size: int = 20,
+                         prefetch: bool = False, **query) -> Iterator[List[Dict[str, Any]]]:
+        """Lazily page through a store query, following its cursor.
+
+        Only the current page is held in memory. With ``prefetch`` the next
+        page is requested in the background as soon as the current one
+        arrives, overlapping the round trip with the caller's processing.
+        ``query`` takes the filters of ``query_store``.
+        """
+        def fetch(cursor):
+            return self.query_store(content_topics, page_size=page_size, cursor=cursor, **query)
+        
+        pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        pending = None
+        try:
+            page = fetch(None)
+            while True:
+                cursor = page.get("cursor")
+                if cursor and pool is not None:
+                    pending = pool.submit(fetch, cursor)
+                if page.get("messages"):
+                    yield page["messages"]
+                if not cursor:
+                    return
+                page = pending.result() if pending is not None else fetch(cursor)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+    
+    def iter_store_messages(self, content_topics: List[str], page_size: int = 20,
+                            prefetch: bool = False, **query) -> Iterator[Dict[str, Any]]:
+        """Lazily yield every message of a store query, page by page"""
+        for page in self.iter_store_pages(content_topics, page_size, prefetch, **query):
+            yield from page
+    
     def get_peers(self) -> List[Dict[str, Any]]:
         """Get connected peers"""
         try:
@@ -104,16 +270,54 @@ class WakuClient:
             logging.error(f"Failed to get peers: {e}")
             return []
     
+    def add_peers(self, multiaddrs: List[str]) -> bool:
+        """Dial peers by multiaddr"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/admin/v1/peers",
+                headers={
+                    "accept": "text/plain",
+                    "content-type": "application/json"
+                },
+                json=multiaddrs,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            logging.info(f"Dialled peers: {multiaddrs}")
+            return True
+        except requests.RequestException as e:
+            logging.error(f"Failed to add peers: {e}")
+            return False
+    
+    def get_connected_peer_ids(self) -> List[str]:
+        """Peer IDs of peers with at least one connected protocol"""
+        return [
+            peer["multiaddr"].rsplit("/p2p/", 1)[-1]
+            for peer in self.get_peers()
+            if any(protocol.get("connected") for protocol in peer.get("protocols", []))
+        ]
+    
+    def get_peer_id(self) -> str:
+        """This node's peer ID, from its listen addresses"""
+        addresses = self.get_debug_info().get("listenAddresses", [])
+        return addresses[0].rsplit("/p2p/", 1)[-1] if addresses else ""
+    
     def wait_for_peer_connection(self, expected_peer_count: int = 1, 
                                 max_wait: int = 60) -> bool:
-        """Wait for peer connections to be established"""
-        start_time = time.time()
-        while time.time() - start_time < max_wait:
+        """Wait for peer connections to be established, polling with backoff.
+
+        ``DockerManager.wait_for_peers`` also wakes on the node's peer log events.
+        """
+        deadline = time.monotonic() + max_wait
+        for delay in Backoff().delays():
             peers = self.get_peers()
             if len(peers) >= expected_peer_count:
                 logging.info(f"Found {len(peers)} peer(s)")
                 return True
-            time.sleep(2)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
         
         logging.warning(f"Timeout waiting for peer connections")
         return False
\ No newline at end of file
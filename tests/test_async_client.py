@@ -0,0 +1,145 @@
+import time
+import base64
+import asyncio
+import threading
+import pytest
+from src.async_waku_client import AsyncClientPool, AsyncWakuClient
+from src.load_generator import LoadGenerator
+from src.waku_client import WakuClient
+
+
+@pytest.fixture
+def slow_peers(fake_node, monkeypatch):
+    """Make ``/admin/v1/peers`` take 50 ms and record the peak number served at once"""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def peer_list():
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        return []
+
+    monkeypatch.setattr(fake_node, "peer_list", peer_list)
+    return state
+
+
+@pytest.mark.basic
+class TestAsyncClient:
+    """Test Suite 15: Async REST client and pool against a fake node"""
+
+    def test_in_flight_cap(self, fake_node, slow_peers):
+        """No more than ``max_in_flight_per_node`` requests reach a node at once"""
+        async def run():
+            async with AsyncClientPool(limit_per_node=50, max_in_flight_per_node=4) as pool:
+                client = pool.client(f"http://127.0.0.1:{fake_node.rest_port}")
+                return await asyncio.gather(*(client.get_peers() for _ in range(20)))
+
+        results = asyncio.run(run())
+        assert results == [[]] * 20
+        assert slow_peers["peak"] == 4
+
+    def test_timeout_releases_slot(self, fake_node):
+        """Timed-out and cancelled requests give back their slot, so later ones still run"""
+        async def run():
+            async with AsyncClientPool(max_in_flight_per_node=2) as pool:
+                client = pool.client(f"http://127.0.0.1:{fake_node.rest_port}", timeout=0.2)
+                fake_node.pause()
+                started = time.monotonic()
+                timed_out = await asyncio.gather(*(client.get_peers() for _ in range(4)))
+                elapsed = time.monotonic() - started
+
+                task = asyncio.create_task(client.get_debug_info())
+                await asyncio.sleep(0.05)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                fake_node.unpause()
+                return timed_out, elapsed, await client.get_enr_uri()
+
+        timed_out, elapsed, enr = asyncio.run(run())
+        assert timed_out == [[]] * 4
+        # Two rounds of two requests, each cut off after 0.2 s
+        assert elapsed < 2
+        assert enr == fake_node.enr
+
+    def test_session_reuse(self, fake_node, monkeypatch):
+        """Clients of one pool share its session and keep connections alive"""
+        connections = []
+        process_request = fake_node._server.process_request
+        def counting(request, address):
+            connections.append(address)
+            process_request(request, address)
+        monkeypatch.setattr(fake_node._server, "process_request", counting)
+
+        async def run():
+            async with AsyncClientPool() as pool:
+                url = f"http://127.0.0.1:{fake_node.rest_port}"
+                first, second = pool.client(url), pool.client(url)
+                assert first.session is second.session is pool.session
+                for client in (first, second) * 10:
+                    assert await client.get_peers() == []
+                return pool.session
+
+        session = asyncio.run(run())
+        assert session.closed
+        assert len(connections) == 1
+
+    def test_async_load_generator(self, fake_node):
+        """The async transport publishes every message and counts rejected ones as failed"""
+        client = WakuClient(f"http://127.0.0.1:{fake_node.rest_port}", timeout=5)
+        topic = "/async/1/load/proto"
+        client.subscribe_to_topic([topic])
+
+        report = LoadGenerator([client], [topic], concurrency=32, transport="async").run(count=200)
+        assert (report.succeeded, report.failed) == (200, 0)
+        assert len(client.get_messages(topic)) == fake_node.cache_capacity
+
+        oversized = LoadGenerator([client], [topic], concurrency=8, transport="async",
+                                  payload_size=fake_node.max_msg_size + 1)
+        assert oversized.run(count=10).failed == 10
+
+        with pytest.raises(ValueError):
+            LoadGenerator([client], [topic], transport="trio")
+
+    def test_cap_shared_per_node(self, fake_node, slow_peers):
+        """Clients of one pool pointing at the same node share its in-flight cap"""
+        async def run():
+            async with AsyncClientPool(max_in_flight_per_node=4) as pool:
+                url = f"http://127.0.0.1:{fake_node.rest_port}"
+                clients = [pool.client(url), pool.client(url + "/")]
+                return await asyncio.gather(*(client.get_peers()
+                                              for client in clients for _ in range(10)))
+
+        assert asyncio.run(run()) == [[]] * 20
+        assert slow_peers["peak"] == 4
+
+    def test_reuse_across_event_loops(self, fake_node, slow_peers):
+        """A client keeps working under a later ``asyncio.run``"""
+        client = AsyncWakuClient(f"http://127.0.0.1:{fake_node.rest_port}", max_in_flight=2)
+
+        async def run():
+            async with client:
+                return await asyncio.gather(*(client.get_peers() for _ in range(4)))
+
+        for _ in range(2):
+            assert asyncio.run(run()) == [[]] * 4
+        assert slow_peers["peak"] == 2
+
+    def test_publish_bytes(self, fake_node):
+        """``publish_message`` takes raw bytes as well as text, like ``WakuClient``"""
+        topic = "/async/1/bytes/proto"
+        client = WakuClient(f"http://127.0.0.1:{fake_node.rest_port}")
+        client.subscribe_to_topic([topic])
+
+        async def run():
+            async with AsyncWakuClient(f"http://127.0.0.1:{fake_node.rest_port}") as async_client:
+                return [await async_client.publish_message(topic, payload)
+                        for payload in (b"\x00\xffraw", memoryview(b"view"), "text")]
+
+        assert asyncio.run(run()) == [True] * 3
+        payloads = [base64.b64decode(message["payload"]) for message in client.get_messages(topic)]
+        assert payloads == [b"\x00\xffraw", b"view", b"text"]
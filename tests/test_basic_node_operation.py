@@ -1,7 +1,7 @@
 import pytest
-import time
 import logging
 from src.waku_client import WakuClient
+from src.metrics import RequestMetrics
 
 @pytest.mark.basic
 class TestBasicNodeOperation:
@@ -19,8 +19,10 @@ class TestBasicNodeOperation:
         assert container_id is not None
         assert node1_config["name"] in docker_manager.containers
         
-        # Wait for node to be ready
-        time.sleep(15)
+        # start_waku_node only returns once the node serves its ENR
+        assert docker_manager.enrs[node1_config["name"]] != ""
+        timings = docker_manager.startup_timings[node1_config["name"]]
+        logging.info(f"Node startup timings: {timings.as_dict()}")
     
     def test_verify_node_debug_info(self, docker_manager, node1_config):
         """Test node debug information accessibility"""
@@ -31,7 +33,6 @@ class TestBasicNodeOperation:
                 node1_config["ports"],
                 node1_config["extip"] 
             )
-            time.sleep(15)
         
         # Create client and get debug info
         client = WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}")
@@ -62,12 +63,12 @@ class TestBasicNodeOperation:
         assert success, "Failed to publish message"
     
     def test_confirm_message_publication(self, docker_manager, node1_config, 
-                                       test_topic, test_message):
+                                       test_topic, test_message, settle):
         """Test confirming message was published"""
         client = WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}")
         
         # Wait a bit for message to be processed
-        time.sleep(3)
+        settle(3)
         
         # Get messages
         messages = client.get_messages(test_topic)
@@ -84,4 +85,13 @@ class TestBasicNodeOperation:
                     found_message = True
                     break
         
-        assert found_message, f"Published message '{test_message}' not found in retrieved messages"
\ No newline at end of file
+        assert found_message, f"Published message '{test_message}' not found in retrieved messages"
+    
+    def test_request_metrics(self, docker_manager, node1_config):
+        """Test that requests to the node are recorded per endpoint"""
+        metrics = RequestMetrics()
+        client = WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}",
+                            metrics=metrics, node="node1")
+        
+        client.get_debug_info()
+        assert metrics.stats("node1", "GET", "/debug/v1/info").requests == 1
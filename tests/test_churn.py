@@ -0,0 +1,77 @@
+import pytest
+from src.churn import ChurnRunner, ChurnStep, every
+from src.log_events import NODE_STARTED
+from utils.helpers import wait_for_condition
+
+class TestChurn:
+    """Test Suite 11: Node churn and recovery time"""
+    
+    @pytest.mark.basic
+    def test_schedule(self):
+        """Schedules expand to evenly spaced steps; unknown actions are rejected"""
+        steps = every(5, 3, "kill", targets=0.5, down_s=2, start_s=1)
+        assert [step.at_s for step in steps] == [1, 6, 11]
+        assert all(step.fraction == 0.5 and step.down_s == 2 for step in steps)
+        assert every(1, 2, targets=["node-a"])[1].targets == ("node-a",)
+        
+        with pytest.raises(ValueError):
+            ChurnStep(0, "reboot", ["node-a"])
+        with pytest.raises(ValueError):
+            ChurnStep(0, "restart")
+    
+    @pytest.mark.advanced
+    def test_stop_start_node(self, docker_manager, test_topic):
+        """A stopped node comes back with the same identity and relays again"""
+        nodes = docker_manager.start_cluster(2)
+        first, second = nodes
+        
+        try:
+            client, peer = first.client(), second.client()
+            enr = client.get_enr_uri()
+            cursor = docker_manager.events.cursor()
+            docker_manager.stop_node(first.name, timeout=1)
+            assert docker_manager.start_node(first.name) == enr
+            
+            # Only the new run's setup is seen, not a replay of the first run
+            started = docker_manager.wait_for_event(NODE_STARTED, first.name, timeout=10,
+                                                    after=cursor)
+            assert started is not None, "Restarted node never logged its setup"
+            assert [event.seq for event in docker_manager.events.events(NODE_STARTED, first.name)
+                    if event.seq > cursor] == [started.seq]
+            
+            docker_manager.pause_node(second.name)
+            docker_manager.unpause_node(second.name)
+            
+            client.subscribe_to_topic([test_topic])
+            peer.subscribe_to_topic([test_topic])
+            assert docker_manager.wait_for_peers(second.name, timeout=10), \
+                "Peer did not reconnect after restart"
+            assert peer.publish_message(test_topic, "after restart")
+            assert wait_for_condition(lambda: client.get_messages(test_topic),
+                                      timeout=10, interval=0.1), "Nothing relayed after restart"
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+    
+    @pytest.mark.advanced
+    def test_churn_recovery(self, docker_manager, test_topic, report_path):
+        """Restarted, killed and paused nodes reconnect and receive traffic again"""
+        nodes = docker_manager.start_cluster(3)
+        names = [node.name for node in nodes]
+        
+        try:
+            runner = ChurnRunner(docker_manager, nodes, test_topic, rate=20, seed=1,
+                                 recovery_timeout=15, poll_interval=0.05)
+            report = runner.run([
+                ChurnStep(0.5, "restart", [names[1]], down_s=0.2),
+                ChurnStep(1.0, "kill", fraction=0.3, down_s=0.2),
+                ChurnStep(1.5, "pause", [names[2]], down_s=0.5),
+            ])
+        finally:
+            docker_manager.remove_nodes(names)
+        
+        runner.write_report(report_path("churn.json"))
+        assert len(report.events) == 3
+        assert not report.unrecovered, f"Nodes did not recover: {report.unrecovered}"
+        assert all(event.restore_s is not None for event in report.events)
+        assert {row["action"] for row in report.summary()} == {"restart", "kill", "pause"}
+        assert report.published > 0
@@ -0,0 +1,253 @@
+import pytest
+import logging
+import ipaddress
+import requests
+from src.allocator import WorkerNamespace
+from src.docker_manager import DockerManager
+from src.node_pool import PoolExhausted
+from src.telemetry import TelemetryRecorder
+from src.convergence import ConvergenceChecker, all_of, connected, min_degree, max_diameter
+from src import topology
+from src.waku_client import WakuClient
+from utils.helpers import wait_for_condition
+
+@pytest.mark.advanced
+class TestClusterOperation:
+    """Test Suite 3: Multi-node cluster bring-up and teardown"""
+    
+    CLUSTER_SIZE = 4
+    
+    def test_start_and_remove_cluster(self, docker_manager, worker_namespace):
+        """Start a cluster in parallel, check it meshes, then tear it down"""
+        nodes = docker_manager.start_cluster(self.CLUSTER_SIZE)
+        names = [node.name for node in nodes]
+        
+        try:
+            assert len(nodes) == self.CLUSTER_SIZE
+            assert len(set(node.enr for node in nodes)) == self.CLUSTER_SIZE
+            assert len(set(node.ports["rest"] for node in nodes)) == self.CLUSTER_SIZE
+            assert len(set(node.extip for node in nodes)) == self.CLUSTER_SIZE
+            
+            for node in nodes:
+                logging.info(f"{node.name}: ready in {node.timings.total:.2f}s")
+            
+            # A star: everyone reaches everyone through the bootstrap node
+            result = ConvergenceChecker.for_nodes(nodes).wait(
+                all_of(connected(), min_degree(1), max_diameter(2)), timeout=60)
+            assert result.converged, f"Cluster did not mesh: degrees {result.degrees}"
+        finally:
+            docker_manager.remove_nodes(names)
+        
+        remaining = {c.name for c in docker_manager.backend.list_containers(worker_namespace.labels)}
+        assert not remaining & set(names), f"Containers left behind: {remaining & set(names)}"
+
+
+@pytest.mark.advanced
+class TestNodeReuse:
+    """Test Suite 4: Adopting running nodes and the warm node pool"""
+    
+    def test_adopt_matching_running_node(self, docker_manager, worker_namespace, test_topic):
+        """A reuse-mode manager adopts a matching node and resets its relay state"""
+        config = worker_namespace.allocator().node_config(40)
+        name = config["name"]
+        container_id = docker_manager.start_waku_node(name, config["ports"], config["extip"])
+        client = WakuClient(f"http://{docker_manager.rest_host}:{config['ports']['rest']}")
+        
+        try:
+            assert client.subscribe_to_topic([test_topic])
+            assert client.publish_message(test_topic, "left over")
+            
+            reusing = DockerManager(backend=docker_manager.backend, namespace=worker_namespace,
+                                    reuse=True, reset_topics=[test_topic])
+            assert reusing.start_waku_node(name, config["ports"], config["extip"]) == container_id
+            assert reusing.enrs[name] == docker_manager.enrs[name]
+            
+            # Cache drained and unsubscribed: nothing is relayed to the node now
+            assert client.get_messages(test_topic) == []
+            
+            # A different configuration is never adopted
+            changed = dict(config["ports"], tcp=str(int(config["ports"]["tcp"]) + 5))
+            assert reusing.start_waku_node(name, changed, config["extip"]) != container_id
+            docker_manager.containers[name] = reusing.containers[name]
+            
+            reusing.cleanup()
+            assert docker_manager.backend.get_container(name).status == "running"
+        finally:
+            docker_manager.remove_nodes([name])
+    
+    def test_failed_adoption_is_rolled_back(self, docker_manager, worker_namespace, monkeypatch):
+        """A node that cannot be reset is reported, left running and not tracked"""
+        config = worker_namespace.allocator().node_config(41)
+        name = config["name"]
+        container_id = docker_manager.start_waku_node(name, config["ports"], config["extip"])
+        
+        try:
+            reusing = DockerManager(backend=docker_manager.backend, namespace=worker_namespace,
+                                    reuse=True, reset_topics=["/reuse/1/reset/proto"])
+            def refuse(node_name, ports, topics=None):
+                raise requests.ConnectionError("reset refused")
+            monkeypatch.setattr(reusing, "reset_relay_state", refuse)
+            
+            with pytest.raises(requests.ConnectionError):
+                reusing.start_waku_node(name, config["ports"], config["extip"])
+            for tracked in (reusing.containers, reusing.enrs, reusing.node_ports,
+                            reusing.startup_timings):
+                assert name not in tracked
+            
+            # No conflicting container was created in its place
+            container = docker_manager.backend.get_container(name)
+            assert container.id == container_id and container.status == "running"
+        finally:
+            docker_manager.remove_nodes([name])
+    
+    def test_node_pool_hands_out_clean_nodes(self, node_pool, test_topic):
+        """Pooled nodes are handed out ready and come back with an empty cache"""
+        idle = node_pool.idle
+        assert idle >= 2
+        with node_pool.node() as node:
+            assert node_pool.idle == idle - 1
+            client = node.client()
+            assert client.subscribe_to_topic([test_topic])
+            assert client.publish_message(test_topic, "pooled")
+        assert node_pool.idle == idle
+        assert node.client().get_messages(test_topic) == []
+        
+        borrowed = [node_pool.acquire() for _ in range(idle)]
+        try:
+            assert len({node.name for node in borrowed}) == idle
+            with pytest.raises(PoolExhausted):
+                node_pool.acquire(timeout=0.1)
+        finally:
+            for node in borrowed:
+                node_pool.release(node)
+
+
+@pytest.mark.advanced
+class TestTelemetry:
+    """Test Suite 5: Container resource telemetry"""
+    
+    def test_record_node_resources(self, docker_manager, worker_namespace, test_topic):
+        """Stats and Prometheus metrics are recorded as fixed-interval series"""
+        manager = DockerManager(backend=docker_manager.backend, namespace=worker_namespace,
+                                metrics_server=True)
+        config = worker_namespace.allocator().node_config(45)
+        manager.start_waku_node(config["name"], config["ports"], config["extip"])
+        client = WakuClient(f"http://127.0.0.1:{config['ports']['rest']}")
+        
+        try:
+            assert client.subscribe_to_topic([test_topic])
+            with TelemetryRecorder(manager, interval=0.1) as telemetry:
+                client.publish_many(test_topic, [f"telemetry {i}" for i in range(20)])
+                
+                def recorded():
+                    series = telemetry.nodes.get(config["name"])
+                    return series is not None and len(series.values("memory_bytes")) >= 5
+                wait_for_condition(recorded, timeout=10, interval=0.1)
+            
+            series = telemetry.nodes[config["name"]]
+            assert series.series["memory_bytes"].typecode == "d"
+            assert len(series.values("memory_bytes")) >= 5
+            assert series.values("waku_node_messages_total"), "Prometheus metrics not scraped"
+            
+            summary, = telemetry.summary(messages=20)
+            assert summary["node"] == config["name"]
+            assert summary["peak_rss_bytes"] > 0
+            assert summary["samples"] >= 5
+            assert "bytes_per_msg" in summary
+        finally:
+            manager.remove_nodes([config["name"]])
+    
+    def test_one_stats_stream_per_container(self, docker_manager, worker_namespace):
+        """Each container gets one stats stream, reused every tick and closed once it is gone"""
+        config = worker_namespace.allocator().node_config(46)
+        name = config["name"]
+        docker_manager.start_waku_node(name, config["ports"], config["extip"])
+        telemetry = TelemetryRecorder(docker_manager, prometheus_metrics=())
+        
+        try:
+            assert "memory_bytes" in telemetry.snapshot()[name]
+            stream = telemetry._streams[name]
+            telemetry.sample(0)
+            telemetry.sample(1)
+            assert telemetry._streams[name] is stream
+            assert len(telemetry.nodes[name].values("memory_bytes")) == 2
+            
+            docker_manager.remove_nodes([name])
+            assert name not in telemetry.snapshot()
+            assert name not in telemetry._streams and not stream.alive
+        finally:
+            telemetry.stop()
+            if name in docker_manager.containers:
+                docker_manager.remove_nodes([name])
+
+
+@pytest.mark.advanced
+class TestTopology:
+    """Test Suite 7: Non-star topologies and peer graph verification"""
+    
+    @pytest.mark.parametrize("shape", [
+        topology.ring(5),
+        topology.line(4),
+        topology.k_regular(6, 3, seed=7),
+    ], ids=lambda shape: shape.kind)
+    def test_single_network_topology(self, docker_manager, shape):
+        """Static topologies produce exactly the intended peer graph"""
+        nodes = docker_manager.start_cluster(shape.size, topology=shape)
+        
+        try:
+            result = topology.verify(shape, nodes)
+            assert result["ok"], f"Peer graph mismatch: {result}"
+            assert sorted(result["degrees"].values()) == sorted(shape.degrees())
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+    
+    def test_multi_cluster_topology(self, docker_manager, worker_namespace):
+        """Clusters get their own bridges, joined through dual-homed gateways"""
+        shape = topology.multi_cluster(3, 3)
+        nodes = docker_manager.start_topology(shape)
+        
+        try:
+            assert topology.verify(shape, nodes)["ok"]
+            
+            bridges = [worker_namespace.topology_network(n)["name"] for n in range(3)]
+            assert all(name in docker_manager.networks for name in bridges)
+            
+            # The first gateway sits on its own cluster's bridge and the next one
+            container = docker_manager.containers[nodes[0].name]
+            container.reload()
+            networks = container.attrs["NetworkSettings"]["Networks"]
+            attached = [name for name in bridges if name in networks]
+            assert attached == bridges[:2]
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+    
+    def test_worker_subnets_are_disjoint(self, monkeypatch):
+        """No worker's main subnet overlaps any worker's topology bridges"""
+        # Smaller port ranges, so subnets rather than ports run out first
+        monkeypatch.setattr(WorkerNamespace, "PORTS_PER_WORKER", 200)
+        namespaces = [WorkerNamespace()]
+        while True:
+            try:
+                namespaces.append(WorkerNamespace(f"gw{len(namespaces) - 1}"))
+            except ValueError:
+                break
+        
+        main = [ipaddress.ip_network(ns.subnet) for ns in namespaces]
+        bridges = [ipaddress.ip_network(ns.topology_network(n)["subnet"])
+                   for ns in namespaces for n in range(ns.TOPOLOGY_NETWORKS)]
+        assert len(set(main)) == len(main) and len(set(bridges)) == len(bridges)
+        assert not [(a, b) for a in main for b in bridges if a.overlaps(b)]
+        
+        with pytest.raises(ValueError):
+            WorkerNamespace(f"gw{WorkerNamespace.TOPOLOGY_OCTET - 1}")
+    
+    def test_discv5_topology_covers_intended_edges(self, docker_manager):
+        """Bootstrapping from neighbours yields at least the intended edges"""
+        shape = topology.multi_bridge(2, 3)
+        nodes = docker_manager.start_topology(shape, mode="discv5")
+        
+        try:
+            result = topology.verify(shape, nodes, exact=False)
+            assert result["ok"], f"Missing edges: {result['missing']}"
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
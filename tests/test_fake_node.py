@@ -0,0 +1,73 @@
+import json
+import time
+import threading
+import pytest
+from src.fake_node import FakeContainer
+from src.waku_client import WakuClient
+from utils.helpers import wait_for_condition
+
+TOPIC = "/fake/1/stats/proto"
+
+
+@pytest.mark.basic
+class TestFakeNode:
+    """Test Suite 17: Fake node resource counters, container stats and logs"""
+
+    def test_counters_under_concurrency(self, fake_node):
+        """Concurrent publishes and requests lose no byte or busy-time updates"""
+        payload = "x" * 100
+        def publish():
+            for _ in range(500):
+                fake_node.publish({"payload": payload, "contentTopic": TOPIC})
+
+        threads = [threading.Thread(target=publish) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert fake_node.tx_bytes == 8 * 500 * len(payload)
+
+        client = WakuClient(f"http://127.0.0.1:{fake_node.rest_port}")
+        busy = fake_node.busy_ns
+        client.get_peers()
+        # Handler time is added once the response is out
+        assert wait_for_condition(lambda: fake_node.busy_ns > busy, timeout=2, interval=0.01)
+
+    def test_stats_stream(self, fake_node, monkeypatch):
+        """stats(stream=True) yields a snapshot per interval and ends when the node stops"""
+        container = FakeContainer(fake_node)
+        monkeypatch.setattr(container, "stats_interval", 0.01)
+
+        snapshot = container.stats(stream=False)
+        assert snapshot["networks"]["eth0"]["tx_bytes"] == 0
+
+        raw = container.stats(stream=True)
+        assert json.loads(next(raw))["cpu_stats"]["online_cpus"] == 1
+
+        decoded = container.stats(stream=True, decode=True)
+        first = next(decoded)
+        fake_node.publish({"payload": "abcd", "contentTopic": TOPIC})
+        second = next(decoded)
+        assert second["networks"]["eth0"]["tx_bytes"] - first["networks"]["eth0"]["tx_bytes"] == 4
+
+        # Stopping ends a stream waiting for its next frame right away
+        monkeypatch.setattr(container, "stats_interval", 30)
+        waiting = container.stats(stream=True, decode=True)
+        next(waiting)
+        fake_node.stop()
+        started = time.monotonic()
+        assert list(waiting) == []
+        assert time.monotonic() - started < 1
+        assert list(decoded) == []
+
+    def test_logs_since(self, fake_node):
+        """logs(since=...) skips lines from before the timestamp, like the daemon"""
+        fake_node.log("INF", "first run")
+        time.sleep(0.01)
+        since = time.time()
+        fake_node.log("INF", "second run")
+
+        assert b"first run" in fake_node.logs()
+        recent = fake_node.logs(since=since)
+        assert b"first run" not in recent and b"second run" in recent
+        assert b"".join(fake_node.logs(stream=True, since=since)) == recent
@@ -0,0 +1,50 @@
+import base64
+import pytest
+from src.fanout import FanoutMatrix, FanoutRunner, content_topics, encode_cell
+
+def message(topic_index, seq):
+    return {"payload": base64.b64encode(encode_cell(topic_index, seq).encode()).decode()}
+
+
+class TestFanout:
+    """Test Suite 12: Many-topic fan-out and subscription cost"""
+    
+    @pytest.mark.basic
+    def test_matrix_accounting(self):
+        """Missing, duplicate and misrouted messages are told apart"""
+        matrix = FanoutMatrix(content_topics(3), ["a", "b", "c"], messages_per_topic=2)
+        for topic in range(3):
+            for seq in range(2):
+                matrix.mark_sent(topic, seq)
+        
+        # Topic 0 is published by node a: b gets everything, c one message twice
+        assert matrix.record(0, 1, [message(0, 0), message(0, 1)]) == 2
+        assert matrix.record(0, 2, [message(0, 0), message(0, 0), message(1, 0)]) == 1
+        assert matrix.record(0, 0, [message(0, 0)]) == 0
+        assert (matrix.duplicates, matrix.misrouted) == (1, 1)
+        
+        deliveries = matrix.deliveries()
+        assert [(d.sent, d.expected, d.received) for d in deliveries] == \
+            [(2, 4, 3), (2, 4, 0), (2, 4, 0)]
+        assert matrix.missing().count(1) == 9
+        assert (0, 2) in matrix.pending_cells() and (0, 1) not in matrix.pending_cells()
+        assert len(matrix.pending_cells()) == 5
+    
+    @pytest.mark.advanced
+    def test_many_topic_fanout(self, docker_manager, report_path):
+        """Every node subscribes to 300 topics in batches and receives all of them"""
+        nodes = docker_manager.start_cluster(3)
+        
+        try:
+            clients = {node.name: node.client() for node in nodes}
+            runner = FanoutRunner(clients, content_topics(300), messages_per_topic=3,
+                                  batch_size=100, poll_interval=0.1, settle_timeout=30)
+            report = runner.run()
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+        
+        runner.write_report(report_path("fanout.json"))
+        assert report.published == 900
+        assert all(s.batches == 3 and not s.failed_batches for s in report.subscriptions)
+        assert report.delivery_ratio == 1.0, f"Worst topics: {report.worst(5)}"
+        assert report.duplicates == report.misrouted == 0
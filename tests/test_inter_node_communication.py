@@ -1,7 +1,13 @@
+import os
 import pytest
-import time
 import logging
-from src.waku_client import WakuClient
+from src.waku_client import WakuClient, DEFAULT_MAX_MSG_SIZE
+from src.latency import LatencyHarness
+from src.telemetry import TelemetryRecorder
+from src.convergence import ConvergenceChecker, all_of, connected, min_degree
+from src.log_events import NODE_STARTED, SUBSCRIPTION_ADDED
+from utils.helpers import wait_for_condition, decode_base64_payload
+from utils.report import add_report_section, write_json_report
 
 @pytest.mark.advanced
 class TestInterNodeCommunication:
@@ -12,14 +18,20 @@ class TestInterNodeCommunication:
         """Initialize class data"""
         self.node1_enr = None
     
-    def test_create_docker_network(self, docker_manager):
+    def test_create_docker_network(self, docker_manager, worker_namespace):
         """Create Docker network for node communication"""
-        docker_manager.create_network("waku", "172.18.0.0/16", "172.18.0.1")
-        assert "waku" in docker_manager.networks
+        docker_manager.create_network(
+            worker_namespace.network,
+            worker_namespace.subnet,
+            worker_namespace.gateway
+        )
+        assert worker_namespace.network in docker_manager.networks
     
-    def test_setup_first_node(self, docker_manager, node1_config, test_topic):
+    def test_setup_first_node(self, docker_manager, node1_config, test_topic,
+                              worker_namespace):
         """Setup first node (repeat of Test Suite 1)"""
         # Start node1
+        cursor = docker_manager.events.cursor()
         container_id = docker_manager.start_waku_node(
             node1_config["name"],
             node1_config["ports"],
@@ -27,17 +39,17 @@ class TestInterNodeCommunication:
         )
         
         assert container_id is not None
+        assert docker_manager.wait_for_event(NODE_STARTED, node1_config["name"], timeout=30,
+                                             after=cursor), \
+            "Node1 never logged its setup as complete"
         
         # Connect to network first
         docker_manager.connect_to_network(
             node1_config["name"], 
-            "waku", 
+            worker_namespace.network, 
             node1_config["extip"]
         )
         
-        # Wait longer for node to be fully ready
-        time.sleep(20)
-        
         # Get ENR URI and store it
         client = WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}")
         debug_info = client.get_debug_info()
@@ -48,7 +60,8 @@ class TestInterNodeCommunication:
         success = client.subscribe_to_topic([test_topic])
         assert success
     
-    def test_start_second_node(self, docker_manager, node1_config, node2_config):
+    def test_start_second_node(self, docker_manager, node1_config, node2_config,
+                               worker_namespace):
         """Start second node with bootstrap"""
         # Ensure we have the ENR URI from node1
         if not self.node1_enr:
@@ -61,7 +74,9 @@ class TestInterNodeCommunication:
             node2_config["name"],
             node2_config["ports"],
             node2_config["extip"],
-            bootstrap_node=self.node1_enr
+            bootstrap_node=self.node1_enr,
+            # Subscriptions are only logged at DEBUG
+            log_level="DEBUG"
         )
         
         assert container_id is not None
@@ -69,35 +84,23 @@ class TestInterNodeCommunication:
         # Connect node2 to network
         docker_manager.connect_to_network(
             node2_config["name"],
-            "waku", 
+            worker_namespace.network, 
             node2_config["extip"]
         )
-        
-        # Wait for node to be ready and connect
-        time.sleep(20)
     
     def test_verify_autoconnection(self, docker_manager, node1_config, node2_config):
         """Verify nodes have connected to each other"""
         client1 = WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}")
         client2 = WakuClient(f"http://127.0.0.1:{node2_config['ports']['rest']}")
         
-        # Wait for peer connections with longer timeout
-        max_wait = 120  # 2 minutes
-        connected = False
+        # Wake on each node's peer events, then confirm both see each other
+        for name in (node1_config["name"], node2_config["name"]):
+            docker_manager.wait_for_peers(name, timeout=120)
+        checker = ConvergenceChecker({node1_config["name"]: client1,
+                                      node2_config["name"]: client2})
+        result = checker.wait(all_of(connected(), min_degree(1)), timeout=10)
         
-        for i in range(max_wait // 10):
-            peers1 = client1.get_peers()
-            peers2 = client2.get_peers()
-            
-            logging.info(f"Attempt {i+1}: Node1 peers: {len(peers1)}, Node2 peers: {len(peers2)}")
-            
-            if len(peers1) >= 1 and len(peers2) >= 1:
-                connected = True
-                break
-                
-            time.sleep(10)
-        
-        if not connected:
+        if not result.converged:
             # Try to diagnose the issue
             logging.error("Nodes failed to connect. Checking debug info...")
             try:
@@ -108,22 +111,25 @@ class TestInterNodeCommunication:
             except Exception as e:
                 logging.error(f"Failed to get debug info: {e}")
         
-        assert connected, "Nodes failed to connect to each other within timeout"
+        assert result.converged, "Nodes failed to connect to each other within timeout"
         
-        logging.info(f"Successfully connected - Node1 peers: {len(peers1)}, Node2 peers: {len(peers2)}")
+        logging.info(f"Successfully connected in {result.elapsed:.2f}s - degrees: {result.degrees}")
     
     def test_subscribe_node2_to_topic(self, docker_manager, node2_config, test_topic):
         """Subscribe node2 to the same topic as node1"""
         client2 = WakuClient(f"http://127.0.0.1:{node2_config['ports']['rest']}")
         
+        cursor = docker_manager.events.cursor()
         success = client2.subscribe_to_topic([test_topic])
         assert success, "Failed to subscribe node2 to topic"
         
-        # Wait for subscription to propagate across the network
-        time.sleep(10)
+        # Wait until node2 has joined the topic's relay mesh
+        assert docker_manager.wait_for_event(SUBSCRIPTION_ADDED, node2_config["name"],
+                                             timeout=10, after=cursor), \
+            "Node2 never logged the subscription"
     
     def test_message_transmission_between_nodes(self, docker_manager, node1_config, 
-                                              node2_config, test_topic):
+                                              node2_config, test_topic, settle):
         """Test message transmission from node1 to node2"""
         client1 = WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}")
         client2 = WakuClient(f"http://127.0.0.1:{node2_config['ports']['rest']}")
@@ -131,17 +137,20 @@ class TestInterNodeCommunication:
         test_message = "Inter-node communication test message"
         
         # Double-check that both nodes are subscribed
-        time.sleep(5)
+        settle(5)
         
         # Publish message from node1
         success = client1.publish_message(test_topic, test_message)
         assert success, "Failed to publish message from node1"
         
-        # Wait longer for message propagation
-        time.sleep(15)
-        
-        # Check if message was received by node2
-        messages = client2.get_messages(test_topic)
+        # Poll node2 until the message arrives; each read drains the relay
+        # cache, so keep everything returned so far
+        messages = []
+        def message_received():
+            messages.extend(client2.get_messages(test_topic))
+            return any(decode_base64_payload(msg.get("payload", "")) == test_message
+                       for msg in messages)
+        wait_for_condition(message_received, timeout=30, interval=1)
         logging.info(f"Node2 received {len(messages)} messages")
         
         if len(messages) == 0:
@@ -152,7 +161,6 @@ class TestInterNodeCommunication:
         assert len(messages) > 0, "No messages received by node2"
         
         # Verify the message content
-        from utils.helpers import decode_base64_payload
         found_message = False
         for msg in messages:
             if "payload" in msg:
@@ -162,4 +170,46 @@ class TestInterNodeCommunication:
                     found_message = True
                     break
         
-        assert found_message, f"Test message not found in node2 messages"
\ No newline at end of file
+        assert found_message, f"Test message not found in node2 messages"
+
+    def test_binary_payload_transmission(self, docker_manager, node1_config,
+                                         node2_config, test_topic):
+        """Test a large binary payload arrives byte for byte and oversize ones are refused"""
+        client1 = WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}")
+        client2 = WakuClient(f"http://127.0.0.1:{node2_config['ports']['rest']}")
+        
+        payload = os.urandom(100 * 1024)
+        assert client1.publish_message(test_topic, memoryview(payload)), \
+            "Failed to publish binary payload from node1"
+        
+        payloads = []
+        def payload_received():
+            payloads.extend(client2.get_payloads(test_topic))
+            return payload in payloads
+        wait_for_condition(payload_received, timeout=30, interval=0.5)
+        
+        assert payload in payloads, "Binary payload not received intact by node2"
+        assert not client1.publish_message(test_topic, os.urandom(DEFAULT_MAX_MSG_SIZE + 1)), \
+            "Payload above the node's max message size was accepted"
+    
+    def test_message_propagation_latency(self, docker_manager, node1_config,
+                                         node2_config, test_topic, report_path):
+        """Measure node1 -> node2 and node2 -> node1 delivery latency"""
+        clients = {
+            node1_config["name"]: WakuClient(f"http://127.0.0.1:{node1_config['ports']['rest']}"),
+            node2_config["name"]: WakuClient(f"http://127.0.0.1:{node2_config['ports']['rest']}")
+        }
+        
+        harness = LatencyHarness(clients, clients, test_topic)
+        with TelemetryRecorder(docker_manager, interval=0.25) as telemetry:
+            report = harness.run(messages_per_publisher=20, interval=0.05)
+        
+        write_json_report(report_path("latency.json"), report.as_dict())
+        telemetry.write_report(report_path("telemetry.json"), messages=2 * 20)
+        add_report_section("Propagation latency", report.rows())
+        for pair in report.pairs:
+            logging.info(f"{pair.publisher} -> {pair.receiver}: p50 {pair.p50_ms:.1f}ms, "
+                         f"p99 {pair.p99_ms:.1f}ms, lost {pair.lost}")
+        
+        assert report.pairs, "No latency samples were collected"
+        assert report.total_lost == 0, f"{report.total_lost} probe message(s) were lost"
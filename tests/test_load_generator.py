@@ -0,0 +1,91 @@
+import time
+import pytest
+from src.load_generator import LoadGenerator, PayloadBuffer, TRANSPORTS
+from src.waku_client import WakuClient
+
+TOPIC = "/load/1/test/proto"
+
+
+def client_for(node, topics=(TOPIC,)) -> WakuClient:
+    client = WakuClient(f"http://127.0.0.1:{node.rest_port}", timeout=5)
+    client.subscribe_to_topic(list(topics))
+    return client
+
+
+@pytest.fixture
+def slow_node(fake_node, monkeypatch):
+    """A fake node taking 50 ms to accept each publish"""
+    publish = fake_node.publish
+    def slow_publish(message):
+        time.sleep(0.05)
+        publish(message)
+    monkeypatch.setattr(fake_node, "publish", slow_publish)
+    return fake_node
+
+
+@pytest.mark.basic
+class TestLoadGenerator:
+    """Test Suite 16: Load generator rate, modes and failures against fake nodes"""
+
+    def test_every_client_gets_every_topic(self, fake_node_factory):
+        """Client and topic are picked independently, even when their counts share a factor"""
+        topics = [f"/load/1/topic-{i}/proto" for i in range(2)]
+        nodes = [fake_node_factory(), fake_node_factory()]
+        clients = [client_for(node, topics) for node in nodes]
+
+        buffer = PayloadBuffer(topics, 8)
+        assert [(buffer.client_index(i, 2), buffer.topics[i]) for i in range(4)] == \
+            [(0, topics[0]), (0, topics[1]), (1, topics[0]), (1, topics[1])]
+
+        report = LoadGenerator(clients, topics, concurrency=1).run(count=8)
+        assert report.succeeded == 8
+        for client in clients:
+            assert [len(client.get_messages(topic)) for topic in topics] == [2, 2]
+
+    @pytest.mark.parametrize("transport", TRANSPORTS)
+    @pytest.mark.parametrize("mode", ["closed", "open"])
+    def test_rate_accuracy(self, fake_node, mode, transport):
+        """A rated run keeps to its target rate and duration"""
+        # Enough publishes in flight that a fake node slowed down by other
+        # xdist workers on the same CPU does not build an open-loop backlog
+        generator = LoadGenerator([client_for(fake_node)], [TOPIC], rate=200, mode=mode,
+                                  concurrency=32, transport=transport)
+        report = generator.run(duration=1.0)
+        assert report.failed == 0
+        # The last tokens fall due right at the deadline, where a loaded
+        # machine may miss them or still have them queued
+        assert report.backlog <= 2
+        assert 196 <= report.attempted <= 200
+        assert 0.9 <= report.duration <= 1.3
+        assert report.achieved_rate == pytest.approx(200, rel=0.15)
+
+    @pytest.mark.parametrize("transport", TRANSPORTS)
+    def test_closed_vs_open(self, slow_node, transport):
+        """A slow node lowers the closed-loop rate, but shows as backlog in the open loop"""
+        client = client_for(slow_node)
+        closed = LoadGenerator([client], [TOPIC], rate=100, mode="closed", concurrency=2,
+                               transport=transport).run(duration=1.0)
+        opened = LoadGenerator([client], [TOPIC], rate=100, mode="open", concurrency=2,
+                               transport=transport).run(duration=1.0)
+
+        # Two publishes in flight at 50 ms each cap both loops near 40 msg/s
+        assert closed.backlog == 0
+        assert closed.attempted < 60
+        assert opened.attempted < 60
+        assert opened.attempted + opened.backlog == 100
+        assert opened.backlog > 30
+        # The backlog is dropped at the deadline instead of sent late
+        assert opened.duration < 1.3
+
+    @pytest.mark.parametrize("transport", TRANSPORTS)
+    def test_failure_count(self, fake_node, transport):
+        """Publishes to an unreachable node count as failed, not as sent"""
+        good = client_for(fake_node)
+        # Nothing listens on the standalone nodes' next slot
+        gone = WakuClient(f"http://127.0.0.1:{fake_node.rest_port + 10}", timeout=1)
+
+        report = LoadGenerator([good, gone], [TOPIC], concurrency=4,
+                               transport=transport).run(count=50)
+        assert (report.succeeded, report.failed, report.attempted) == (25, 25, 50)
+        assert report.error_rate == 0.5
+        assert len(good.get_messages(TOPIC)) == 25
@@ -0,0 +1,103 @@
+import threading
+import pytest
+from src.log_events import (
+    EventBus, parse_log_line, NODE_STARTED, PEER_CONNECTED, PEER_DISCONNECTED,
+    MESSAGE_RELAYED, SUBSCRIPTION_ADDED
+)
+
+# Lines as nwaku v0.24 writes them (chronicles textlines: level, timestamp,
+# padded message, then key=value fields)
+STAMP = "2024-02-05 10:11:12.345+00:00"
+NWAKU_LINES = {
+    "setup": f'INF {STAMP} Node setup complete                        '
+             f'topics="wakunode main" tid=1 file=wakunode2.nim:99',
+    "subscribe": f'DBG {STAMP} subscribe                                  '
+                 f'topics="waku node" tid=1 file=waku_node.nim:271 pubsubTopic=/waku/2/rs/0/2',
+    "unsubscribe": f'DBG {STAMP} unsubscribe                                '
+                   f'topics="waku node" tid=1 file=waku_node.nim:290 pubsubTopic=/waku/2/rs/0/2',
+    "already": f'DBG {STAMP} already subscribed to topic                '
+               f'topics="waku node" tid=1 file=waku_node.nim:262 pubsubTopic=/waku/2/rs/0/2',
+    "subscribers": f'DBG {STAMP} no subscribers for topic                  '
+                   f'topics="waku relay" tid=1 file=protocol.nim:180 pubsubTopic=/waku/2/rs/0/2',
+    "resubscribe": f'INF {STAMP} resubscribe to content topics             '
+                   f'topics="waku filter client" tid=1 file=client.nim:201 count=3',
+    "relayed": f'TRC {STAMP} waku.relay received                        '
+               f'topics="waku node" tid=1 file=waku_node.nim:233 '
+               f'peerId=16U*7Mz2Xk pubsubTopic=/waku/2/rs/0/2 '
+               f'hash=0x9e4c contentTopic=/test/1/waku-test/proto payloadSizeBytes=33',
+    "connected": f'INF {STAMP} Peer connected                             '
+                 f'topics="waku node peer_manager" tid=1 file=peer_manager.nim:406 '
+                 f'peerId=16Uiu2HAm7Mz2Xk direction=Outbound',
+    "disconnected": f'INF {STAMP} Peer disconnected                          '
+                    f'topics="waku node peer_manager" tid=1 file=peer_manager.nim:420 '
+                    f'peerId=16Uiu2HAm7Mz2Xk',
+}
+
+
+@pytest.mark.basic
+class TestLogEvents:
+    """Test Suite 14: Node log event parsing"""
+
+    @pytest.mark.parametrize("line, kind", [
+        ("setup", NODE_STARTED),
+        ("subscribe", SUBSCRIPTION_ADDED),
+        ("relayed", MESSAGE_RELAYED),
+        ("connected", PEER_CONNECTED),
+        ("disconnected", PEER_DISCONNECTED),
+    ])
+    def test_parse_nwaku_lines(self, line, kind):
+        """Each event's nwaku line parses to its kind, with message and fields split"""
+        event = parse_log_line("node1", NWAKU_LINES[line])
+        assert event is not None and event.kind == kind
+        assert event.node == "node1"
+        assert event.log_time == STAMP
+        assert event.fields["tid"] == "1"
+
+    def test_fields(self):
+        """Quoted and bare fields are both read"""
+        event = parse_log_line("node1", NWAKU_LINES["relayed"])
+        assert event.level == "TRC"
+        assert event.message == "waku.relay received"
+        assert event.fields["topics"] == "waku node"
+        assert event.fields["pubsubTopic"] == "/waku/2/rs/0/2"
+        assert event.fields["payloadSizeBytes"] == "33"
+
+    @pytest.mark.parametrize("line", ["unsubscribe", "already", "subscribers", "resubscribe"])
+    def test_subscribe_is_exact(self, line):
+        """Only nwaku's own "subscribe" message counts as a new subscription"""
+        assert parse_log_line("node1", NWAKU_LINES[line]) is None
+
+    def test_ignores_other_output(self):
+        """Lines that are not nwaku log records are skipped"""
+        assert parse_log_line("node1", "") is None
+        assert parse_log_line("node1", "Starting nwaku v0.24.0") is None
+        assert parse_log_line("node1", f"INF {STAMP} Listening on "
+                                       f"topics=\"wakunode main\" tid=1") is None
+
+    def test_wait_for_after_cursor(self):
+        """Waits see only events newer than their cursor, and wake when one is published"""
+        bus = EventBus()
+        bus.publish(parse_log_line("node1", NWAKU_LINES["connected"]))
+        cursor = bus.cursor()
+        assert bus.wait_for(PEER_CONNECTED, node="node1", timeout=0.05, after=cursor) is None
+
+        timer = threading.Timer(0.05, bus.publish,
+                                [parse_log_line("node1", NWAKU_LINES["connected"])])
+        timer.start()
+        event = bus.wait_for(PEER_CONNECTED, node="node1", timeout=5, after=cursor)
+        timer.join()
+        assert event is not None and event.seq == cursor + 1
+        assert bus.wait_for(PEER_CONNECTED, node="node2", timeout=0.05, after=0) is None
+
+    def test_wait_for_defaults_to_new_events(self):
+        """Without a cursor, events published before the wait do not count"""
+        bus = EventBus()
+        bus.publish(parse_log_line("node1", NWAKU_LINES["setup"]))
+        assert bus.wait_for(NODE_STARTED, node="node1", timeout=0.05) is None
+        assert bus.wait_for(NODE_STARTED, node="node1", timeout=0.05, after=0).seq == 1
+
+        timer = threading.Timer(0.05, bus.publish, [parse_log_line("node1", NWAKU_LINES["setup"])])
+        timer.start()
+        event = bus.wait_for(NODE_STARTED, node="node1", timeout=5)
+        timer.join()
+        assert event is not None and event.seq == 2
@@ -0,0 +1,99 @@
+import pytest
+import requests
+from src.metrics import Histogram, InstrumentedSession, RequestMetrics, endpoint_of
+from src.load_generator import LoadGenerator
+from src.waku_client import WakuClient
+
+
+@pytest.mark.basic
+class TestRequestMetrics:
+    """Test Suite 18: REST request counters, histograms and sinks"""
+
+    def test_histogram(self):
+        """Observations land in their buckets; quantiles are bucket bounds capped at the max"""
+        histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 0.5):
+            histogram.observe(value)
+
+        assert histogram.counts == [1, 2, 1, 0]
+        assert (histogram.count, histogram.min, histogram.max) == (4, 0.005, 0.5)
+        assert histogram.mean == pytest.approx(0.15125)
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.99) == 0.5
+        assert Histogram().quantile(0.5) == 0.0
+
+    def test_endpoint_templates(self):
+        """Topic path parameters collapse into one endpoint"""
+        assert endpoint_of("/relay/v1/auto/messages/%2Fapp%2F1%2Fchat%2Fproto") == \
+            "/relay/v1/auto/messages/{topic}"
+        assert endpoint_of("/relay/v1/messages/%2Fwaku%2F2%2Frs%2F0%2F1") == \
+            "/relay/v1/messages/{pubsubTopic}"
+        assert endpoint_of("/debug/v1/info") == "/debug/v1/info"
+
+    def test_record_rows_and_sinks(self):
+        """Records accumulate per endpoint; sinks see each sample until removed"""
+        metrics = RequestMetrics()
+        samples = []
+        metrics.add_sink(samples.append)
+        metrics.record("node1", "GET", "/debug/v1/info", 0.004, bytes_received=120, status=200)
+        metrics.record("node1", "GET", "/debug/v1/info", 0.02, status=500, error=True)
+        metrics.remove_sink(samples.append)
+        metrics.record("node1", "POST", "/relay/v1/auto/messages", 0.01, bytes_sent=64)
+
+        info = metrics.stats("node1", "GET", "/debug/v1/info")
+        assert (info.requests, info.errors, info.bytes_received) == (2, 1, 120)
+        assert [(s.status, s.error) for s in samples] == [(200, False), (500, True)]
+        assert [row["endpoint"] for row in metrics.rows()] == \
+            ["/debug/v1/info", "/relay/v1/auto/messages"]
+        assert metrics.rows()[0]["max_ms"] == pytest.approx(20)
+
+        metrics.reset()
+        assert metrics.rows() == []
+
+    def test_instrumented_session(self, fake_node, test_topic):
+        """Client requests are counted, sized and timed per templated endpoint"""
+        metrics = RequestMetrics()
+        url = f"http://127.0.0.1:{fake_node.rest_port}"
+        client = WakuClient(url, metrics=metrics, node="node1")
+
+        client.get_debug_info()
+        client.get_messages(test_topic)
+        client.get_messages(test_topic + "-other")
+        assert client.publish_message(test_topic, "measured")
+
+        info = metrics.stats("node1", "GET", "/debug/v1/info")
+        assert info.requests == 1 and info.errors == 0
+        assert info.bytes_received > 0
+        assert info.latency.count == 1 and info.latency.max > 0
+        assert metrics.stats("node1", "GET", "/relay/v1/auto/messages/{topic}").requests == 2
+        assert metrics.stats("node1", "POST", "/relay/v1/auto/messages").bytes_sent > 0
+
+    def test_session_errors(self, fake_node):
+        """HTTP errors and failed connections count as errors, labelled by host:port"""
+        metrics = RequestMetrics()
+        session = InstrumentedSession(metrics)
+        host = f"127.0.0.1:{fake_node.rest_port}"
+
+        assert session.get(f"http://{host}/no/such/path").status_code == 404
+        assert metrics.stats(host, "GET", "/no/such/path").errors == 1
+
+        gone = f"127.0.0.1:{fake_node.rest_port + 10}"
+        with pytest.raises(requests.ConnectionError):
+            session.get(f"http://{gone}/debug/v1/info", timeout=1)
+        assert metrics.stats(gone, "GET", "/debug/v1/info").errors == 1
+
+    def test_async_transport_recorded(self, fake_node, test_topic):
+        """Async load runs record their publishes like the threaded transport"""
+        metrics = RequestMetrics()
+        client = WakuClient(f"http://127.0.0.1:{fake_node.rest_port}", metrics=metrics,
+                            node="node1")
+        client.subscribe_to_topic([test_topic])
+
+        oversized = LoadGenerator([client], [test_topic], concurrency=4, transport="async",
+                                  payload_size=fake_node.max_msg_size + 1)
+        assert oversized.run(count=5).failed == 5
+        LoadGenerator([client], [test_topic], concurrency=4, transport="async").run(count=20)
+
+        publish = metrics.stats("node1", "POST", "/relay/v1/auto/messages")
+        assert (publish.requests, publish.errors) == (25, 5)
+        assert publish.bytes_sent > 0 and publish.latency.count == 25
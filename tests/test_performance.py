@@ -0,0 +1,173 @@
+import time
+import pytest
+from src.convergence import ConvergenceChecker, all_of, connected, min_degree
+from src.latency import LatencyHarness
+from src.load_generator import LoadGenerator
+from src.payload_sweep import PayloadSweep
+from src.store import StoreLatencySweep, scan_store
+from src.waku_client import WakuClient
+from utils.report import add_report_section, write_json_report
+
+@pytest.mark.perf
+class TestPerformance:
+    """Test Suite 6: Benchmarks gated on stored per-image baselines"""
+
+    # Allocator slots clear of the ones the functional suites use
+    FIRST_INDEX = 60
+
+    def assert_no_regression(self, benchmark, name):
+        regression = benchmark.check(name)
+        assert regression is None, f"Performance regression: {regression}"
+
+    def test_node_startup_time(self, benchmark, docker_manager, worker_namespace):
+        """Container create to ENR available, in seconds"""
+        config = worker_namespace.allocator().node_config(self.FIRST_INDEX)
+
+        def start_node():
+            docker_manager.start_waku_node(config["name"], config["ports"], config["extip"])
+            total = docker_manager.startup_timings[config["name"]].total
+            docker_manager.remove_nodes([config["name"]])
+            return total
+
+        benchmark.measure("node_startup_s", start_node, unit="s")
+        self.assert_no_regression(benchmark, "node_startup_s")
+
+    def test_peer_convergence_time(self, benchmark, docker_manager):
+        """Seconds from a started 3-node cluster until every node has a peer"""
+        def converge():
+            nodes = docker_manager.start_cluster(3)
+            try:
+                result = ConvergenceChecker.for_nodes(nodes).wait(
+                    all_of(connected(), min_degree(1)), timeout=60)
+                assert result.converged, f"Cluster did not converge: {result.degrees}"
+                return result.elapsed
+            finally:
+                docker_manager.remove_nodes([node.name for node in nodes])
+
+        benchmark.measure("peer_convergence_s", converge, unit="s")
+        self.assert_no_regression(benchmark, "peer_convergence_s")
+
+    def test_publish_throughput(self, benchmark, docker_manager, worker_namespace, test_topic):
+        """Closed-loop publish rate of one node, in messages per second"""
+        config = worker_namespace.allocator().node_config(self.FIRST_INDEX + 1)
+        docker_manager.start_waku_node(config["name"], config["ports"], config["extip"])
+
+        try:
+            client = WakuClient(f"http://127.0.0.1:{config['ports']['rest']}")
+            client.subscribe_to_topic([test_topic])
+            generator = LoadGenerator([client], [test_topic], concurrency=8)
+
+            def publish():
+                report = generator.run(count=200)
+                assert report.failed == 0, f"{report.failed} publishes failed"
+                return report.achieved_rate
+
+            benchmark.measure("publish_rate_msg_s", publish, unit="msg/s",
+                              lower_is_better=False)
+        finally:
+            docker_manager.remove_nodes([config["name"]])
+        self.assert_no_regression(benchmark, "publish_rate_msg_s")
+
+    def test_async_publish_throughput(self, benchmark, docker_manager, test_topic):
+        """Closed-loop publish rate of a 3-node cluster with 64 in-flight publishes per node"""
+        nodes = docker_manager.start_cluster(3)
+
+        try:
+            clients = [node.client() for node in nodes]
+            for client in clients:
+                client.subscribe_to_topic([test_topic])
+            generator = LoadGenerator(clients, [test_topic], concurrency=64, transport="async")
+
+            def publish():
+                report = generator.run(count=1000)
+                assert report.failed == 0, f"{report.failed} publishes failed"
+                return report.achieved_rate
+
+            benchmark.measure("publish_rate_async_msg_s", publish, unit="msg/s",
+                              lower_is_better=False)
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+        self.assert_no_regression(benchmark, "publish_rate_async_msg_s")
+
+    def test_propagation_latency(self, benchmark, docker_manager, test_topic):
+        """Median node to node delivery latency of a 2-node cluster, in ms"""
+        nodes = docker_manager.start_cluster(2)
+
+        try:
+            clients = {node.name: node.client() for node in nodes}
+            for client in clients.values():
+                client.subscribe_to_topic([test_topic])
+
+            def propagate():
+                report = LatencyHarness(clients, clients, test_topic, poll_interval=0.01) \
+                    .run(messages_per_publisher=20, interval=0.01)
+                assert report.total_lost == 0, f"{report.total_lost} probe(s) lost"
+                return sorted(pair.p50_ms for pair in report.pairs)[len(report.pairs) // 2]
+
+            benchmark.measure("propagation_p50_ms", propagate, unit="ms")
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+        self.assert_no_regression(benchmark, "propagation_p50_ms")
+
+    def test_rest_poll_cost(self, benchmark, docker_manager, worker_namespace, test_topic):
+        """Mean cost of one relay cache poll on an idle node, in ms"""
+        config = worker_namespace.allocator().node_config(self.FIRST_INDEX + 2)
+        docker_manager.start_waku_node(config["name"], config["ports"], config["extip"])
+
+        try:
+            client = WakuClient(f"http://127.0.0.1:{config['ports']['rest']}")
+            client.subscribe_to_topic([test_topic])
+
+            def poll(count=50):
+                started = time.perf_counter()
+                for _ in range(count):
+                    client.get_messages(test_topic)
+                return (time.perf_counter() - started) / count * 1000
+
+            benchmark.measure("rest_poll_ms", poll, unit="ms")
+        finally:
+            docker_manager.remove_nodes([config["name"]])
+        self.assert_no_regression(benchmark, "rest_poll_ms")
+
+    def test_payload_size_sweep(self, docker_manager, test_topic, report_path):
+        """Publish rate and delivery latency from 1 KiB up to the max message size"""
+        nodes = docker_manager.start_cluster(2)
+
+        try:
+            publisher, receiver = (node.client() for node in nodes)
+            for client in (publisher, receiver):
+                client.subscribe_to_topic([test_topic])
+            sweep = PayloadSweep(publisher, receiver, test_topic, messages_per_size=10,
+                                 poll_interval=0.01)
+            points = sweep.run()
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+
+        write_json_report(report_path("payload_sweep.json"), sweep.rows())
+        add_report_section("Payload size sweep", sweep.rows())
+        lost = {point.size: point.lost for point in points if point.lost}
+        assert not lost, f"Messages lost by payload size: {lost}"
+
+    def test_store_query_latency(self, benchmark, docker_manager, worker_namespace, test_topic,
+                                 report_path):
+        """Store query cost against history size; benchmarks a full 1000-message resync, in s"""
+        config = worker_namespace.allocator().node_config(self.FIRST_INDEX + 3)
+        docker_manager.start_waku_node(config["name"], config["ports"], config["extip"],
+                                       store=True)
+
+        try:
+            client = WakuClient(f"http://127.0.0.1:{config['ports']['rest']}")
+            sweep = StoreLatencySweep(client, client, test_topic,
+                                      history_sizes=(100, 500, 1000))
+            points = sweep.run()
+            assert points[-1]["messages"] == points[-1]["history"], "Store lost history"
+
+            benchmark.measure("store_resync_1000_s",
+                              lambda: scan_store(client, [test_topic], page_size=100,
+                                                 prefetch=True).elapsed_s, unit="s")
+        finally:
+            docker_manager.remove_nodes([config["name"]])
+
+        write_json_report(report_path("store_latency.json"), sweep.rows())
+        add_report_section("Store query latency by history size", sweep.rows())
+        self.assert_no_regression(benchmark, "store_resync_1000_s")
@@ -0,0 +1,75 @@
+import pytest
+from src import topology
+from src.latency import LatencyHarness
+from src.simulator import GossipSimulator, LinkModel, Workload, compare_reports
+
+@pytest.mark.basic
+class TestSimulator:
+    """Test Suite 9: Discrete-event relay propagation simulator"""
+
+    def test_latency_follows_hops(self):
+        """Delivery latency is hop count times link latency, without duplicates on a line"""
+        sim = GossipSimulator(topology.line(4), LinkModel(latency_ms=2.0))
+        result = sim.run(Workload.rounds([0], messages_per_publisher=3))
+
+        p50 = {pair.receiver: pair.p50_ms for pair in result.report.pairs}
+        assert p50 == {"node1": 2.0, "node2": 4.0, "node3": 6.0}
+        assert result.delivery_ratio == 1.0
+        assert result.report.total_duplicates == 0
+
+        ring = GossipSimulator(topology.ring(6), LinkModel(latency_ms=2.0))
+        assert ring.run(Workload.rounds([0], messages_per_publisher=3)).report.total_duplicates > 0
+
+    def test_seeded_runs_are_deterministic(self):
+        """Same seed, same losses and latencies"""
+        shape = topology.k_regular(50, 3, seed=2)
+        link = LinkModel(latency_ms=20, jitter_ms=10, loss=0.2)
+        workload = Workload.rate([0, 10, 20], count=30, rate=100)
+
+        first = GossipSimulator(shape, link, seed=5).run(workload)
+        second = GossipSimulator(shape, link, seed=5).run(workload)
+        assert first.rows() == second.rows()
+        assert first.lost_transmissions == second.lost_transmissions > 0
+        assert first.delivery_ratio < 1.0
+
+    def test_bandwidth_queues_messages(self):
+        """Back-to-back messages wait for the link to serialise the previous one"""
+        # 125 kB at 1 Mbit/s takes 1 s on the wire
+        link = LinkModel(latency_ms=10, bandwidth_mbps=1)
+        workload = Workload.rounds([0], messages_per_publisher=2, interval=0,
+                                   payload_size=125_000)
+        pair, = GossipSimulator(topology.line(2), link).run(workload).report.pairs
+        assert pair.p50_ms == pytest.approx(1010)
+        assert pair.max_ms == pytest.approx(2010)
+
+    def test_ten_thousand_nodes(self):
+        """A 10k-node mesh simulates in memory and reaches every node"""
+        sim = GossipSimulator(topology.k_regular(10_000, 3, seed=1),
+                              LinkModel(latency_ms=20, jitter_ms=10), seed=1)
+        result = sim.run(Workload.rounds([0, 5000], messages_per_publisher=2), receivers=[1, 9999])
+
+        assert result.delivery_ratio == 1.0
+        assert len(result.report.pairs) == 4
+        assert result.summary()["p99_ms"] > result.summary()["p50_ms"] > 0
+
+    @pytest.mark.advanced
+    def test_compare_with_cluster(self, docker_manager, test_topic):
+        """Simulated and measured reports line up pair by pair on a small cluster"""
+        nodes = docker_manager.start_cluster(3)
+
+        try:
+            clients = {node.name: node.client() for node in nodes}
+            for client in clients.values():
+                client.subscribe_to_topic([test_topic])
+            measured = LatencyHarness(clients, clients, test_topic, poll_interval=0.01) \
+                .run(messages_per_publisher=5, interval=0.01)
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+
+        sim = GossipSimulator(topology.star(3), LinkModel(latency_ms=1.0),
+                              names=[node.name for node in nodes])
+        simulated = sim.run(Workload.rounds(range(3), messages_per_publisher=5, interval=0.01))
+        rows = compare_reports(simulated.report, measured)
+
+        assert len(rows) == 6
+        assert all(row["measured_lost"] == row["simulated_lost"] == 0 for row in rows)
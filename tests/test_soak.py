@@ -0,0 +1,71 @@
+import math
+import pytest
+from src.soak import RingBuffer, SoakMonitor, SoakRunner, SoakThresholds, TrendFit
+
+class TestSoak:
+    """Test Suite 10: Soak runs with online leak and degradation detection"""
+    
+    @pytest.mark.basic
+    def test_monitor_flags_trends(self):
+        """A leaking node and falling delivery are flagged mid-run; steady nodes are not"""
+        monitor = SoakMonitor(SoakThresholds(warmup_samples=10), capacity=50)
+        raised_at = {}
+        for minute in range(120):
+            elapsed = minute * 60.0
+            alerts = monitor.record(elapsed, {
+                # 100 MiB/hour leak against a 64 MiB/hour threshold
+                ("leaky", "memory_bytes"): 50e6 + minute * 100 * 1024 * 1024 / 60,
+                ("steady", "memory_bytes"): 50e6 + (minute % 3) * 1e5,
+                ("steady", "rest_ms"): 5.0,
+                ("cluster", "delivery_ratio"): 1.0 if minute < 60 else 0.5,
+            })
+            for alert in alerts:
+                raised_at[(alert.node, alert.metric)] = elapsed
+        
+        assert set(raised_at) == {("leaky", "memory_bytes"), ("cluster", "delivery_ratio")}
+        assert raised_at[("leaky", "memory_bytes")] < 60 * 60, "Leak not flagged early"
+        assert len(monitor.buffers[("leaky", "memory_bytes")]) == 50
+        assert len(monitor.buffers[("leaky", "memory_bytes")].values()) == 50
+    
+    @pytest.mark.basic
+    def test_ring_buffer_and_trend(self):
+        """Ring buffers keep the newest values; trends track the slope online"""
+        ring = RingBuffer(3)
+        for value in range(5):
+            ring.append(value)
+        assert ring.values() == [2.0, 3.0, 4.0] and ring.last() == 4.0
+        
+        trend = TrendFit()
+        for x in range(10):
+            trend.add(x, 3.0 * x + 1.0)
+        trend.add(10, math.nan)
+        assert trend.slope == pytest.approx(3.0)
+        
+        # A discounted fit follows a change of slope
+        recent = TrendFit(half_life=5)
+        for x in range(100):
+            recent.add(x, x if x < 50 else 50 + 10 * (x - 50))
+        assert recent.slope == pytest.approx(10.0, rel=0.05)
+    
+    @pytest.mark.slow
+    def test_soak_cluster(self, pytestconfig, docker_manager, test_topic, report_path):
+        """Hold a 3-node cluster at a fixed publish rate and check nothing degrades"""
+        duration = pytestconfig.getoption("--soak-duration")
+        if not duration:
+            pytest.skip("soak runs need --soak-duration")
+        interval = pytestconfig.getoption("--soak-interval")
+        nodes = docker_manager.start_cluster(3)
+        
+        try:
+            runner = SoakRunner(docker_manager, nodes, test_topic,
+                                rate=pytestconfig.getoption("--soak-rate"),
+                                interval=interval,
+                                thresholds=SoakThresholds(
+                                    warmup_samples=min(10, max(2, int(duration / interval) // 2))))
+            report = runner.run(duration)
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
+        
+        runner.write_report(report_path("soak.json"), report)
+        assert report.samples > 0 and report.published > 0
+        assert not report.alerts, "Soak degraded: " + "; ".join(map(str, report.alerts))
@@ -0,0 +1,71 @@
+import pytest
+from src.backends import FakeBackend
+from src.images import ImageCache, ImageDigestMismatch, prepare_images
+from src.readiness import StartupTimings
+from src.startup_profile import PHASES, StartupProfile, aggregate_history, load_history
+
+IMAGE = "wakuorg/nwaku:v0.24.0"
+
+class TestStartup:
+    """Test Suite 13: Image preparation and node startup profiling"""
+    
+    @pytest.mark.basic
+    def test_image_preparation_cache(self, tmp_path):
+        """Images are pulled once, then trusted from the cache until it expires"""
+        backend = FakeBackend()
+        path = str(tmp_path / "images.json")
+        
+        first, = prepare_images(backend, [IMAGE, IMAGE], cache=ImageCache(path))
+        assert first.pulled and not first.cached and first.digest.startswith("sha256:")
+        second, = prepare_images(backend, [IMAGE], cache=ImageCache(path))
+        assert second.cached and not second.pulled and second.digest == first.digest
+        assert backend.op_counts["pull_image"] == 1
+        
+        expired, = prepare_images(backend, [IMAGE], cache=ImageCache(path, ttl=0))
+        assert expired.pulled
+        
+        with pytest.raises(ImageDigestMismatch):
+            prepare_images(backend, [IMAGE], expected={IMAGE: "sha256:" + "0" * 64})
+        pinned = f"wakuorg/nwaku@{first.digest}"
+        assert prepare_images(backend, [pinned])[0].digest == first.digest
+    
+    @pytest.mark.basic
+    def test_profile_history(self, tmp_path):
+        """Phase profiles aggregate across nodes, workers of one run, and runs"""
+        path = str(tmp_path / "history.jsonl")
+        for run_id, image, rest_up in [("a", IMAGE, 1.0), ("a", IMAGE, 3.0),
+                                       ("b", IMAGE, 5.0), ("b", "wakuorg/nwaku:v0.25.0", 0.5)]:
+            profile = StartupProfile()
+            profile.add(image, StartupTimings(create=0.1, start=0.2, rest_up=rest_up))
+            profile.add(image, StartupTimings(create=0.1, start=0.2, rest_up=rest_up))
+            assert profile.dominant(image) == "rest_up"
+            profile.append_history(path, run_id)
+        
+        rows = {(row["image"], row["phase"]): row for row in aggregate_history(load_history(path))}
+        assert len(rows) == 2 * len(PHASES)
+        rest_up = rows[(IMAGE, "rest_up")]
+        assert (rest_up["runs"], rest_up["nodes"]) == (2, 6)
+        assert rest_up["latest_mean_s"] == pytest.approx(5.0)
+        assert rest_up["median_mean_s"] == pytest.approx(3.5)
+    
+    @pytest.mark.advanced
+    def test_cluster_startup_phases(self, docker_manager):
+        """Cluster starts record every phase, bootstrap included when profiled"""
+        docker_manager.profile_bootstrap = True
+        try:
+            nodes = docker_manager.start_cluster(3)
+        finally:
+            docker_manager.profile_bootstrap = False
+        
+        try:
+            assert docker_manager.image in docker_manager.prepared_images
+            for node in nodes[1:]:
+                assert node.timings.bootstrap > 0 and node.timings.network > 0
+            assert nodes[0].timings.bootstrap == 0, "The bootstrap node has nothing to bootstrap from"
+            profile = {row["phase"]: row for row in docker_manager.startup_profile.rows()
+                       if row["image"] == docker_manager.image}
+            assert set(profile) == set(PHASES)
+            assert profile["create"]["count"] >= 3
+            assert sum(row["share"] for row in profile.values()) == pytest.approx(1.0)
+        finally:
+            docker_manager.remove_nodes([node.name for node in nodes])
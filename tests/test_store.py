@@ -0,0 +1,82 @@
+import time
+import pytest
+from itertools import islice
+from src.metrics import RequestMetrics
+from src.load_generator import LoadGenerator
+from src.store import resync, scan_store
+from src.waku_client import WakuClient
+from utils.helpers import wait_for_condition
+
+STORE_ENDPOINT = "/store/v1/messages"
+
+
+@pytest.fixture(scope="class")
+def store_pair(docker_manager, worker_namespace):
+    """A store node and a relay node publishing through it"""
+    allocator = worker_namespace.allocator()
+    store_config, relay_config = allocator.node_config(47), allocator.node_config(48)
+    docker_manager.start_waku_node(store_config["name"], store_config["ports"],
+                                   store_config["extip"], store=True)
+    docker_manager.start_waku_node(relay_config["name"], relay_config["ports"],
+                                   relay_config["extip"],
+                                   bootstrap_node=docker_manager.enrs[store_config["name"]])
+    store = WakuClient(f"http://127.0.0.1:{store_config['ports']['rest']}")
+    relay = WakuClient(f"http://127.0.0.1:{relay_config['ports']['rest']}")
+    assert docker_manager.wait_for_peers(relay_config["name"], timeout=60), \
+        "Relay node never connected to the store node"
+    yield store, relay
+    docker_manager.remove_nodes([store_config["name"], relay_config["name"]])
+
+
+@pytest.mark.advanced
+class TestStore:
+    """Test Suite 8: Store protocol history and paginated queries"""
+
+    def test_history_survives_load(self, store_pair, test_topic):
+        """Every message published under load can be resynced from the store"""
+        store, relay = store_pair
+        topic = test_topic + "-load"
+        since = time.time_ns()
+        report = LoadGenerator([relay], [topic], concurrency=8).run(count=300)
+        assert report.failed == 0, f"{report.failed} publishes failed"
+
+        scans = []
+        def archived():
+            scans.append(resync(store, [topic], since, page_size=100))
+            return scans[-1].messages >= report.succeeded
+        wait_for_condition(archived, timeout=30, interval=0.5)
+
+        scan = scans[-1]
+        assert scan.messages == report.succeeded, \
+            f"Store holds {scan.messages} of {report.succeeded} published messages"
+        assert scan.pages >= 3
+
+    def test_paginated_query(self, store_pair, test_topic):
+        """Pages are fetched lazily, in order, with or without prefetch"""
+        store, relay = store_pair
+        topic = test_topic + "-pages"
+        relay.publish_many(topic, [f"history {i}" for i in range(35)])
+        wait_for_condition(lambda: scan_store(store, [topic]).messages >= 35,
+                           timeout=30, interval=0.5)
+
+        metrics = RequestMetrics()
+        lazy = WakuClient(store.base_url, metrics=metrics, node="store")
+        first = list(islice(lazy.iter_store_messages([topic], page_size=10), 15))
+        assert len(first) == 15
+        assert metrics.stats("store", "GET", STORE_ENDPOINT).requests == 2, \
+            "Generator fetched more pages than were consumed"
+
+        ascending = list(store.iter_store_messages([topic], page_size=10))
+        prefetched = list(store.iter_store_messages([topic], page_size=10, prefetch=True))
+        descending = list(store.iter_store_messages([topic], page_size=10, ascending=False))
+        assert len(ascending) == 35
+        assert prefetched == ascending
+        assert descending == ascending[::-1]
+        timestamps = [msg["timestamp"] for msg in ascending]
+        assert timestamps == sorted(timestamps)
+
+        # Time range filters apply on the store node
+        window = list(store.iter_store_messages([topic], start_time=timestamps[10],
+                                                end_time=timestamps[19]))
+        assert [msg["payload"] for msg in window] == \
+            [msg["payload"] for msg in ascending[10:20]]
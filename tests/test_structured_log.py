@@ -0,0 +1,33 @@
+import json
+import logging
+import pytest
+from src.waku_client import WakuClient
+from utils.structured_log import EventSampler, JsonFormatter, QueueLogging
+
+
+@pytest.mark.basic
+class TestStructuredLogging:
+    """Test Suite 19: Queued JSONL logging and event sampling"""
+
+    def test_structured_logging(self, fake_node, test_topic, tmp_path):
+        """Test that queued JSONL logging tags records and samples per-message events"""
+        client = WakuClient(f"http://127.0.0.1:{fake_node.rest_port}", node="node1")
+        path = tmp_path / "run.jsonl"
+        handler = logging.FileHandler(path)
+        handler.setFormatter(JsonFormatter(run_id="run-1"))
+        sampler = EventSampler(every={"publish": 5})
+
+        with QueueLogging([handler], level=logging.DEBUG, sampler=sampler):
+            for i in range(20):
+                assert client.publish_message(test_topic, f"logged {i}")
+        # Stopping closes the file, after writing the sampling summary to it
+        assert handler.stream is None
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        publishes = [r for r in records if r.get("event") == "publish"]
+        assert len(publishes) == 4
+        assert sampler.dropped == {"publish": 16}
+        assert records[-1]["msg"] == "Log sampling dropped {'publish': 16}"
+        assert all(r["run_id"] == "run-1" and r["node"] == "node1" and r["topic"] == test_topic
+                   for r in publishes)
+        assert publishes[0]["msg"] == f"Published message to {test_topic}"
@@ -1,7 +1,10 @@
+import os
 import time
 import logging
 import base64
-from typing import Any, Dict
+from typing import Dict, Optional
+
+from utils.structured_log import EventSampler, JsonFormatter, QueueLogging, new_run_id
 
 def wait_for_condition(condition_func, timeout: int = 30, interval: int = 1) -> bool:
     """Wait for a condition to be true"""
@@ -20,13 +23,41 @@ def decode_base64_payload(encoded_payload: str) -> str:
         logging.error(f"Failed to decode payload: {e}")
         return ""
 
-def setup_logging():
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('test_automation.log')
-        ]
-    )
\ No newline at end of file
+def decode_payload_bytes(encoded_payload) -> bytes:
+    """Decode a base64 payload to raw bytes; raises ``binascii.Error`` if invalid"""
+    return base64.b64decode(encoded_payload, validate=True)
+
+def setup_logging(structured: bool = False, jsonl_path: str = "logs/run.jsonl",
+                  run_id: Optional[str] = None,
+                  sample_every: Optional[Dict[str, int]] = None,
+                  max_events_per_second: Optional[float] = None):
+    """Setup logging configuration.
+
+    With ``structured`` records go through a queue to a background writer,
+    which also writes them as JSONL to ``jsonl_path``; per-message events
+    can be thinned with ``sample_every``/``max_events_per_second``. Returns
+    the ``QueueLogging`` to stop at exit, or None in the default mode.
+    """
+    text_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    if not structured:
+        logging.basicConfig(
+            level=logging.INFO,
+            format=text_format,
+            handlers=[
+                logging.StreamHandler(),
+                logging.FileHandler('test_automation.log')
+            ]
+        )
+        return None
+    
+    directory = os.path.dirname(jsonl_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handlers = [logging.StreamHandler(), logging.FileHandler('test_automation.log')]
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(text_format))
+    json_handler = logging.FileHandler(jsonl_path)
+    json_handler.setFormatter(JsonFormatter(run_id or new_run_id()))
+    handlers.append(json_handler)
+    sampler = EventSampler(sample_every, max_events_per_second)
+    return QueueLogging(handlers, level=logging.INFO, sampler=sampler).start()
@@ -0,0 +1,80 @@
+import os
+import json
+import html
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+_sections: List[Tuple[str, List[Dict[str, Any]]]] = []
+_lock = threading.Lock()
+
+
+def add_report_section(title: str, rows: List[Dict[str, Any]]) -> None:
+    """Queue a table for the pytest-html summary"""
+    with _lock:
+        _sections.append((title, rows))
+
+
+def clear_report_sections() -> None:
+    with _lock:
+        _sections.clear()
+
+
+def export_report_sections() -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Queued sections, to hand from an xdist worker to the controller"""
+    with _lock:
+        return list(_sections)
+
+
+def import_report_sections(sections: List[Tuple[str, List[Dict[str, Any]]]],
+                           source: Optional[str] = None) -> None:
+    """Queue sections exported by another process, titled with their ``source``"""
+    with _lock:
+        for title, rows in sections:
+            _sections.append((f"{title} ({source})" if source else title, rows))
+
+
+def _format_cell(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return html.escape(str(value))
+
+
+def render_report_sections() -> List[str]:
+    """Render queued sections as HTML tables"""
+    rendered = []
+    with _lock:
+        sections = list(_sections)
+    for title, rows in sections:
+        parts = [f"<h3>{html.escape(title)}</h3>"]
+        if rows:
+            columns = list(rows[0].keys())
+            parts.append("<table><thead><tr>")
+            parts.extend(f"<th>{html.escape(str(c))}</th>" for c in columns)
+            parts.append("</tr></thead><tbody>")
+            for row in rows:
+                parts.append("<tr>")
+                parts.extend(f"<td>{_format_cell(row.get(c, ''))}</td>" for c in columns)
+                parts.append("</tr>")
+            parts.append("</tbody></table>")
+        else:
+            parts.append("<p>No data</p>")
+        rendered.append("".join(parts))
+    return rendered
+
+
+def report_path(name: str, worker_id: str = "master", directory: str = "reports") -> str:
+    """Path of a report file; an xdist worker gets its own, e.g. ``reports/perf-gw0.json``"""
+    if worker_id != "master":
+        stem, ext = os.path.splitext(name)
+        name = f"{stem}-{worker_id}{ext}"
+    return os.path.join(directory, name)
+
+
+def write_json_report(path: str, data: Any) -> str:
+    """Write ``data`` as pretty JSON, creating parent directories"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    return path
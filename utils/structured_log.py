@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, List, Optional
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def new_run_id() -> str:
+    """Run ID shared by every xdist worker of one run (``WAKU_RUN_ID``), or a fresh one"""
+    return os.environ.get("WAKU_RUN_ID") or uuid.uuid4().hex[:12]
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record.
+
+    Carries the run ID and xdist worker, the ``node`` and ``event`` passed
+    through ``extra``, and every other ``extra`` field as is.
+    """
+
+    def __init__(self, run_id: str, worker: Optional[str] = None):
+        super().__init__()
+        self.run_id = run_id
+        self.worker = worker or os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": self.run_id,
+            "worker": self.worker,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class EventSampler(logging.Filter):
+    """Thins out high-rate event records before they are queued.
+
+    Records with an ``event`` in ``every`` pass one in ``every[event]``;
+    with ``per_second`` no event passes more often than that in any one
+    second window. Records without an ``event`` always pass. ``dropped``
+    counts what was filtered out, per event.
+    """
+
+    def __init__(self, every: Optional[Dict[str, int]] = None,
+                 per_second: Optional[float] = None):
+        super().__init__()
+        self.every = every or {}
+        self.per_second = per_second
+        self.dropped: Dict[str, int] = {}
+        self._seen: Dict[str, int] = {}
+        self._window: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None:
+            return True
+        with self._lock:
+            seen = self._seen.get(event, 0)
+            self._seen[event] = seen + 1
+            keep = seen % self.every.get(event, 1) == 0
+            if keep and self.per_second is not None:
+                now = time.monotonic()
+                window = self._window.setdefault(event, [now, 0])
+                if now - window[0] >= 1.0:
+                    window[0], window[1] = now, 0
+                keep = window[1] < self.per_second
+                window[1] += keep
+            if not keep:
+                self.dropped[event] = self.dropped.get(event, 0) + 1
+            return keep
+
+
+class LazyQueueHandler(QueueHandler):
+    """``QueueHandler`` that leaves message formatting to the listener thread.
+
+    The stock ``prepare`` renders the message on the logging thread; here
+    only exception tracebacks are, since they cannot cross threads. Log
+    arguments must therefore not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class QueueLogging:
+    """Routes a logger through a queue to ``handlers`` on a background thread.
+
+    ``start`` swaps the logger's handlers for a single ``LazyQueueHandler``
+    (with ``sampler`` as its filter). ``stop`` logs what the sampler
+    dropped, puts the previous handlers back, drains the queue and closes
+    ``handlers``.
+    """
+
+    def __init__(self, handlers: List[logging.Handler], level: int = logging.INFO,
+                 sampler: Optional[EventSampler] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.handlers = handlers
+        self.level = level
+        self.sampler = sampler
+        self.logger = logger or logging.getLogger()
+        self.queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self._previous: Optional[List[logging.Handler]] = None
+        self._previous_level = self.logger.level
+
+    def start(self) -> "QueueLogging":
+        handler = LazyQueueHandler(self.queue)
+        if self.sampler is not None:
+            handler.addFilter(self.sampler)
+        self._previous = self.logger.handlers[:]
+        self._previous_level = self.logger.level
+        self.logger.handlers = [handler]
+        self.logger.setLevel(self.level)
+        self.listener.start()
+        return self
+
+    def stop(self) -> None:
+        if self._previous is None:
+            return
+        # Still queued, so the summary reaches ``handlers`` too
+        if self.sampler is not None and self.sampler.dropped:
+            self.logger.info("Log sampling dropped %s", self.sampler.dropped)
+        self.logger.handlers = self._previous
+        self.logger.setLevel(self._previous_level)
+        self._previous = None
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+    def __enter__(self) -> "QueueLogging":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()